@@ -1,4 +1,5 @@
 import sys, platform, argparse
+from lib.kinematics import KINEMATICS_SOLVERS
 
 # Are we running on a Raspberry Pi?
 is_pi = platform.system() != 'Windows' and 'MANJARO' not in platform.release()
@@ -8,9 +9,24 @@ parser = argparse.ArgumentParser(description='Controller software for the Beatri
 parser.add_argument('--no-io', default=not is_pi, action='store_true',
                     help='Don\'t connect to GPIO pins, useful for when you don\'t want to run this\
                         software on a Raspberry Pi.')
+parser.add_argument('--emulate-io', default=False, action='store_true',
+                    help='Write the servo outputs to an emulated PCA9685 instead of skipping them when\
+                        running without GPIO pins, the I2C traffic of every move is reported.')
+parser.add_argument('--simulate', default=False, action='store_true',
+                    help='Run the arm and the autopilot on a virtual clock that advances instantly instead\
+                        of waiting, moves finish as fast as they can be computed.')
 parser.add_argument('--no-cam', default=False, action='store_true',
                     help='Don\'t try to capture frames from the camera, useful for when you want to\
                         test the software without a pi camera.')
+parser.add_argument('--kinematics', default='analytic', choices=KINEMATICS_SOLVERS,
+                    help='Inverse kinematics solver to use, the analytic solver falls back to ikpy for\
+                        targets it can not solve.')
+parser.add_argument('--no-ik-cache', default=False, action='store_true',
+                    help='Don\'t load or save the persistent inverse kinematics cache, solutions are still\
+                        cached in memory.')
+parser.add_argument('--no-multi-seed', default=False, action='store_true',
+                    help='Solve the ikpy inverse kinematics from a single starting pose instead of from\
+                        several in parallel.')
 
 # Parse arguments (skip first since its the file).
 args = parser.parse_args(sys.argv[1:])
@@ -23,13 +39,20 @@ from debugserver import DebugServer
 from autopilot import AutoPilot
 from commandhandler import CommandHandler
 from objectrecognition import ObjectRecognizer
+from lib.ikcache import DEFAULT_CACHE_FILE
+from joints.emulatedpca9685 import EmulatedPCA9685
+from clock import RealClock, VirtualClock
 
 # Initialize system components.
 server     = DebugServer()
 camera     = Camera(debug_server=server)
-robotarm   = RobotArm(server, debug_mode=args.no_io)
+clock      = VirtualClock() if args.simulate else RealClock()
+pca9685    = EmulatedPCA9685(simulate_latency=True, clock=clock) if args.emulate_io else None
+robotarm   = RobotArm(server, debug_mode=args.no_io, pca9685=pca9685, clock=clock)
 recognizer = ObjectRecognizer('./beatrix-controller/int8-model.lite')
-controller = Controller(robotarm, camera, recognizer)
+controller = Controller(robotarm, camera, recognizer, solver=args.kinematics,
+                        ik_cache_file=None if args.no_ik_cache else DEFAULT_CACHE_FILE,
+                        multi_seed=not args.no_multi_seed)
 autopilot  = AutoPilot(server, controller, camera)
 handler    = CommandHandler(server, controller, autopilot)
 
@@ -42,3 +65,4 @@ try:
 except KeyboardInterrupt as e:
     server.stop()
     camera.stop()
+    controller.kinematics.save()
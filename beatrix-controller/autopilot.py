@@ -1,12 +1,19 @@
-from lib.locations import INPUT_AREA_CAM_VIEW, PUZZLE_LOCATIONS, HOVER_ABOVE_PUZZLES, HOVER_ABOVE_INPUT
+from lib.locations import (INPUT_AREA_CAM_VIEW, INPUT_AREA_CAM_APPROACH, PUZZLE_LOCATIONS,
+    HOVER_ABOVE_PUZZLES, HOVER_ABOVE_INPUT)
 from lib.shapes import Shape
-from lib.constants import BASE_JOINT_ID
-from lib.transform import camera_to_board, board_to_world
-from lib.kinematics import WristOrientation
+from lib.constants import D_TIME
 from objectrecognition import RecognizedObject
+from clock import Clock
 from threading import Thread, Lock
 from enum import Enum
-import time
+
+IDENTIFY_PATH = [INPUT_AREA_CAM_APPROACH, INPUT_AREA_CAM_VIEW]  # Approaches the camera view from the side
+
+
+def move_path(shape: Shape) -> list:
+    """ Returns the waypoints of the move from the grasp pose to the puzzle location of a shape. """
+    return [HOVER_ABOVE_INPUT, HOVER_ABOVE_PUZZLES, PUZZLE_LOCATIONS[shape]]
+
 
 class AutoPilotState(Enum):
     STOPPING = 1
@@ -15,15 +22,25 @@ class AutoPilotState(Enum):
     STARTED  = 4
 
 class AutoPilot:
-    def __init__(self, server: 'DebugServer', controller: 'Controller', camera: 'Camera'):
+    def __init__(self, server: 'DebugServer', controller: 'Controller', camera: 'Camera',
+                 clock: Clock = None):
         self.controller = controller
         self.camera = camera
         self.server = server
+        # Runs on the same clock as the arm by default, so a simulated arm also simulates the waits here.
+        self.clock = clock if clock is not None else controller.robotarm.clock
 
         self.state = AutoPilotState.STOPPED
         self._state_mutex = Lock()
 
         self._pilot_thread = None
+        self._skipped = []  # Pixels of the objects that could not be picked up since the last start
+
+        # Every cycle identifies from the puzzle location the previous object was placed at, plan those
+        # paths into the trajectory cache up front. The move of the object starts at the grasp pose, which
+        # differs every cycle, so it is planned when it is needed.
+        self.controller.robotarm.precompute_paths(
+            [[location] + IDENTIFY_PATH for location in PUZZLE_LOCATIONS.values()])
 
     def is_running(self):
         """ Checks if the autopilot is currently running. (Needs to acquire the state mutex and so may 
@@ -44,6 +61,7 @@ class AutoPilot:
                 self._pilot_thread.join()
             self.__set_state(AutoPilotState.STOPPED)
         self.__set_state(AutoPilotState.STARTING)
+        self._skipped = []
         self._pilot_thread = Thread(
             target=self.__pilot_thread,
             args=(),
@@ -52,13 +70,16 @@ class AutoPilot:
         self._state_mutex.release()
 
     def stop(self):
-        """ Stops the autopilot thread and blocks until the autopilot state has been set to STOPPED. """
+        """ Stops the autopilot thread and blocks until the autopilot state has been set to STOPPED. The
+        running move of the arm is cancelled within one control tick. """
         if self.is_running():
             self._state_mutex.acquire()
             self.__set_state(AutoPilotState.STOPPING)
             self._state_mutex.release()
-            if self._pilot_thread:
-                self._pilot_thread.join()
+            # Keep cancelling in case the pilot thread queues another move before it sees the new state.
+            while self._pilot_thread and self._pilot_thread.is_alive():
+                self.controller.robotarm.stop()
+                self._pilot_thread.join(timeout=D_TIME)
             self._state_mutex.acquire()
             self.__set_state(AutoPilotState.STOPPED)
             self._state_mutex.release()
@@ -80,19 +101,32 @@ class AutoPilot:
         self._state_mutex.release()
 
         while self.is_running():
+            cycle_start = self.clock.monotonic()
+            cycle_paths = self.controller.robotarm.trajectory_cache.get_stats()
             obj = self.__identify_object()
             if not self.is_running(): break
 
-            self.__pickup_object(obj)
+            picked_up = self.__pickup_object(obj)
             if not self.is_running(): break
+            if not picked_up:
+                # Try the other objects first instead of retrying this one forever.
+                print('[!] Could not pick up', obj.label, 'object at', obj.center, 'skipping it.')
+                self._skipped.append(obj.center)
+                continue
 
-            time.sleep(1)
+            self.clock.sleep(1)
             if not self.is_running(): break
 
-            self.__move_object(obj.label)
+            if not self.__move_object(obj.label): continue
             if not self.is_running(): break
 
             self.__place_down_object(obj.label)
+            stats = self.controller.kinematics.get_stats()
+            paths = self.controller.robotarm.trajectory_cache.get_stats()
+            print('[@] Cycle took {:.2f}s, IK cache hits: {}, misses: {}, trajectory cache hits: {}, '
+                  'misses: {}'.format(self.clock.monotonic() - cycle_start, stats['hits'], stats['misses'],
+                                      paths['hits'] - cycle_paths['hits'],
+                                      paths['misses'] - cycle_paths['misses']))
             if not self.is_running(): break
 
     def __identify_object(self) -> RecognizedObject:
@@ -101,52 +135,49 @@ class AutoPilot:
         Returns: object that was recognised and should be picked up
 
         """
-        location_offset_angles = INPUT_AREA_CAM_VIEW.get_angle_dict()
-        location_offset_angles[BASE_JOINT_ID] = location_offset_angles[BASE_JOINT_ID] - 10
-        self.controller.robotarm.set_arm(location_offset_angles)
-        self.controller.go_to_location(location=INPUT_AREA_CAM_VIEW)
-        time.sleep(2)
+        self.controller.follow_path(IDENTIFY_PATH)
+        # The arm stands still once follow_path returns, so any frame captured from now on will do.
+        after = None
         result = None
         while (result is None and self.is_running()):
-            print('[@] Identifying object')
-            result = self.controller.classify_current_view()
-            time.sleep(0.5)
+            frame = self.camera.wait_for_frame(after)
+            if frame is None:
+                print('[!] No frame from the camera')
+                continue
+            print(f'[@] Identifying object in frame {frame.sequence}')
+            after = frame.timestamp
+            result = self.controller.classify_current_view(frame, ignore=self._skipped)
         return result
 
-    def __pickup_object(self, obj: RecognizedObject):
+    def __pickup_object(self, obj: RecognizedObject) -> bool:
         """
         Determines the 3d location of the object to be picked up, moves the arm towards the object,
         and closes grabber
 
         Args: obj: object to be picked up
+        Returns: False if the object is out of reach of the arm or the pickup was cancelled
         """
-        print('[@] Picking up', obj.label, 'object')
-
-        location = camera_to_board(obj.center)
-        print('[@] I wanna go to: ', location)
+        print('[@] Picking up', obj.label, 'object at', obj.center)
+        if not self.is_running(): return False
 
-        location = board_to_world(location)
-        adjusted_location = (location[0], location[1], location[2] - 2)
-        location = adjusted_location
-        if not self.is_running(): return
+        if not self.controller.hover_above_pixel(obj.center):
+            return False
 
-        self.controller.hover_above_coordinates(location, wrist_orientation=WristOrientation.VERTICAL)
+        if not self.is_running(): return False
+        if not self.controller.grasp_at_pixel(obj.center):
+            return False
+        return self.controller.set_grabber(closed=True)
 
-        if not self.is_running(): return
-        self.controller._move_arm_to_workspace_coordinate(location, wrist_orientation=WristOrientation.VERTICAL)
-        self.controller.robotarm.set_grabber(closed=True)
-        time.sleep(1)
-        self.controller.go_to_location(HOVER_ABOVE_INPUT)
-
-    def __move_object(self, shape: Shape):
+    def __move_object(self, shape: Shape) -> bool:
         """
-        Moves the object above the puzzle area
+        Moves the object in one continuous move from where it was grasped, via the positions above the
+        input area and above the center of the puzzle area, down to its location in the puzzle area
         Args:
-            shape: was previously used to hover above the exact puzzle piece location
-            Removed because rare but quirky problems with inversed kinematics
+            shape: label of the object currently in the gripper
+        Returns: False if the move was cancelled
         """
         print('[@] Moving object')
-        self.controller.go_to_location(HOVER_ABOVE_PUZZLES)
+        return self.controller.follow_path(move_path(shape))
 
     def __place_down_object(self, shape: Shape):
         """
@@ -155,5 +186,4 @@ class AutoPilot:
             shape: label of the object currently in the gripper
         """
         print('[@] Placing down object')
-        self.controller.go_to_location(PUZZLE_LOCATIONS[shape])
-        self.controller.robotarm.set_grabber(closed=False)
\ No newline at end of file
+        self.controller.set_grabber(closed=False)
\ No newline at end of file
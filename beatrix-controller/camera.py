@@ -1,12 +1,23 @@
-from threading import Thread
-import cv2, time
+from threading import Thread, Condition
+from clock import Clock, RealClock
+from framering import FrameRing, Frame
+import numpy as np
+import cv2
+
+PREVIEW_SIZE = (640, 480)  # Size (in px) of the frames sent to the debug clients
+PREVIEW_INTERVAL = 0.5  # Time (in s) between the frames sent to the debug clients
+FRAME_TIMEOUT = 2.0  # Time (in s) wait_for_frame waits for a fresh frame by default
+FRAME_INTERVAL = 1 / 30  # Time (in s) between the frames of the camera
+BACKLOG_GRAB = 0.25  # Fraction of FRAME_INTERVAL within which a grab that took a queued frame returns
+BUFFER_STAMP_AGE = 1.0  # Maximum age (in s) of a plausible driver timestamp of a grabbed frame
 
 class Camera():
-    def __init__(self, debug_server):
+    def __init__(self, debug_server, clock: Clock = None):
         self.debug_server = debug_server
+        self.clock = clock if clock is not None else RealClock()
 
         self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        self.cap.set(cv2.CAP_PROP_FPS, 1 / FRAME_INTERVAL)
 
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1088)
@@ -14,6 +25,12 @@ class Camera():
         self.cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1)  # 1 is manual, 3 is auto
         self.cap.set(cv2.CAP_PROP_EXPOSURE, 240)
 
+        # The camera may not support the requested resolution, so the buffers use the one it reports.
+        self.frames = FrameRing((int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                                 int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3))
+        self.__preview = np.empty((PREVIEW_SIZE[1], PREVIEW_SIZE[0], 3), dtype=np.uint8)
+        self.__frame_condition = Condition()
+        self.__waiting = []  # Times after which the threads in wait_for_frame want a frame
         self.running = False
 
     def start(self):
@@ -31,31 +48,113 @@ class Camera():
         if self.camera_thread != None:
             self.camera_thread.join()
 
-    def get_latest_frame(self):
-        """ Gets either the latest frame read from the camera or None if the frame has already been read.
-        The camera thread reads frames every 0.5s so this method will return None for at most 0.5s after
-        the last call. """
-        frame = self.__frame
-        self.__frame = None
-        return frame
+    def get_latest_frame(self, newer_than: int = None) -> Frame:
+        """
+        Gets the latest frame read from the camera, the camera thread decodes a frame every
+        PREVIEW_INTERVAL and whenever wait_for_frame needs one. The frame holds on to its buffer until it
+        is released (see Frame)
+        Args:
+            newer_than: sequence number of the last frame the caller handled, only a later frame is
+                returned
+
+        Returns: Frame with a read-only image, or None if no (newer) frame was read yet
+        """
+        return self.frames.latest(newer_than)
     
+    def wait_for_frame(self, after: float = None, timeout: float = FRAME_TIMEOUT) -> Frame:
+        """
+        Waits until a frame is available that was captured after a point in time, for example for a view
+        of the arm after it stopped moving
+        Args:
+            after: time (clock monotonic, in s) the frame has to be captured after, None for now
+            timeout: maximum time (in s) to wait
+
+        Returns: Frame with a read-only image (to be released, see Frame) or None after the timeout
+        """
+        if after is None:
+            after = self.clock.monotonic()
+        frame = None
+
+        def fresh() -> bool:
+            nonlocal frame
+            frame = self.frames.latest(after=after)
+            return frame is not None
+
+        with self.__frame_condition:
+            self.__waiting.append(after)
+            try:
+                self.__frame_condition.wait_for(fresh, timeout)
+            finally:
+                self.__waiting.remove(after)
+        return frame
+
+    def __capture_time(self, started: float, grabbed: float) -> float:
+        """
+        Determines when a grabbed frame was captured, preferably from the timestamp the driver gave its
+        buffer (V4L2 stamps buffers with the monotonic clock). Without one, a grab that had to wait for
+        its frame means the frame arrived after the grab started. A grab that returned (much) faster
+        than a frame interval took a frame that was queued while the previous frames were handled, so
+        when that frame was captured is not known.
+        Args:
+            started: time (in s) just before the grab
+            grabbed: time (in s) the grab returned
+
+        Returns: capture time (in s) or None if it is not known
+        """
+        stamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if 0 <= grabbed - stamp <= BUFFER_STAMP_AGE:
+            return stamp
+        if grabbed - started < BACKLOG_GRAB * FRAME_INTERVAL:
+            return None
+        return started
+
     def save_frame(self):
         """ Saves the latest frame to the /pix folder as a jpg (if a frame is available.) """
-        if self.__save_frame != None:
-            name = int(time.time())
-            print(f'[CAM] Saving frame as {name}.jpg')
-            cv2.imwrite(f'pix/{name}.jpg', self.__save_frame)
+        frame = self.frames.latest()
+        if frame is not None:
+            with frame:
+                name = int(self.clock.time())
+                print(f'[CAM] Saving frame {frame.sequence} as {name}.jpg')
+                cv2.imwrite(f'pix/{name}.jpg', frame.image)
 
     def __camera_thread(self):
+        """ Grabs every frame of the camera so the driver never holds on to stale frames, but only decodes
+        the frames that are sent to the debug clients or that a thread in wait_for_frame is waiting for.
+        Frames of which the capture time is not known (see __capture_time) are skipped. """
+        previewed = -PREVIEW_INTERVAL
         try:
             while self.running:
-                okay, frame = self.cap.read()
-                okay, frame = self.cap.read()
-                if okay:
-                    self.__frame = frame.copy()
-                    self.__save_frame = frame.copy()
-                    frame = cv2.resize(frame, dsize=(int(640), int(480)),interpolation=cv2.INTER_AREA)
-                    self.debug_server.send_video_frame(frame)
-                    time.sleep(0.5)
+                started = self.clock.monotonic()
+                if not self.cap.grab():
+                    self.clock.sleep(PREVIEW_INTERVAL)
+                    continue
+                grabbed = self.clock.monotonic()
+                captured = self.__capture_time(started, grabbed)
+                if captured is None:
+                    continue
+
+                with self.__frame_condition:
+                    wanted = any(after < captured for after in self.__waiting)
+                preview = grabbed - previewed >= PREVIEW_INTERVAL
+                if not (wanted or preview):
+                    continue
+                buffer = self.frames.acquire_write()
+                if buffer is None:
+                    # Consumers hold every buffer, skip this frame.
+                    continue
+                okay, frame = self.cap.retrieve(image=buffer)
+                if not okay:
+                    continue
+                if not np.may_share_memory(frame, buffer):
+                    np.copyto(buffer, frame)
+                with self.__frame_condition:
+                    self.frames.publish(captured)
+                    self.__frame_condition.notify_all()
+
+                if preview:
+                    previewed = grabbed
+                    cv2.resize(buffer, dsize=PREVIEW_SIZE, dst=self.__preview,
+                               interpolation=cv2.INTER_AREA)
+                    self.debug_server.send_video_frame(self.__preview)
         finally:
             self.cap.release()
@@ -0,0 +1,66 @@
+from abc import ABC, abstractmethod
+from threading import Lock
+import time
+
+
+class Clock(ABC):
+    """
+    Source of time for the motion loop, the autopilot and the camera. The RealClock is used in normal
+    operation, a VirtualClock runs the same code in simulation without ever waiting.
+    """
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        """ Returns the time in seconds of a clock that never goes backwards, like time.monotonic. """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def time(self) -> float:
+        """ Returns the wall clock time in seconds since the epoch, like time.time. """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def sleep(self, seconds: float):
+        """ Waits for the given number of seconds, like time.sleep. """
+        raise NotImplementedError()
+
+
+class RealClock(Clock):
+    """ Clock that follows the system clock. """
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    Simulated clock whose time only advances when a thread sleeps, sleeping returns immediately after
+    moving the clock forward. The time is shared by all threads, so the threads of a simulation should
+    take turns (like the autopilot waiting for the moves of the motion executor) for the clock to show
+    the same timeline as a real run. Free running threads that sleep in a loop, like the camera thread,
+    move the shared time forward on their own and should keep using the RealClock.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._epoch = time.time() - start
+        self._mutex = Lock()
+
+    def monotonic(self) -> float:
+        with self._mutex:
+            return self._now
+
+    def time(self) -> float:
+        return self._epoch + self.monotonic()
+
+    def sleep(self, seconds: float):
+        with self._mutex:
+            self._now += max(seconds, 0)
+        # Still give the other threads a chance to run, as a real sleep would.
+        time.sleep(0)
@@ -3,7 +3,7 @@ from controller import Controller
 from autopilot import AutoPilot
 from debugserver import DebugServer
 import lib.commands as cmd
-import json
+import json, os, time
 
 class CommandHandler:
     def __init__(self, server: DebugServer, controller: Controller, autopilot: AutoPilot):
@@ -16,6 +16,9 @@ class CommandHandler:
             cmd.SET_ANGLES: self._cmd_set_ang,
             cmd.SET_GRABBER: self._cmd_grabber,
             cmd.SET_AUTOPILOT: self._cmd_autopilot,
+            cmd.GET_TIMING: self._cmd_get_timing,
+            cmd.EMERGENCY_STOP: self._cmd_emergency_stop,
+            cmd.DUMP_TELEMETRY: self._cmd_dump_telemetry,
         }
 
     def exec_cmd(self, cmd: bytes, client: Tuple[str,int]):
@@ -58,11 +61,33 @@ class CommandHandler:
             # grabber=self.controller.robotarm
         )
 
+    def _cmd_get_timing(self, reset: bool = False):
+        """ Called to execute a GET_TIMING command, sends the motion loop timing statistics back to all
+        connected debug clients and optionally resets them. """
+        print('[CMD] Get timing.')
+        motion_loop = self.controller.robotarm.motion_loop
+        self.server.send_command({
+            'type': cmd.GET_TIMING,
+            'data': motion_loop.get_stats()
+        })
+        if reset:
+            motion_loop.reset_stats()
+
+    def _cmd_dump_telemetry(self, seconds: float = 10, format: str = 'csv'):
+        """ Called to execute a DUMP_TELEMETRY command, saves the motion telemetry of the last seconds to
+        the /telemetry folder as a csv or npz file. """
+        print('[CMD] Dump telemetry of the last', seconds, 'seconds')
+        os.makedirs('telemetry', exist_ok=True)
+        name = f'telemetry/{int(time.time())}.{format}'
+        self.controller.robotarm.telemetry.dump(name, seconds, format)
+        print(f'[CMD] Saved telemetry as {name}')
+
     @NoRunningAutopilot
     def _cmd_set_ang(self, angles: dict):
-        """ Called to execute a SET_ANGLES command, sets the angles of the servo motors. """
+        """ Called to execute a SET_ANGLES command, sets the angles of the servo motors. Does not wait for
+        the move to finish, a new SET_ANGLES command replaces the running move. """
         print('[CMD] Set angles:', list(angles.values()))
-        self.controller.robotarm.set_arm(angles, 30)
+        self.controller.robotarm.set_arm(angles, 30, preempt=True)
 
     @NoRunningAutopilot
     def _cmd_grabber(self, closed: bool):
@@ -70,6 +95,13 @@ class CommandHandler:
         print('[CMD] Grabber', 'closed' if closed else 'open')
         self.controller.robotarm.set_grabber(closed)
 
+    def _cmd_emergency_stop(self):
+        """ Called to execute an EMERGENCY_STOP command, stops the arm within one control tick and then
+        stops the autopilot. """
+        print('[CMD] Emergency stop')
+        self.controller.robotarm.stop()
+        self.autopilot.stop()
+
     def _cmd_autopilot(self, enabled: bool):
         """ Called to execute a SET_AUTOPILOT command, enabled or disabled the autopilot and blocks 
         until the state change has finished. """
@@ -1,18 +1,25 @@
-from lib.kinematics import IkPyKinematics
+from lib.kinematics import create_kinematics, JOINT_ORDER
+from lib.ikcache import CachedKinematics, DEFAULT_CACHE_FILE
+from lib.reachability import ReachabilityMap
+from pickuptable import PickupTable, DEFAULT_TABLE_FILE, pixel_to_world
 from lib.chain import beatrix_rep
 from lib.constants import *
 from lib.locations import Location, INPUT_AREA_CAM_VIEW, PUZZLE_AREA_CAM_VIEW
+from robotarm import BLEND_RADIUS
 from typing import Tuple
+from concurrent.futures import Future, CancelledError
 from objectrecognition import ObjectRecognizer
 from lib.shapes import Shape
 from lib.locations import PUZZLE_LOCATIONS
 from objectrecognition import draw_on_image
 from lib.kinematics import WristOrientation
+import numpy as np
 import cv2
 from time import time
 from time import process_time
 
 HOVER_DIST = 10
+IGNORE_RADIUS = 40  # Distance (in px) from an ignored pixel within which objects are not classified
 
 
 class Controller:
@@ -22,61 +29,218 @@ class Controller:
     """
 
 
-    def __init__(self, robotarm: 'RobotArm', camera: 'Camera', object_recognizer: ObjectRecognizer):
-        self.kinematics = IkPyKinematics(chain=beatrix_rep)
+    def __init__(self, robotarm: 'RobotArm', camera: 'Camera', object_recognizer: ObjectRecognizer,
+                 solver: str = 'analytic', ik_cache_file: str = DEFAULT_CACHE_FILE,
+                 pickup_table_file: str = DEFAULT_TABLE_FILE, multi_seed: bool = True):
+        kinematics = create_kinematics(solver, chain=beatrix_rep, multi_seed=multi_seed)
+        self.kinematics = CachedKinematics(kinematics, cache_file=ik_cache_file)
+        self.reachability = ReachabilityMap.load(beatrix_rep)
+        self.pickup_table = PickupTable.load(kinematics, self.reachability, HOVER_DIST, pickup_table_file)
         self.robotarm = robotarm
         self.camera = camera
         self.object_recognizer = object_recognizer
+        self.classified_frame = 0  # Sequence number of the last camera frame that was classified
+
+    @staticmethod
+    def _wait(move: Future) -> bool:
+        """ Waits for a move of the robot arm, returns its result or False if it was cancelled. """
+        try:
+            return move.result()
+        except CancelledError:
+            return False
+
+    def _solve_workspace_coordinate(self, position: Tuple[float, float, float],
+            wrist_orientation: WristOrientation = WristOrientation.UNSET) -> dict:
+        """
+            Solves the angles of a 3d point in space, if the point can not be reached with the desired
+            wrist orientation the orientation is left to the solver. The reachability map only knows the
+            analytic solutions, so positions outside of it are still tried and only rejected when the
+            solution misses them by more than REACH_TOLERANCE.
+        Args:
+            position: Tuple of (X, Y, Z) coordinates
+            wrist_orientation: Desired orientation of the end effector (z-axial locked with wrist)
+
+        Returns: Angles dictionary or None if the point is out of reach
+        """
+        if not self.reachability.is_reachable(position, wrist_orientation):
+            if self.reachability.is_reachable(position):
+                print(f'[!] Position {tuple(position)} can not be reached with a {wrist_orientation} '
+                      'wrist.')
+                wrist_orientation = WristOrientation.UNSET
+            else:
+                print(f'[!] Position {tuple(position)} is outside of the reachability map, solving '
+                      'anyway.')
+        angles = self.kinematics.inverse(position=(position[0], position[1], position[2]),
+                                         wrist_orientation=wrist_orientation,
+                                         initial_angles=self.robotarm.get_current_angles(JOINT_ORDER))
+        error = np.linalg.norm(np.subtract(self.kinematics.get_forward_cartesian(angles), position[:3]))
+        if error > REACH_TOLERANCE:
+            print(f'[!] Position {tuple(position)} is out of reach ({error:.1f}cm off), not moving.')
+            return None
+        return angles
 
     def _move_arm_to_workspace_coordinate(self, position: Tuple[float, float, float],
-                                          wrist_orientation: WristOrientation = WristOrientation.UNSET):
+            wrist_orientation: WristOrientation = WristOrientation.UNSET) -> bool:
         """
-            Moves the robot arm to a 3d point in space
+            Moves the robot arm to a 3d point in space, if the point can not be reached with the desired
+            wrist orientation the orientation is left to the solver.
         Args:
             position: Tuple of (X, Y, Z) coordinates
             wrist_orientation: Desired orientation of the end effector (z-axial locked with wrist)
+
+        Returns: False if the point is out of reach or the move was cancelled, True otherwise
+        """
+        new_angles = self._solve_workspace_coordinate(position, wrist_orientation)
+        if new_angles is None:
+            return False
+        return self._wait(self.robotarm.set_arm(new_angles=new_angles))
+
+    def move_linear_to_coordinates(self, position: Tuple[float, float, float], speed: float = 5) -> bool:
+        """
+        Moves the end effector in a straight line to a 3d point in space while keeping the gripper pointing
+        in the same direction, falls back to a regular (joint space) move if the line can not be followed.
+        Args:
+            position: Tuple of (X, Y, Z) coordinates
+            speed: Peak speed of the end effector in cm/s
+
+        Returns: False if the point is out of reach or the move was cancelled, True otherwise
         """
-        new_angles = self.kinematics.inverse(position=(position[0], position[1], position[2]), wrist_orientation=wrist_orientation)
-        self.robotarm.set_arm(new_angles=new_angles)
+        if not self.reachability.is_reachable(position):
+            # Only the joint space move checks whether the solver can reach it after all.
+            return self._move_arm_to_workspace_coordinate(position, WristOrientation.VERTICAL)
+        try:
+            reached = self.robotarm.move_linear(position, speed).result()
+        except CancelledError:
+            return False
+        if not reached:
+            print('[!] Could not follow straight line, moving in joint space instead.')
+            return self._move_arm_to_workspace_coordinate(position, WristOrientation.VERTICAL)
+        return True
 
-    def go_to_location(self, location: Location):
+    def go_to_location(self, location: Location) -> bool:
         """
         Moves the robot arm to a specific pre defined location
         Args:
             location: location object including joint angles
+
+        Returns: False if the move was cancelled, True otherwise
         """
-        angles = location.get_angle_dict()
-        self.robotarm.set_arm(angles)
+        return self._wait(self.robotarm.set_arm(location.get_joint_vector()))
+
+    def follow_path(self, waypoints: list, blend_radius: float = BLEND_RADIUS) -> bool:
+        """
+        Moves the robot arm through a list of locations in one continuous move, only stopping at the last
+        Args:
+            waypoints: Location objects or angles dictionaries
+            blend_radius: distance (in degrees) from an intermediate waypoint at which the arm starts
+                moving towards the next one
+
+        Returns: False if the move was cancelled, True otherwise
+        """
+        waypoints = [w.get_joint_vector() if isinstance(w, Location) else w for w in waypoints]
+        return self._wait(self.robotarm.follow_path(waypoints, blend_radius))
+
+    def set_grabber(self, closed: bool) -> bool:
+        """
+        Opens or closes the grabber once the running and queued moves of the robot arm finished
+        Args:
+            closed: close the grabber if True, open it if False
+
+        Returns: False if the command was cancelled, True otherwise
+        """
+        return self._wait(self.robotarm.set_grabber(closed))
+
+    def angles_above_location(self, location: Location,
+            wrist_orientation: WristOrientation = WristOrientation.UNSET) -> dict:
+        """
+        Solves the angles of the position HOVER_DIST above the given location
+        Args:
+            location: location that should be hovered above
+            wrist_orientation: Desired orientation of the end effector (z-axial locked with wrist)
+
+        Returns: Angles dictionary or None if the position is out of reach
+        """
+        coordinates = self.kinematics.get_forward_cartesian(location.get_joint_vector())
+        return self._solve_workspace_coordinate((
+            coordinates[0],
+            coordinates[1],
+            coordinates[2] + HOVER_DIST,
+        ), wrist_orientation=wrist_orientation)
 
     def hover_above_coordinates(self, coordinates: Tuple[float,float,float], 
-            wrist_orientation: WristOrientation = WristOrientation.UNSET):
+            wrist_orientation: WristOrientation = WristOrientation.UNSET) -> bool:
         """
         Moves the robot arm to a location HOVER_DIST above the given coordinates
         Args:
             coordinates: coordinates that should be hovered above
             wrist_orientation: Desired orientation of the end effector (z-axial locked with wrist)
+
+        Returns: False if the location is out of reach or the move was cancelled, True otherwise
         """
-        self._move_arm_to_workspace_coordinate((
+        return self._move_arm_to_workspace_coordinate((
             coordinates[0],
             coordinates[1],
             coordinates[2] + HOVER_DIST,
         ), wrist_orientation=wrist_orientation)
 
-    def hover_above_location(self, location: Location, wrist_orientation: WristOrientation = WristOrientation.UNSET):
+    def hover_above_pixel(self, pixel: Tuple[float, float]) -> bool:
+        """
+        Moves the robot arm to a location HOVER_DIST above an object seen at a pixel of the input area
+        camera view, using the pickup table when possible.
+        Args:
+            pixel: X,Y coordinates (in px) of the object in the camera frame
+
+        Returns: False if the location is out of reach or the move was cancelled, True otherwise
+        """
+        angles = self.pickup_table.lookup(pixel)
+        if angles is None:
+            return self.hover_above_coordinates(pixel_to_world(pixel), WristOrientation.VERTICAL)
+        return self._wait(self.robotarm.set_arm(new_angles=angles[0]))
+
+    def grasp_at_pixel(self, pixel: Tuple[float, float]) -> bool:
+        """
+        Moves the end effector in a straight line down to an object seen at a pixel of the input area
+        camera view, using the pickup table when possible.
+        Args:
+            pixel: X,Y coordinates (in px) of the object in the camera frame
+
+        Returns: False if the location is out of reach or the move was cancelled, True otherwise (also when
+            the straight line was rejected and the arm moved to the grasp angles with set_arm instead)
+        """
+        angles = self.pickup_table.lookup(pixel)
+        if angles is None:
+            return self.move_linear_to_coordinates(pixel_to_world(pixel))
+        try:
+            reached = self.robotarm.move_linear(self.kinematics.get_forward_cartesian(angles[1])).result()
+        except CancelledError:
+            return False
+        if not reached:
+            print('[!] Straight grasp move to', pixel, 'rejected, moving to the grasp angles directly.')
+            return self._wait(self.robotarm.set_arm(new_angles=angles[1]))
+        return True
+
+    def hover_above_location(self, location: Location,
+            wrist_orientation: WristOrientation = WristOrientation.UNSET) -> bool:
         """
         Moves the robot arm to a location HOVER_DIST above the given location
         Args:
             location: location that should be hovered above
             wrist_orientation: Desired orientation of the end effector (z-axial locked with wrist)
+
+        Returns: False if the location is out of reach or the move was cancelled, True otherwise
         """
-        angles = location.get_angle_dict()
-        coordinates = self.kinematics.get_forward_cartesian(angles)
-        self.hover_above_coordinates(coordinates, wrist_orientation)
+        coordinates = self.kinematics.get_forward_cartesian(location.get_joint_vector())
+        return self.hover_above_coordinates(coordinates, wrist_orientation)
 
-    def classify_current_view(self) -> 'RecognizedObject':
+    def classify_current_view(self, frame: 'Frame' = None, ignore: list = ()) -> 'RecognizedObject':
         """
         Retrieves view from camera and classifies the image according to the object classifier of this
         control class
+        Args:
+            frame: camera frame to classify (it is released afterwards), for example from
+                Camera.wait_for_frame, None classifies the latest frame that was not classified yet
+            ignore: pixels (X,Y in px) of objects that should be left alone, objects within IGNORE_RADIUS
+                of them are not returned
 
         Returns: RecognizedObject of which the object classifier is most certain it is correct
                 None if no classification was produced (or unknown classification)
@@ -85,16 +249,24 @@ class Controller:
 
         start_time = process_time()
 
-        latest_frame = self.camera.get_latest_frame()
+        latest_frame = frame if frame is not None else (
+            self.camera.get_latest_frame(newer_than=self.classified_frame))
         if latest_frame is None:
             return None
 
-        classified_shapes = self.object_recognizer.object_recognition(latest_frame)
-        draw_on_image(latest_frame, classified_shapes)
+        with latest_frame:
+            self.classified_frame = latest_frame.sequence
+            classified_shapes = self.object_recognizer.object_recognition(latest_frame.image)
+            # The frame is read-only, the shapes are drawn on a copy.
+            annotated_frame = latest_frame.image.copy()
+        draw_on_image(annotated_frame, classified_shapes)
         file_string = f"classify-{time()}.jpg"
 
-        cv2.imwrite(file_string, latest_frame)
+        cv2.imwrite(file_string, annotated_frame)
         classified_shapes = list(filter(lambda y: y.label != Shape.Unknown, classified_shapes))
+        classified_shapes = [shape for shape in classified_shapes
+                             if all(np.hypot(shape.center[0] - pixel[0], shape.center[1] - pixel[1])
+                                    > IGNORE_RADIUS for pixel in ignore)]
         if len(classified_shapes) == 0:
             return None
 
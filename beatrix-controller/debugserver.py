@@ -1,5 +1,6 @@
 from lib.constants import VIDEO_PORT, CONTROL_PORT, VIDEO_BUFFER_SIZE
 from lib.serversock import ServerSocket
+from lib.jointvector import JointVector
 import lib.commands as cmd
 from pickle import UnpicklingError
 import pickle, struct, cv2, json
@@ -42,22 +43,26 @@ class DebugServer():
             print('Caught exception:')
             print(e)
 
-    def send_update(self, angles:dict=None, autopilot_state:str=None, grabber:bool=None):
+    def send_update(self, angles:dict=None, autopilot_state:str=None, grabber:bool=None,
+                    planned_duration:float=None):
         """ Sends an update of the current controller state to all the connected debug clients, all 
         parameters are optional and only for the provided parameters an update will be sent.
 
         Args:
-            angles: Angle ID to degrees dictionary as used everywhere else in the codebase
+            angles: Angle ID to degrees dictionary or JointVector, sent as a dictionary
             autopilot_state: String representing the current state of the autopilot (on,off,etc.)
             grabber: Boolean representing the open/closed state of the grabber, True for closed
+            planned_duration: Duration in seconds of the move that is about to start
          """
         data = dict()
         if angles != None: 
-            data['angles'] = angles
+            data['angles'] = angles.to_dict() if isinstance(angles, JointVector) else angles
         if autopilot_state != None:
             data['autopilot'] = str(autopilot_state)
         if grabber != None:
             data['grabber'] = grabber
+        if planned_duration != None:
+            data['planned_duration'] = planned_duration
         self.send_command({
             'type': cmd.GET_UPDATE,
             'data': data
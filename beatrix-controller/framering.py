@@ -0,0 +1,119 @@
+from threading import Lock
+import numpy as np
+
+""" Number of frame buffers of the camera, enough for the capture thread to keep reading while consumers
+hold on to a couple of frames. """
+FRAME_RING_SIZE = 4
+
+
+class Frame:
+    """
+    Reference to a captured frame in a FrameRing. The image is a read-only view of the ring buffer, so
+    copy it before drawing on it. The buffer is not reused for a new frame until the reference is
+    released, either with release or by using the frame as a context manager:
+
+        with camera.get_latest_frame() as frame:
+            ...
+    """
+
+    __slots__ = ('sequence', 'timestamp', 'image', '_ring', '_slot')
+
+    def __init__(self, ring: 'FrameRing', slot: int, sequence: int, timestamp: float, image: np.ndarray):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.image = image
+        self._ring = ring
+        self._slot = slot
+
+    def release(self):
+        """ Releases the reference to the buffer, the image may not be used after this. """
+        if self._ring is not None:
+            self._ring.release(self._slot)
+            self._ring = None
+            self.image = None
+
+    def __enter__(self) -> 'Frame':
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class FrameRing:
+    """
+    Preallocated ring of frame buffers shared by the camera thread and the consumers of its frames. The
+    camera thread reads every frame directly into a free buffer (acquire_write) and then publishes it
+    with the next sequence number and its capture time. Consumers take a reference counted Frame of the
+    latest published buffer (latest), a buffer is only written again once all its references are released
+    and it is no longer the latest frame. No memory is allocated per frame.
+    """
+
+    def __init__(self, shape: tuple, dtype=np.uint8, size: int = FRAME_RING_SIZE):
+        """
+        Args:
+            shape: shape of the frames, (height, width, channels) for cv2 images
+            dtype: data type of the pixels
+            size: number of buffers
+        """
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(size)]
+        self.views = [buffer.view() for buffer in self.buffers]
+        for view in self.views:
+            view.flags.writeable = False
+        self.sequences = [0] * size
+        self.timestamps = [0.0] * size
+        self.references = [0] * size
+        self.sequence = 0
+        self._latest = None
+        self._writing = None
+        self._mutex = Lock()
+
+    def acquire_write(self) -> np.ndarray:
+        """
+        Returns a buffer to capture the next frame in, or None if all buffers are in use by consumers.
+        Only the camera thread writes, the buffer is published with publish.
+        """
+        with self._mutex:
+            for slot in range(len(self.buffers)):
+                if self.references[slot] == 0 and slot != self._latest:
+                    self._writing = slot
+                    return self.buffers[slot]
+            return None
+
+    def publish(self, timestamp: float) -> int:
+        """
+        Makes the buffer returned by the last acquire_write the latest frame
+        Args:
+            timestamp: time (in s) at which the frame was captured
+
+        Returns: sequence number of the frame
+        """
+        with self._mutex:
+            self.sequence += 1
+            self.sequences[self._writing] = self.sequence
+            self.timestamps[self._writing] = timestamp
+            self._latest = self._writing
+            self._writing = None
+            return self.sequence
+
+    def latest(self, newer_than: int = None, after: float = None) -> Frame:
+        """
+        Returns a reference to the latest frame, which has to be released once it is no longer used
+        Args:
+            newer_than: sequence number of a frame that was already handled, only a later frame is returned
+            after: only return the frame if it was captured after this time (in s)
+
+        Returns: Frame or None if no (newer) frame was captured yet
+        """
+        with self._mutex:
+            slot = self._latest
+            if slot is None or (newer_than is not None and self.sequences[slot] <= newer_than):
+                return None
+            if after is not None and self.timestamps[slot] <= after:
+                return None
+            self.references[slot] += 1
+            return Frame(self, slot, self.sequences[slot], self.timestamps[slot], self.views[slot])
+
+    def release(self, slot: int):
+        with self._mutex:
+            self.references[slot] -= 1
@@ -1,12 +1,14 @@
 from joints.parameters import JointParameters
 from joints.singleservo import SingleServo
+from joints.servobus import ServoBus
 from lib.constants import SHOULDER_OFFSET
 class DualServo:
     """
         Class to control dual-servos/shoulder, same functionality as single servo
     """
 
-    def __init__(self, parameters: JointParameters, pca9685, angle, debug_mode: bool = False):
+    def __init__(self, parameters: JointParameters, pca9685, angle, debug_mode: bool = False,
+                 servo_bus: ServoBus = None):
         self.debug_mode = debug_mode
 
         self.current_angle = angle
@@ -35,9 +37,9 @@ class DualServo:
         # self.SingleServo_right = SingleServo(parameters_right, pca9685, angle, debug_mode)
 
         self.SingleServo_left = SingleServo(parameters_left, pca9685, angle, debug_mode,
-                                            offset=SHOULDER_OFFSET[self.port_left])
+                                            offset=SHOULDER_OFFSET[self.port_left], servo_bus=servo_bus)
         self.SingleServo_right = SingleServo(parameters_right, pca9685, angle, debug_mode,
-                                             offset=SHOULDER_OFFSET[self.port_right])
+                                             offset=SHOULDER_OFFSET[self.port_right], servo_bus=servo_bus)
 
     def set_angle(self, angle, new_angle):
         self.new_angle = self.bound_angle(new_angle)
@@ -0,0 +1,57 @@
+from joints.servobus import ServoBus
+import numpy as np
+
+""" Step (in degrees) between the angles of a duty table, the PCA9685 itself only has a resolution of
+about 0.44 degrees (one of 4096 counts of a 20 ms period) for a 180 degree servo. """
+DUTY_TABLE_RESOLUTION = 0.1
+
+
+class DutyTable:
+    """
+    Precomputed mapping from the angle of a joint to the 16 bit PCA9685 duty cycle of one of its servos,
+    with the offset, actuation range bound, mirroring and pulse width settings of that servo included.
+    The angles are quantized to `resolution` degrees so a lookup is a single list index.
+    """
+
+    def __init__(self, duties: list, min_angle: float, resolution: float = DUTY_TABLE_RESOLUTION):
+        self.duties = duties
+        self.min_angle = min_angle
+        self.resolution = resolution
+
+    @staticmethod
+    def build(servo_bus: ServoBus, min_angle: float, max_angle: float, actuation_range: float,
+              offset: float = 0, mirrored: bool = False, calibration: list = None,
+              resolution: float = DUTY_TABLE_RESOLUTION) -> 'DutyTable':
+        """
+        Builds the duty table of a servo
+        Args:
+            servo_bus: servo bus the servo is connected to, its frequency determines the duty cycles
+            min_angle: lowest angle of the joint in degrees
+            max_angle: highest angle of the joint in degrees
+            actuation_range: total range of the servo in degrees
+            offset: angle (in degrees) added to the joint angle before it is sent to the servo
+            mirrored: True if the servo is mounted mirrored and turns the other way
+            calibration: measured (servo angle, pulse width in us) points for a servo that is not linear,
+                None uses the linear mapping of adafruit_motor
+            resolution: step (in degrees) between the angles of the table
+
+        Returns:
+            DutyTable covering min_angle to max_angle
+        """
+        angles = min_angle + np.arange(int(np.ceil((max_angle - min_angle) / resolution)) + 1) * resolution
+        servo_angles = np.clip(np.minimum(angles, max_angle) + offset, 0, actuation_range)
+        if mirrored:
+            servo_angles = actuation_range - servo_angles
+
+        if calibration is None:
+            duties = [servo_bus.angle_to_duty(angle, actuation_range) for angle in servo_angles]
+        else:
+            (points, pulses) = zip(*sorted(calibration))
+            pulses = np.interp(servo_angles, points, pulses)
+            duties = [int((pulse * servo_bus.frequency) / 1000000 * 0xFFFF) for pulse in pulses]
+        return DutyTable(duties, min_angle, resolution)
+
+    def lookup(self, angle: float) -> int:
+        """ Returns the duty cycle for a joint angle, angles outside of the table use the nearest end. """
+        index = int((angle - self.min_angle) / self.resolution + 0.5)
+        return self.duties[min(max(index, 0), len(self.duties) - 1)]
@@ -0,0 +1,156 @@
+from collections import deque
+from threading import Lock
+from clock import Clock, RealClock
+import struct
+
+I2C_CLOCK = 100000  # Clock (in Hz) of the emulated I2C bus, the Raspberry Pi default
+TRANSACTION_OVERHEAD = 100e-6  # Time (in s) the driver spends on an I2C transaction besides clocking bits
+LOG_LENGTH = 100000  # Number of register writes kept in the write log
+LED0_ON_L = 0x06  # Register address of the first PWM register of the PCA9685
+MODE1 = 0x00  # Register address of MODE1
+PRESCALE = 0xFE  # Register address of the prescaler
+AUTO_INCREMENT = 0x20  # AI bit of MODE1
+REFERENCE_CLOCK = 25000000  # Internal oscillator (in Hz) of the PCA9685
+
+
+class EmulatedChannel:
+    """ PWM channel of an EmulatedPCA9685 with the same interface as the channels of adafruit_pca9685,
+    so adafruit_motor servos can be attached to it. """
+
+    def __init__(self, pca: 'EmulatedPCA9685', index: int):
+        self._pca = pca
+        self._index = index
+
+    @property
+    def frequency(self) -> float:
+        return self._pca.frequency
+
+    @property
+    def duty_cycle(self) -> int:
+        return self._pca.get_duty(self._index)
+
+    @duty_cycle.setter
+    def duty_cycle(self, value: int):
+        # Same register encoding as adafruit_pca9685, one transaction per channel.
+        if value == 0xFFFF:
+            (on, off) = (0x1000, 0)
+        elif value < 0x0010:
+            (on, off) = (0, 0x1000)
+        else:
+            (on, off) = (0, value >> 4)
+        self._pca.i2c_device.write(struct.pack('<BHH', LED0_ON_L + 4 * self._index, on, off))
+
+
+class EmulatedI2CDevice:
+    """ Emulated I2C device of an EmulatedPCA9685, with the interface of adafruit_bus_device.I2CDevice
+    that is used to write registers. """
+
+    def __init__(self, pca: 'EmulatedPCA9685'):
+        self._pca = pca
+
+    def __enter__(self) -> 'EmulatedI2CDevice':
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, buffer: bytes):
+        """ Writes the bytes after the first one starting at the register in the first byte. """
+        self._pca.transaction(bytes(buffer))
+
+
+class EmulatedPCA9685:
+    """
+    Software PCA9685 that can replace the adafruit_pca9685 driver (the `pca9685` parameter of the joints
+    and RobotArm) on machines without the hardware. Every I2C transaction updates the emulated registers
+    (with auto-increment once it is enabled in MODE1) and is logged with a timestamp. The time each
+    transaction occupies the bus is modeled from the number of bytes, the bus clock and a fixed driver
+    overhead, optionally the emulator also sleeps for that long so the control loop sees realistic I/O.
+    The traffic counters can be read for any period with mark and get_stats.
+    """
+
+    def __init__(self, i2c_clock: float = I2C_CLOCK, transaction_overhead: float = TRANSACTION_OVERHEAD,
+                 simulate_latency: bool = False, clock: Clock = None):
+        self.clock = clock if clock is not None else RealClock()
+        self.i2c_clock = i2c_clock
+        self.transaction_overhead = transaction_overhead
+        self.simulate_latency = simulate_latency
+        self.registers = bytearray(256)
+        self.registers[PRESCALE] = 0x1E  # Power on default, 200 Hz
+        self.log = deque(maxlen=LOG_LENGTH)
+        self.i2c_device = EmulatedI2CDevice(self)
+        self.channels = [EmulatedChannel(self, index) for index in range(16)]
+        self._mutex = Lock()
+        self._writes = 0
+        self._bytes = 0
+        self._bus_time = 0.0
+        self._created = self.clock.monotonic()
+
+    @property
+    def frequency(self) -> float:
+        return REFERENCE_CLOCK / 4096 / (self.registers[PRESCALE] + 1)
+
+    @frequency.setter
+    def frequency(self, frequency: float):
+        # Same register sequence as adafruit_pca9685, which also enables auto-increment.
+        prescale = int(REFERENCE_CLOCK / 4096.0 / frequency + 0.5) - 1
+        mode = self.registers[MODE1]
+        self.transaction(bytes([MODE1, (mode & 0x7F) | 0x10]))
+        self.transaction(bytes([PRESCALE, prescale]))
+        self.transaction(bytes([MODE1, mode]))
+        self.transaction(bytes([MODE1, mode | 0xA0]))
+
+    def transaction(self, buffer: bytes):
+        """
+        Handles a write transaction addressed to the PCA9685
+        Args:
+            buffer: register address followed by the bytes written from that register on
+        """
+        # Start and stop condition plus 9 clocks (8 bits and an ack) for the address and every byte.
+        bus_time = (2 + 9 * (1 + len(buffer))) / self.i2c_clock + self.transaction_overhead
+        with self._mutex:
+            register = buffer[0]
+            for value in buffer[1:]:
+                self.registers[register] = value
+                if self.registers[MODE1] & AUTO_INCREMENT:
+                    register = (register + 1) % len(self.registers)
+            self.log.append((self.clock.monotonic(), buffer[0], buffer[1:]))
+            self._writes += 1
+            self._bytes += 1 + len(buffer)
+            self._bus_time += bus_time
+        if self.simulate_latency:
+            self.clock.sleep(bus_time)
+
+    def get_duty(self, channel: int) -> int:
+        """ Returns the 16 bit duty cycle a channel is set to, decoded from its registers. """
+        (on, off) = struct.unpack_from('<HH', self.registers, LED0_ON_L + 4 * channel)
+        if on & 0x1000:
+            return 0xFFFF
+        if off & 0x1000:
+            return 0
+        return (off - on) << 4
+
+    def mark(self) -> tuple:
+        """ Returns the current traffic counters, to be passed to get_stats later. """
+        with self._mutex:
+            return (self.clock.monotonic(), self._writes, self._bytes, self._bus_time)
+
+    def get_stats(self, since: tuple = None) -> dict:
+        """
+        Returns the bus traffic since a mark (or since the emulator was created)
+        Args:
+            since: mark returned by an earlier call of mark
+
+        Returns: dictionary with the number of write transactions, bytes on the bus, modeled bus time and
+            the fraction of the elapsed time the bus was busy
+        """
+        (now, writes, total_bytes, bus_time) = self.mark()
+        (start, writes, total_bytes, bus_time) = (
+            (since[0], writes - since[1], total_bytes - since[2], bus_time - since[3]) if since is not None
+            else (self._created, writes, total_bytes, bus_time))
+        return {
+            'writes': writes,
+            'bytes': total_bytes,
+            'bus_time_ms': bus_time * 1000,
+            'utilization': bus_time / (now - start) if now > start else 0.0,
+        }
@@ -1,4 +1,8 @@
 
+from joints.servobus import ServoBus
+from joints.dutytable import DutyTable
+from lib.constants import SERVO_CALIBRATION
+
 class Grabber:
     """
         Class to control the grabber
@@ -11,7 +15,7 @@ class Grabber:
         - set_closed
     """
 
-    def __init__(self, parameters, pca9685, angle, debug_mode: bool = False):
+    def __init__(self, parameters, pca9685, angle, debug_mode: bool = False, servo_bus: ServoBus = None):
         self.debug_mode = debug_mode
         self.angle = angle
         self.port = parameters["port"]
@@ -20,16 +24,24 @@ class Grabber:
         self.open = parameters["open"]
         self.closed = parameters["closed"]
         self.actuation_range = parameters["actuation range"]
+        self.servo_bus = servo_bus
 
-        if not self.debug_mode:
+        if not self.debug_mode and self.servo_bus is not None:
+            self.duty_table = DutyTable.build(self.servo_bus, self.min_angle, self.max_angle,
+                                              self.actuation_range,
+                                              calibration=SERVO_CALIBRATION.get(self.port))
+        elif not self.debug_mode:
             from adafruit_motor import servo
             self.pca = pca9685
             self.grabber = servo.Servo(pca9685.channels[self.port], min_pulse=500, max_pulse=2500,
                                        actuation_range=self.actuation_range)
 
     def set_angle(self, new_angle):
-        new_angle = self.bound_angle(new_angle)
-        self.grabber.angle = new_angle
+        self.angle = self.bound_angle(new_angle)
+        if not self.debug_mode and self.servo_bus is not None:
+            self.servo_bus.set_duty(self.port, self.duty_table.lookup(self.angle))
+        elif not self.debug_mode:
+            self.grabber.angle = self.angle
 
     def set_open(self):
         print("set open")
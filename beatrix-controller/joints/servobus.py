@@ -0,0 +1,91 @@
+from threading import Lock
+import struct
+
+LED0_ON_L = 0x06  # Register address of the first PWM register (LED0_ON_L) of the PCA9685
+CHANNEL_REGISTERS = 4  # Registers per channel: ON_L, ON_H, OFF_L and OFF_H
+CHANNELS = 16  # Number of PWM channels of the PCA9685
+MAX_GAP = 2  # Unchanged channels between changed ones that are rewritten instead of starting a new burst
+MIN_PULSE = 500  # Pulse width (in us) of the servos at angle 0
+MAX_PULSE = 2500  # Pulse width (in us) of the servos at their actuation range
+
+
+def duty_to_registers(duty: int) -> bytes:
+    """ Converts a 16 bit duty cycle to the 4 PWM register bytes of a channel, the same way the
+    duty_cycle setter of adafruit_pca9685 does. """
+    if duty == 0xFFFF:
+        (on, off) = (0x1000, 0)
+    elif duty < 0x0010:
+        (on, off) = (0, 0x1000)
+    else:
+        (on, off) = (0, duty >> 4)
+    return struct.pack('<HH', on, off)
+
+
+class ServoBus:
+    """
+    Output layer between the servo joints and the PCA9685. Joints stage the duty cycle of their channels
+    with set_duty, flush then writes all staged channels that changed since the last flush in as few
+    auto-increment register bursts as possible (one I2C transaction per run of nearby channels), instead
+    of one transaction for every servo.angle assignment. Auto-increment (MODE1 AI bit) is enabled by
+    adafruit_pca9685 when the frequency is set.
+    """
+
+    def __init__(self, pca9685):
+        self.pca = pca9685
+        # Reading the frequency is an I2C transaction itself, so it is only read once.
+        self.frequency = pca9685.frequency
+        self._staged = [None] * CHANNELS
+        self._written = [None] * CHANNELS
+        self._mutex = Lock()
+
+    def angle_to_duty(self, angle: float, actuation_range: float, min_pulse: int = MIN_PULSE,
+                      max_pulse: int = MAX_PULSE) -> int:
+        """
+        Converts a servo angle to a 16 bit duty cycle, the same way adafruit_motor.servo.Servo does
+        Args:
+            angle: angle of the servo in degrees, within 0 and actuation_range
+            actuation_range: angle of the servo (in degrees) at max_pulse
+            min_pulse: pulse width (in us) at angle 0
+            max_pulse: pulse width (in us) at actuation_range
+
+        Returns: duty cycle as written to the PCA9685 (0 - 0xFFFF)
+        """
+        min_duty = int((min_pulse * self.frequency) / 1000000 * 0xFFFF)
+        max_duty = (max_pulse * self.frequency) / 1000000 * 0xFFFF
+        return min_duty + int((angle / actuation_range) * int(max_duty - min_duty))
+
+    def set_duty(self, channel: int, duty: int):
+        """ Stages the duty cycle of a channel, it is written by the next flush. """
+        with self._mutex:
+            self._staged[channel] = duty
+
+    def flush(self) -> int:
+        """
+        Writes the staged duty cycles of the channels that changed to the PCA9685
+        Returns: number of I2C transactions that were needed
+        """
+        with self._mutex:
+            changed = [channel for (channel, duty) in enumerate(self._staged)
+                       if duty is not None and duty != self._written[channel]]
+            if len(changed) == 0:
+                return 0
+
+            # Group the changed channels into runs, small gaps of unchanged (but already written)
+            # channels are included since rewriting them is cheaper than another transaction.
+            runs = [[changed[0], changed[0]]]
+            for channel in changed[1:]:
+                gap = range(runs[-1][1] + 1, channel)
+                if len(gap) <= MAX_GAP and all(self._staged[c] is not None for c in gap):
+                    runs[-1][1] = channel
+                else:
+                    runs.append([channel, channel])
+
+            with self.pca.i2c_device as i2c:
+                for (first, last) in runs:
+                    buffer = bytearray([LED0_ON_L + first * CHANNEL_REGISTERS])
+                    for channel in range(first, last + 1):
+                        buffer += duty_to_registers(self._staged[channel])
+                    i2c.write(buffer)
+            for channel in changed:
+                self._written[channel] = self._staged[channel]
+            return len(runs)
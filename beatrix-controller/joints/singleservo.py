@@ -1,4 +1,7 @@
 from joints.parameters import JointParameters
+from joints.servobus import ServoBus
+from joints.dutytable import DutyTable
+from lib.constants import SERVO_CALIBRATION
 
 class SingleServo:
     """
@@ -17,6 +20,9 @@ class SingleServo:
         _ angle: in degrees, the initial position of the servo
             {base: 0, shoulder: 90, elbow: 90, wrist: 90, grabber: 0}
         - debug_mode: bool
+        - servo_bus: ServoBus the duty cycle is staged on, it is only written when the bus is flushed.
+            The duty cycles are looked up in a DutyTable built once for the servo. Without a bus every
+            set_angle writes to the PCA9685 directly
 
         METHODS
         - set_angle: lineally at max speed
@@ -27,7 +33,8 @@ class SingleServo:
         - current_angle: updated every step when moving
     """
 
-    def __init__(self, parameters: JointParameters, pca9685, angle, debug_mode: bool = False, offset = 0):
+    def __init__(self, parameters: JointParameters, pca9685, angle, debug_mode: bool = False, offset = 0,
+                 servo_bus: ServoBus = None):
         self.offset = offset
         self.debug_mode = debug_mode
         self.current_angle = angle
@@ -39,8 +46,13 @@ class SingleServo:
         self.max_angle = parameters.max_angle
         self.actuation_range = parameters.actuation_range
         self.mirrored = parameters.mirrored
+        self.servo_bus = servo_bus
 
-        if not self.debug_mode:
+        if not self.debug_mode and self.servo_bus is not None:
+            self.duty_table = DutyTable.build(self.servo_bus, self.min_angle, self.max_angle,
+                                              self.actuation_range, self.offset, self.mirrored,
+                                              SERVO_CALIBRATION.get(self.port))
+        elif not self.debug_mode:
             from adafruit_motor import servo
             self.pca = pca9685
             self.servo = servo.Servo(pca9685.channels[self.port], min_pulse=500, max_pulse=2500,
@@ -54,7 +66,9 @@ class SingleServo:
         self.current_angle = self.bound_angle(angle)
         if self.new_angle == self.current_angle:
             self.old_angle = self.new_angle
-        if not self.debug_mode:
+        if not self.debug_mode and self.servo_bus is not None:
+            self.servo_bus.set_duty(self.port, self.duty_table.lookup(self.current_angle))
+        elif not self.debug_mode:
             if not self.mirrored:
                 self.servo.angle = self.__hard_actuation_bound(self.current_angle + self.offset)
             if self.mirrored:
@@ -0,0 +1,89 @@
+from concurrent.futures import Future, CancelledError
+from collections import deque
+from threading import Thread, Condition, Event
+
+
+class MotionExecutor:
+    """
+    Runs motion commands one at a time on a dedicated thread so that callers do not block for the
+    duration of a move. Every submitted command gets a Future that resolves to the return value of the
+    command. Running commands are expected to check `is_cancelled` every control tick and return when
+    it is set. The Future of a cancelled command raises CancelledError instead of returning its value,
+    both when it was cancelled while queued and while running, so callers tell a cancelled move from a
+    failed one through the Future and not through `is_cancelled`, which already belongs to the next
+    command once they get to check it.
+    """
+
+    def __init__(self):
+        self._queue = deque()
+        self._condition = Condition()
+        self._cancel = Event()
+        self._running = False
+        self._thread = Thread(target=self.__executor_thread, args=(), daemon=True)
+        self._thread.start()
+
+    def submit(self, function, *args, preempt: bool = False, **kwargs) -> Future:
+        """
+        Queues a motion command
+        Args:
+            function: function that performs the motion, called with the remaining arguments
+            preempt: cancel the running and all queued commands first instead of appending the command
+                to the queue
+
+        Returns: Future of the result of the command, raises CancelledError if the command was cancelled
+        """
+        future = Future()
+        with self._condition:
+            if preempt:
+                self.__cancel_all()
+            self._queue.append((future, function, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def cancel_all(self):
+        """ Cancels all queued commands and makes the running command stop at its next control tick. """
+        with self._condition:
+            self.__cancel_all()
+
+    def is_cancelled(self) -> bool:
+        """ Checks whether the running command should stop, only meaningful on the executor thread. """
+        return self._cancel.is_set()
+
+    def is_busy(self) -> bool:
+        """ Checks whether a command is running or queued. """
+        with self._condition:
+            return self._running or len(self._queue) > 0
+
+    def __cancel_all(self):
+        """ Note that this method does NOT acquire the condition lock and should only be called while
+        holding it. """
+        while len(self._queue) > 0:
+            (future, _, _, _) = self._queue.popleft()
+            future.cancel()
+        if self._running:
+            self._cancel.set()
+
+    def __executor_thread(self):
+        while True:
+            with self._condition:
+                while len(self._queue) == 0:
+                    self._condition.wait()
+                (future, function, args, kwargs) = self._queue.popleft()
+                self._cancel.clear()
+                self._running = True
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = function(*args, **kwargs)
+                except Exception as e:
+                    print('[!] Motion command failed:', e)
+                    future.set_exception(e)
+                else:
+                    # Only this thread clears the flag, so it still belongs to this command here.
+                    if self._cancel.is_set():
+                        future.set_exception(CancelledError())
+                    else:
+                        future.set_result(result)
+
+            with self._condition:
+                self._running = False
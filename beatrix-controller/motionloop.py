@@ -0,0 +1,102 @@
+from lib.constants import D_TIME
+from clock import Clock, RealClock
+from threading import Lock
+from enum import Enum
+import bisect
+
+""" Upper edges (in ms) of the bins of the tick lateness histogram, the last bin holds everything later
+than the last edge. """
+JITTER_BINS_MS = (0.5, 1, 2, 5, 10, 20, 50)
+
+
+class CatchUp(Enum):
+    """ What the motion loop does after a tick overran its period. """
+    SKIP = 0     # Skip the steps that are already due, the move keeps its planned duration.
+    STRETCH = 1  # Play every step and shift all later deadlines, the move takes longer than planned.
+
+
+class MotionLoop:
+    """
+    Fixed rate (1 / `period` Hz) loop that wakes up on absolute clock.monotonic() deadlines, so time spent
+    on I2C writes or debug server updates does not make the loop drift. A tick that wakes up more than
+    a whole period after its deadline is an overrun and is handled according to the catch up policy.
+    The lateness of every tick is collected in a histogram (see get_stats).
+    """
+
+    def __init__(self, period: float = D_TIME, catch_up: CatchUp = CatchUp.SKIP, clock: Clock = None):
+        self.period = period
+        self.catch_up = catch_up
+        self.clock = clock if clock is not None else RealClock()
+        self.lateness = 0.0  # How late (in s) the current tick woke up
+        self._mutex = Lock()
+        self.reset_stats()
+
+    def ticks(self, steps: int):
+        """
+        Generator that yields the step indices 0 to `steps`-1, step k is yielded at `k` periods after the
+        first one. Steps that are skipped to catch up after an overrun are not yielded, the last step is
+        never skipped.
+        Args:
+            steps: number of steps of the move
+        """
+        start = self.clock.monotonic()
+        step = 0
+        self.lateness = 0.0
+        while step < steps:
+            yield step
+
+            deadline = start + (step + 1) * self.period
+            now = self.clock.monotonic()
+            if now < deadline:
+                self.clock.sleep(deadline - now)
+                now = self.clock.monotonic()
+            lateness = now - deadline
+
+            next_step = step + 1
+            skipped = 0
+            if lateness >= self.period:
+                if self.catch_up == CatchUp.SKIP:
+                    skipped = min(int(lateness / self.period), max(0, steps - 1 - next_step))
+                    next_step += skipped
+                else:
+                    start += lateness
+            self.__record(lateness, skipped)
+            self.lateness = lateness
+            step = next_step
+
+    def get_stats(self) -> dict:
+        """ Returns the tick statistics as a (JSON serializable) dictionary, lateness is in ms. """
+        with self._mutex:
+            return {
+                'period_ms': self.period * 1000,
+                'catch_up': self.catch_up.name,
+                'ticks': self.ticks_count,
+                'overruns': self.overruns,
+                'skipped_steps': self.skipped_steps,
+                'max_lateness_ms': self.max_lateness * 1000,
+                'mean_lateness_ms': (self.total_lateness / self.ticks_count * 1000
+                                     if self.ticks_count > 0 else 0.0),
+                'histogram': {
+                    'bins_ms': list(JITTER_BINS_MS),
+                    'counts': list(self.histogram),
+                },
+            }
+
+    def reset_stats(self):
+        """ Clears all collected tick statistics. """
+        with self._mutex:
+            self.ticks_count = 0
+            self.overruns = 0
+            self.skipped_steps = 0
+            self.max_lateness = 0.0
+            self.total_lateness = 0.0
+            self.histogram = [0] * (len(JITTER_BINS_MS) + 1)
+
+    def __record(self, lateness: float, skipped: int):
+        with self._mutex:
+            self.ticks_count += 1
+            self.overruns += lateness >= self.period
+            self.skipped_steps += skipped
+            self.max_lateness = max(self.max_lateness, lateness)
+            self.total_lateness += lateness
+            self.histogram[bisect.bisect_left(JITTER_BINS_MS, lateness * 1000)] += 1
@@ -0,0 +1,154 @@
+from typing import Tuple
+from lib.kinematics import Kinematics, WristOrientation, JOINT_ORDER, solver_description
+from lib.jointvector import JointVector
+from lib.reachability import ReachabilityMap
+from lib.locations import INPUT_AREA_CAM_VIEW
+from lib import transform
+import hashlib, json, math, os
+import numpy as np
+
+""" Default location of the pickup table, stored next to the object recognition model. """
+DEFAULT_TABLE_FILE = './beatrix-controller/pickup-table.npz'
+
+""" Distance (in px) between the camera pixels that are solved when building the table. """
+DEFAULT_PIXEL_STEP = 32
+
+""" Height (in cm) of the grasp position relative to the board surface. """
+GRASP_OFFSET = -2
+
+# Orientations tried (in order) for every entry of the table, the same fallback as the controller uses.
+ORIENTATIONS = (WristOrientation.VERTICAL, WristOrientation.UNSET)
+
+
+def pixel_to_world(pixel: Tuple[float, float]) -> Tuple[float, float, float]:
+    """ Converts the coordinates (in px) of an object in the input area camera view to the world position
+    (in cm) at which it should be grasped. """
+    location = transform.board_to_world(transform.camera_to_board(pixel))
+    return (location[0], location[1], location[2] + GRASP_OFFSET)
+
+
+class PickupTable:
+    """
+    Lookup table that maps pixel coordinates of the input area camera view (INPUT_AREA_CAM_VIEW) directly
+    to the joint angles needed to hover above and to grasp an object at that pixel. The inverse kinematics
+    are solved for a regular grid of pixels covering the board when the table is built, lookups bilinearly
+    interpolate the angles of the four surrounding grid pixels.
+    """
+
+    def __init__(self, angles: np.ndarray, modes: np.ndarray, origin: Tuple[float, float], step: float,
+                 fingerprint: str = None):
+        self.angles = angles
+        self.modes = modes
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.step = step
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def generate(kinematics: Kinematics, reachability: ReachabilityMap, hover_distance: float,
+                 step: float = DEFAULT_PIXEL_STEP) -> 'PickupTable':
+        """
+        Builds the pickup table by solving the inverse kinematics for every grid pixel
+        Args:
+            kinematics: kinematics used to solve the hover and grasp angles
+            reachability: reachability map used to skip positions that can not be reached
+            hover_distance: height (in cm) of the hover position above the grasp position
+            step: distance (in px) between the solved grid pixels
+
+        Returns:
+            PickupTable covering the board as shown in the camera frame
+        """
+        corners = np.array(transform.img_board, dtype=float)
+        origin = corners.min(axis=0)
+        shape = tuple((np.ceil((corners.max(axis=0) - origin) / step) + 1).astype(int))
+
+        # Angles of the hover (index 0) and grasp (index 1) positions of every grid pixel, the mode is 0
+        # for positions that can not be reached and the value of the wrist orientation + 1 otherwise.
+        angles = np.zeros(shape + (2, len(JOINT_ORDER)))
+        modes = np.zeros(shape + (2,), dtype=np.int8)
+        for i in range(shape[0]):
+            for j in range(shape[1]):
+                position = pixel_to_world(origin + (i * step, j * step))
+                above = (position[0], position[1], position[2] + hover_distance)
+                for (k, target) in enumerate((above, position)):
+                    for orientation in ORIENTATIONS:
+                        if reachability.is_reachable(target, orientation):
+                            solution = kinematics.inverse(target, orientation)
+                            angles[i, j, k] = [solution[joint] for joint in JOINT_ORDER]
+                            modes[i, j, k] = orientation.value + 1
+                            break
+        return PickupTable(angles, modes, origin, step,
+                           fingerprint(kinematics, reachability, hover_distance, step))
+
+    @staticmethod
+    def load(kinematics: Kinematics, reachability: ReachabilityMap, hover_distance: float,
+             table_file: str = DEFAULT_TABLE_FILE) -> 'PickupTable':
+        """
+        Loads the pickup table, the table is only (re)built and saved when it does not exist yet or was
+        built for different calibration constants (camera/board corners, camera view pose, chain
+        definition, joint bounds) or with a different solver
+        Args:
+            kinematics: kinematics used to solve the hover and grasp angles
+            reachability: reachability map of the same chain as the kinematics
+            hover_distance: height (in cm) of the hover position above the grasp position
+            table_file: location of the stored table
+
+        Returns:
+            PickupTable
+        """
+        expected = fingerprint(kinematics, reachability, hover_distance, DEFAULT_PIXEL_STEP)
+        if os.path.exists(table_file):
+            with np.load(table_file) as data:
+                if str(data['fingerprint']) == expected:
+                    return PickupTable(data['angles'], data['modes'], data['origin'], float(data['step']),
+                                       expected)
+            print('[!] Calibration or solver changed, rebuilding pickup table.')
+
+        print(f'[*] Building pickup table {table_file}.')
+        table = PickupTable.generate(kinematics, reachability, hover_distance)
+        table.save(table_file)
+        return table
+
+    def save(self, table_file: str = DEFAULT_TABLE_FILE):
+        """ Saves the table as a compressed NumPy archive. """
+        np.savez_compressed(table_file, angles=self.angles, modes=self.modes, origin=self.origin,
+                            step=self.step, fingerprint=self.fingerprint)
+
+    def lookup(self, pixel: Tuple[float, float]) -> Tuple[JointVector, JointVector]:
+        """
+        Looks up the hover and grasp angles for an object at a pixel of the camera frame
+        Args:
+            pixel: X,Y coordinates (in px) of the object in the input area camera view
+
+        Returns:
+            Tuple of the hover and grasp JointVectors, or None if the pixel is outside the table or
+            the surrounding grid pixels were not solved in the same way (unreachable or a different wrist
+            orientation) and so can not be interpolated
+        """
+        u = (pixel[0] - self.origin[0]) / self.step
+        v = (pixel[1] - self.origin[1]) / self.step
+        i, j = math.floor(u), math.floor(v)
+        if not (0 <= i < self.modes.shape[0] - 1 and 0 <= j < self.modes.shape[1] - 1):
+            return None
+        modes = self.modes[i:i+2, j:j+2]
+        if modes[0, 0, 0] == 0 or modes[0, 0, 1] == 0 or not (modes == modes[0, 0]).all():
+            return None
+
+        u, v = u - i, v - j
+        corners = self.angles[i:i+2, j:j+2]
+        hover, grasp = ((1-u) * ((1-v) * corners[0, 0] + v * corners[0, 1])
+                        + u * ((1-v) * corners[1, 0] + v * corners[1, 1]))
+        return JointVector(hover), JointVector(grasp)
+
+
+def fingerprint(kinematics: Kinematics, reachability: ReachabilityMap, hover_distance: float,
+                step: float) -> str:
+    """ Hash of the calibration constants and the solver the table depends on, a stored table is rebuilt
+    when it changes. """
+    corners = transform.img_board + transform.board
+    calibration = [np.asarray(corner, dtype=float).tolist() for corner in corners]
+    camera_view = INPUT_AREA_CAM_VIEW.get_joint_vector().array.tolist()
+    data = json.dumps([calibration, camera_view, transform.BOARD_WIDTH, transform.BOARD_DEPTH,
+                       GRASP_OFFSET, hover_distance, step, reachability.fingerprint,
+                       solver_description(kinematics)])
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
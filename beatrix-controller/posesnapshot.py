@@ -0,0 +1,27 @@
+from lib.jointvector import JointVector
+
+
+class PoseSnapshot:
+    """
+    Angles of the arm joints after a control tick, as published by the motion executor thread. A snapshot
+    is never changed after it was published (its angles are read-only), every tick replaces the published
+    snapshot with a new one instead. Since replacing an attribute is atomic, other threads read the latest
+    snapshot without a lock and always get the angles of one and the same tick.
+    """
+
+    __slots__ = ('sequence', 'timestamp', 'angles')
+
+    def __init__(self, sequence: int, timestamp: float, angles: JointVector):
+        """
+        Args:
+            sequence: number of the snapshot, incremented by one for every published snapshot
+            timestamp: clock monotonic time (in s) at which the joints were set to the angles
+            angles: angles of the joints, copied into the snapshot
+        """
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.angles = angles.copy()
+        self.angles.array.flags.writeable = False
+
+    def __repr__(self) -> str:
+        return f'PoseSnapshot({self.sequence}, {self.timestamp:.3f}, {self.angles.to_dict()})'
@@ -2,11 +2,39 @@ from joints.parameters import JointParameters
 from joints.singleservo import SingleServo
 from joints.dualservo import DualServo
 from joints.grabber import Grabber
+from joints.servobus import ServoBus
+from joints.emulatedpca9685 import EmulatedPCA9685
 from lib.constants import *
+from lib.kinematics import Kinematics, IkPyKinematics, JOINT_ORDER
+from lib.jointvector import JointVector
+from lib.chain import beatrix_rep
+from lib.locations import LOCATIONS
+from trajectory import Trajectory, TrajectoryCache, plan_synchronized, plan_path
+from motionloop import MotionLoop
+from motionexecutor import MotionExecutor
+from clock import Clock, RealClock
+from telemetry import Telemetry
+from posesnapshot import PoseSnapshot
+from validation import TrajectoryValidator
+from concurrent.futures import Future
+from typing import Tuple
 import numpy as np
-import time, math
+import math
 
 MAX_VELOCITY = 30  # Fastest speed of arm in degrees/s
+BLEND_RADIUS = 10  # Distance (in degrees) from a via point at which follow_path starts the next segment
+
+LINEAR_DAMPING = 0.5  # Damping factor of the damped least squares steps in move_linear (in cm)
+LINEAR_ORIENTATION_WEIGHT = 10  # Weight of the gripper direction error relative to the position error
+LINEAR_TOLERANCE = 0.2  # Distance (in cm) from the target at which move_linear is considered done
+LINEAR_SETTLE_STEPS = 25  # Extra steps move_linear may take to catch up with the end of the line
+
+# Fractions by which a rerouted set_arm move lifts its via point from the midpoint of the move towards the
+# upright INITIAL_ANGLES pose, tried in order until the move no longer violates the validator.
+REROUTE_LIFTS = (0.5, 1.0)
+# Joints in JOINT_ORDER that are lifted towards INITIAL_ANGLES for the via point of a rerouted move.
+REROUTE_MASK = np.array([j_id in (SHOULDER_JOINT_ID, ELBOW_JOINT_ID, WRIST_JOINT_ID)
+                         for j_id in JOINT_ORDER])
 
 class RobotArm:
     """
@@ -28,13 +56,27 @@ class RobotArm:
         PARAMETERS
             - joints
                 list of joints of which this robot arm consists
+            - snapshot
+                PoseSnapshot of the joint angles after the latest control tick, read by other threads
     """
 
-    def __init__(self, debug_server, joint_ids:list=None, debug_mode:bool=False):
+    def __init__(self, debug_server, joint_ids:list=None, debug_mode:bool=False,
+                 kinematics:Kinematics=None, pca9685=None, clock:Clock=None):
         self.debug_server = debug_server
-
-        if debug_mode: 
+        self.kinematics = kinematics if kinematics is not None else IkPyKinematics(beatrix_rep)
+        self.clock = clock if clock is not None else RealClock()
+        self.motion_loop = MotionLoop(D_TIME, clock=self.clock)
+        self.executor = MotionExecutor()
+
+        if pca9685 is not None:
+            # For example an EmulatedPCA9685, the joints then write to it even in debug mode.
+            PCA = pca9685
+            PCA.frequency = 50
+            debug_mode = False
+            self.servo_bus = ServoBus(PCA)
+        elif debug_mode: 
             PCA = None
+            self.servo_bus = None
         else: 
             from board import SCL, SDA
             from adafruit_pca9685 import PCA9685
@@ -42,9 +84,11 @@ class RobotArm:
             I2C = busio.I2C(SCL, SDA)
             PCA = PCA9685(I2C)
             PCA.frequency = 50
+            self.servo_bus = ServoBus(PCA)
+        self.pca = PCA
 
         self.joints = dict()
-        self.grabber = Grabber(GRABBER_PARAMETERS, PCA, 90, debug_mode)
+        self.grabber = Grabber(GRABBER_PARAMETERS, PCA, 90, debug_mode, servo_bus=self.servo_bus)
 
         if joint_ids == None:
             joint_ids = [
@@ -63,95 +107,395 @@ class RobotArm:
 
             if JOINT_TYPE[j_id]["duality"] == "single":
                 self.joints[j_id] = (SingleServo(parameters=parameters, pca9685=PCA,
-                                               angle=parameters.initial_angle, debug_mode=debug_mode))
+                                               angle=parameters.initial_angle, debug_mode=debug_mode,
+                                               servo_bus=self.servo_bus))
             elif JOINT_TYPE[j_id]["duality"] == "dual":
                 self.joints[j_id] = (DualServo(parameters=parameters, pca9685=PCA,
-                                             angle=parameters.initial_angle, debug_mode=debug_mode))
-
-        self.set_arm(INITIAL_ANGLES, 1)
-
-    def set_arm(self, new_angles: dict, v_max:int=25):
+                                             angle=parameters.initial_angle, debug_mode=debug_mode,
+                                             servo_bus=self.servo_bus))
+        self.flush()
+        self.lower_bounds = np.array([self.joints[j_id].min_angle if j_id in self.joints
+                                      else INITIAL_ANGLES[j_id] for j_id in JOINT_ORDER], dtype=float)
+        self.upper_bounds = np.array([self.joints[j_id].max_angle if j_id in self.joints
+                                      else INITIAL_ANGLES[j_id] for j_id in JOINT_ORDER], dtype=float)
+
+        self.snapshot = PoseSnapshot(0, self.clock.monotonic(), self.__joint_angles())
+        self.telemetry = Telemetry(JOINT_ORDER)
+        self.trajectory_cache = TrajectoryCache()
+        self.validator = TrajectoryValidator(self.kinematics)
+        self.set_arm(INITIAL_ANGLES, 1).result()
+        self.precompute_trajectories(LOCATIONS)
+
+    def set_arm(self, new_angles: dict, v_max:int=25, preempt:bool=False) -> Future:
         """
-        Sets the angle of all servos smoothly over period of time
+        Sets the angle of all servos smoothly over period of time, the move is queued on the motion
+        executor and planned from the angles the arm is in when it starts
         ARGUMENTS
             - new_angle: dict()
                 {Joint_id_1: desired angle, Joint_id_2: desired angle, etc...}
                 joint id's as in constants file
         PARAMETERS
             - v_max: float time in seconds
+            - preempt: cancel the running and queued moves instead of appending this move after them
+        RETURNS
+            Future that resolves to True once the move finished or False if it was rejected, and raises
+            CancelledError if it was cancelled
+        """
+        return self.executor.submit(self.__set_arm, new_angles, v_max, preempt=preempt)
+
+    def follow_path(self, waypoints: list, blend_radius: float = BLEND_RADIUS, v_max: int = 25,
+                    preempt: bool = False) -> Future:
         """
+        Moves through a list of waypoints in one continuous move, the arm does not stop at the
+        intermediate waypoints but passes them within `blend_radius` degrees and only comes to rest at
+        the last waypoint
+        Args:
+            waypoints: angles dictionaries {Joint_id_1: desired angle, etc...} with the same keys
+            blend_radius: distance (in degrees) from an intermediate waypoint at which the arm starts
+                moving towards the next one, 0 stops at every waypoint
+            v_max: peak velocity of the joints in degrees/s
+            preempt: cancel the running and queued moves instead of appending this move after them
+
+        Returns:
+            Future that resolves to True once the last waypoint was reached or False if the path was
+            rejected, and raises CancelledError if it was cancelled
+        """
+        return self.executor.submit(self.__follow_path, waypoints, blend_radius, v_max, preempt=preempt)
+
+    def plan_path(self, waypoints: list, blend_radius: float = BLEND_RADIUS,
+                  v_max: int = 25, start: dict = None) -> Trajectory:
+        """
+        Plans the move follow_path makes from the current angles without moving the arm. Paths that were
+        planned before are taken from the trajectory cache
+        Args:
+            waypoints: angles dictionaries {Joint_id_1: desired angle, etc...} with the same keys
+            blend_radius: distance (in degrees) from an intermediate waypoint at which the arm starts
+                moving towards the next one
+            v_max: peak velocity of the joints in degrees/s
+            start: angles to plan the path from instead of the current angles
 
+        Returns: Trajectory through all waypoints
+        """
+        v_max = min(v_max, MAX_VELOCITY)
+        waypoints = [self.bound_angles(waypoint.copy()) for waypoint in waypoints]
+        if start is None:
+            start = self.get_current_angles(waypoints[0].keys())
+        else:
+            start = self.bound_angles({j_id: start[j_id] for j_id in waypoints[0].keys()})
+        waypoints = [start] + waypoints
+        key = TrajectoryCache.key(waypoints, 'path', v_max, blend_radius)
+        return self.trajectory_cache.get(key, lambda: plan_path(
+            waypoints, self.__joint_velocity(v_max), MAX_JOINT_ACCELERATION, MAX_JOINT_JERK, blend_radius,
+            D_TIME))
+
+    def stop(self):
+        """ Cancels all queued moves and stops the running move within one control tick, the arm stays in
+        the position it is in at that moment. """
+        self.executor.cancel_all()
+
+    def __set_arm(self, new_angles: dict, v_max: int) -> bool:
+        trajectory = self.plan_arm(new_angles, v_max)
+        violation = self.validator.check(trajectory, self.get_current_angles())
+        if violation is not None:
+            print(f'[!] Move invalid ({violation}), rerouting.')
+            trajectory = self.__reroute(trajectory, v_max)
+            if trajectory is None:
+                print('[!] No valid reroute found, move rejected.')
+                return False
+        return self.__play(trajectory, validate=False)
+
+    def __reroute(self, trajectory: Trajectory, v_max: int) -> Trajectory:
+        """ Plans the move of a trajectory again through a via point above it, returns None if none of
+        the REROUTE_LIFTS gives a valid move. """
+        start = self.get_current_angles()
+        goal = JointVector.from_dict(trajectory.target, default=start)
+        midpoint = (start.array + goal.array) / 2
+        for lift in REROUTE_LIFTS:
+            via = JointVector(midpoint + lift * REROUTE_MASK * (JointVector().array - midpoint))
+            rerouted = plan_path([start, self.bound_angles(via), goal], self.__joint_velocity(v_max),
+                                 MAX_JOINT_ACCELERATION, MAX_JOINT_JERK, BLEND_RADIUS, D_TIME)
+            if self.validator.check(rerouted, start) is None:
+                return rerouted
+        return None
+
+    def __follow_path(self, waypoints: list, blend_radius: float, v_max: int) -> bool:
+        return self.__play(self.plan_path(waypoints, blend_radius, v_max))
+
+    def plan_arm(self, new_angles: dict, v_max:int=25, start:dict=None) -> Trajectory:
+        """
+        Plans the move set_arm makes from the current angles without moving the arm, all joints start and
+        finish together within their MAX_JOINT_VELOCITY, MAX_JOINT_ACCELERATION and MAX_JOINT_JERK.
+        Moves that were planned before are taken from the trajectory cache
+        Args:
+            new_angles: {Joint_id_1: desired angle, Joint_id_2: desired angle, etc...}
+            v_max: peak velocity of the joints in degrees/s, on top of the per joint velocity limits
+            start: angles to plan the move from instead of the current angles
+
+        Returns: Trajectory of the joints that move
+        """
         if v_max > MAX_VELOCITY:
             print("Currently no implementation for movement that is too fast\n")
             print(f"Velocity: {v_max} degrees/s over the max: {MAX_VELOCITY}")
             v_max = MAX_VELOCITY
 
         new_angles = self.bound_angles(new_angles)
-        old_angles = self.get_current_angles(new_angles.keys())
+        if start is None:
+            old_angles = self.get_current_angles(new_angles.keys())
+        else:
+            old_angles = self.bound_angles({j_id: start[j_id] for j_id in new_angles if j_id in start})
 
         if len(new_angles) != len(old_angles):
             raise ValueError("New angles is not the same size as old angles")
 
-        angle_differences = dict()
-        durations = dict()
-
-        for i, value in new_angles.items():
-            difference = abs(value - old_angles[i])
-            if difference != 0:
-                angle_differences[i] = difference
-                duration_i = (difference * math.pi) / (2 * v_max)
-                durations[i] = duration_i
-
-        if len(durations) == 0:
-            return
-        max_duration = np.max(list(durations.values()))  # for now, use the max duration of all servos
-
-        dtime = D_TIME
-        steps = int(max_duration / dtime)
-
-        # for each step adjust for each servo the angle
-        for step in range(steps):
-            current_ptime = time.process_time()
-            for j_id in angle_differences:
-                calculated_angle = get_angle_smooth(start_angle=old_angles[j_id],
-                                                    end_angle=new_angles[j_id],
-                                                    seconds=durations[j_id], elapsed=(step + 1) * dtime)
-                self.joints[j_id].set_angle(calculated_angle, new_angles[j_id])
-
-            time_elapsed = time.process_time() - current_ptime
+        key = TrajectoryCache.key([old_angles, new_angles], 'arm', v_max)
+        return self.trajectory_cache.get(key, lambda: plan_synchronized(
+            old_angles, new_angles, self.__joint_velocity(v_max), MAX_JOINT_ACCELERATION, MAX_JOINT_JERK,
+            D_TIME))
+
+    @staticmethod
+    def __joint_velocity(v_max: float) -> dict:
+        """ Returns the velocity limit of every joint, its MAX_JOINT_VELOCITY but at most `v_max`. """
+        v_max = min(v_max, MAX_VELOCITY)
+        return {j_id: min(velocity, v_max) for (j_id, velocity) in MAX_JOINT_VELOCITY.items()}
+
+    def planned_duration(self, new_angles: dict, v_max:int=25, start:dict=None) -> float:
+        """
+        Returns how long (in seconds) the move set_arm makes would take, for scheduling
+        Args:
+            new_angles: {Joint_id_1: desired angle, Joint_id_2: desired angle, etc...}
+            v_max: peak velocity of the joints in degrees/s
+            start: angles the move starts from, None for the current angles
+        """
+        return self.plan_arm(dict(new_angles), v_max, start).duration
+
+    def precompute_trajectories(self, locations: list, v_max:int=25):
+        """
+        Plans the moves between every pair of locations into the trajectory cache, so that these moves
+        start without planning when they are made
+        Args:
+            locations: Location objects, like LOCATIONS from lib/locations.py
+            v_max: peak velocity of the joints in degrees/s the moves are planned with
+        """
+        vectors = [location.get_joint_vector() for location in locations]
+        for start in vectors:
+            for goal in vectors:
+                if start is not goal:
+                    self.plan_arm(goal, v_max, start=start)
+        print(f"[*] Precomputed trajectories between {len(locations)} locations, "
+              f"cache holds {self.trajectory_cache.get_stats()['size']}.")
+
+    def precompute_paths(self, paths: list, blend_radius: float = BLEND_RADIUS, v_max: int = 25):
+        """
+        Plans the moves follow_path makes through the given paths into the trajectory cache
+        Args:
+            paths: lists of Location objects, the first is where the arm is when the path is followed,
+                the others are the waypoints passed to follow_path
+            blend_radius: blend radius (in degrees) the paths are followed with
+            v_max: peak velocity of the joints in degrees/s the paths are followed with
+        """
+        for path in paths:
+            vectors = [location.get_joint_vector() for location in path]
+            self.plan_path(vectors[1:], blend_radius, v_max, start=vectors[0])
+        print(f"[*] Precomputed {len(paths)} paths, "
+              f"cache holds {self.trajectory_cache.get_stats()['size']}.")
+
+    def play_trajectory(self, trajectory: Trajectory, preempt: bool = False) -> Future:
+        """
+        Queues a planned trajectory on the motion executor
+        Args:
+            trajectory: trajectory starting at the angles the arm will be in when it starts
+            preempt: cancel the running and queued moves instead of appending this move after them
+
+        Returns: Future that resolves to True once the trajectory finished or False if it was rejected,
+            and raises CancelledError if it was cancelled
+        """
+        return self.executor.submit(self.__play, trajectory, preempt=preempt)
+
+    def __play(self, trajectory: Trajectory, validate: bool = True) -> bool:
+        """ Streams the rows of a trajectory to the servos, one row every D_TIME seconds. Trajectories
+        that do not pass the validator are rejected. Only to be called from the motion executor thread. """
+        if len(trajectory) == 0:
+            return True
+        violation = self.validator.check(trajectory, self.get_current_angles()) if validate else None
+        if violation is not None:
+            print(f'[!] Move rejected, {violation}.')
+            return False
+        print(f'[*] Planned move of {trajectory.duration:.2f}s.')
+        self.debug_server.send_update(planned_duration=trajectory.duration)
+        traffic = self.__mark_traffic()
+
+        target = trajectory.target
+        joints = [(self.joints[j_id], target[j_id]) for j_id in trajectory.joint_ids]
+        targets = JointVector.from_dict(target, default=self.snapshot.angles).array
+        rows = trajectory.angles.tolist()
+        for step in self.motion_loop.ticks(len(rows)):
+            if self.executor.is_cancelled():
+                break
+            for ((joint, new_angle), angle) in zip(joints, rows[step]):
+                joint.set_angle(angle, new_angle)
+            self.flush()
+            self.__end_tick(targets)
+
+            if step % 10 == 0:
+                self.debug_server.send_update(
+                    angles=self.get_current_angles())
+
+        self.debug_server.send_update(
+            angles=self.get_current_angles())
+        self.__report_traffic(traffic)
+        return not self.executor.is_cancelled()
+
+    def move_linear(self, target_xyz: Tuple[float, float, float], speed: float = 5,
+                    keep_orientation: bool = True, preempt: bool = False) -> Future:
+        """
+        Moves the end effector along a straight line from its position at the start of the move to the
+        target position. Instead of solving the inverse kinematics for every tick, the joint angles are
+        corrected every tick with a damped least squares step towards the next point on the line.
+        Args:
+            target_xyz: X,Y,Z coordinates of the end of the line
+            speed: peak speed of the end effector in cm/s (the line starts and ends smoothly)
+            keep_orientation: keep the gripper pointing in the same direction during the move
+            preempt: cancel the running and queued moves instead of appending this move after them
+
+        Returns:
+            Future that resolves to True if the target was reached and False if the joint bounds or
+            velocity prevented it, and raises CancelledError if the move was cancelled
+        """
+        return self.executor.submit(self.__move_linear, target_xyz, speed, keep_orientation,
+                                    preempt=preempt)
+
+    def __move_linear(self, target_xyz: Tuple[float, float, float], speed: float,
+                      keep_orientation: bool) -> bool:
+        angles = self.get_current_angles()
+        max_step = MAX_VELOCITY * D_TIME
+
+        start = np.array(self.kinematics.get_forward_cartesian(angles))
+        target = np.array(target_xyz, dtype=float)
+        direction = self.kinematics.get_forward_frame(angles)[:3, 2]
+
+        duration = (np.linalg.norm(target - start) * math.pi) / (2 * speed)
+        steps = int(duration / D_TIME)
+        line = start + np.linspace(0, 1, max(2, steps))[:, np.newaxis] * (target - start)
+        violation = self.validator.check_points(line)
+        if violation is not None:
+            print(f'[!] Linear move rejected, {violation}.')
+            return False
+        traffic = self.__mark_traffic()
+        targets = [math.nan] * len(JOINT_ORDER)
+
+        for step in self.motion_loop.ticks(steps + LINEAR_SETTLE_STEPS):
+            if self.executor.is_cancelled():
+                break
+            progress = min(1.0, (step + 1) / steps) if steps > 0 else 1.0
+            goal = start + (-.5 * math.cos(progress * math.pi) + .5) * (target - start)
+
+            frame = self.kinematics.get_forward_frame(angles)
+            error = goal - frame[:3, 3]
+            if step >= steps and np.linalg.norm(error) < LINEAR_TOLERANCE:
+                break
+
+            jacobian = self.kinematics.jacobian(angles)
+            rows, errors = jacobian[:3], error
+            if keep_orientation:
+                # Only the direction of the gripper is kept, rotating around its own axis is free.
+                current = frame[:3, 2]
+                projection = np.eye(3) - np.outer(current, current)
+                rows = np.vstack((rows, LINEAR_ORIENTATION_WEIGHT * projection @ jacobian[3:]))
+                errors = np.concatenate((errors, LINEAR_ORIENTATION_WEIGHT * np.cross(current, direction)))
+
+            damping = LINEAR_DAMPING**2 * np.eye(len(errors))
+            delta = rows.T @ np.linalg.solve(rows @ rows.T + damping, errors)
+            angles = self.bound_angles(
+                JointVector(angles.array + np.clip(np.degrees(delta), -max_step, max_step)))
+            for (j_id, angle) in angles.items():
+                if j_id in self.joints:
+                    self.joints[j_id].set_angle(angle, angle)
+            self.flush()
+            # The joint angles at the end of a linear move are not known in advance.
+            self.__end_tick(targets)
+
             if step % 10 == 0:
                 self.debug_server.send_update(
                     angles=self.get_current_angles())
-            if time_elapsed >= dtime:
-                # print("!!!! Process took longer than control loop time !!!!")
-                # print("time elapsed = {}".format(time_elapsed))
-                pass
-            else:
-                time.sleep(dtime - time_elapsed)
 
         self.debug_server.send_update(
             angles=self.get_current_angles())
+        self.__report_traffic(traffic)
+        reached = np.array(self.kinematics.get_forward_cartesian(angles))
+        if self.executor.is_cancelled():
+            return False
+        return bool(np.linalg.norm(target - reached) < LINEAR_TOLERANCE)
+
+    def set_grabber(self, closed, angle=None, preempt: bool = False) -> Future:
+        """
+        Opens or closes the grabber, the command is queued on the motion executor like the moves so the
+        grabber is only set once the moves submitted before it finished
+        Args:
+            closed: close the grabber if True, open it if False (ignored when an angle is given)
+            angle: angle to set the grabber to instead of its open or closed angle
+            preempt: cancel the running and queued moves instead of appending this command after them
+
+        Returns:
+            Future that resolves to True once the grabber was set, and raises CancelledError if it was
+            cancelled before that
+        """
+        return self.executor.submit(self.__set_grabber, closed, angle, preempt=preempt)
 
-    def set_grabber(self, closed, angle=None):
-        """If no angle is parsed, state=0 is open, state=1 is closed"""
+    def __set_grabber(self, closed, angle) -> bool:
         if angle:
             self.grabber.set_angle(angle)
         elif closed:
             self.grabber.set_closed()
         else:
             self.grabber.set_open()
+        self.flush()
         self.debug_server.send_update(
             grabber=closed)
+        return True
+
+    def flush(self):
+        """ Writes the servo outputs staged since the last flush to the PCA9685, one I2C burst for all
+        channels that changed. Does nothing in debug mode. """
+        if self.servo_bus is not None:
+            self.servo_bus.flush()
+
+    def __end_tick(self, targets: list):
+        """ Publishes the angles sent to the joints this tick as a new snapshot and records them in the
+        telemetry. Only to be called from the motion executor thread, the only thread that moves the
+        joints. """
+        self.snapshot = PoseSnapshot(self.snapshot.sequence + 1, self.clock.monotonic(),
+                                     self.__joint_angles())
+        self.telemetry.record(self.snapshot.timestamp, self.motion_loop.lateness,
+                              self.snapshot.angles.array, targets)
+
+    def __joint_angles(self) -> JointVector:
+        """ Reads the angles of the joints, joints this arm does not have are at their initial angle. """
+        return JointVector([self.joints[j_id].current_angle if j_id in self.joints
+                            else INITIAL_ANGLES[j_id] for j_id in JOINT_ORDER])
+
+    def __mark_traffic(self):
+        """ Marks the start of a move for __report_traffic, only the emulated PCA9685 counts its
+        traffic. """
+        return self.pca.mark() if isinstance(self.pca, EmulatedPCA9685) else None
+
+    def __report_traffic(self, mark):
+        if mark is not None:
+            stats = self.pca.get_stats(mark)
+            print(f"[@] Move used {stats['writes']} I2C writes, {stats['bytes']} bytes, "
+                  f"{stats['bus_time_ms']:.1f}ms bus time ({stats['utilization'] * 100:.1f}% of the bus).")
 
     def bound_angles(self, angles: dict):
         """
         Returns a list of angles such that all the angles lie within the bounds as defined in constants
         Args:
-            angles: dictionary of angles that should be bounded
+            angles: dictionary of angles that should be bounded, or a JointVector that is clamped as a
+                whole
 
-        Returns: dictionary of bound angles
+        Returns: dictionary of bound angles, a new JointVector for a JointVector
 
         """
+        if isinstance(angles, JointVector):
+            return angles.clamp(self.lower_bounds, self.upper_bounds)
         for angle_id, angle in angles.items():
             if self.joints[angle_id].min_angle > angle:
                 angles[angle_id] = self.joints[angle_id].min_angle
@@ -162,41 +506,21 @@ class RobotArm:
 
     def get_current_angles(self, requested_angles=None):
         """
-        Returns dictionary of angles the joints are currently in
+        Returns the angles the joints are currently in, taken from the latest published snapshot so the
+        angles are all of the same control tick even while the arm is moving
         Args:
             requested_angles: angles of which the angles are required, if None returns angles of all joints
 
-        Returns: dictionary of current angles of the requested joints
+        Returns: dictionary of current angles of the requested joints, or a JointVector (a copy that the
+            caller may change) of all joints if None were requested (joints this arm does not have are at
+            their initial angle)
 
         """
+        snapshot = self.snapshot
         if requested_angles is None:
-            to_be_retrieved_angles = self.joints
-        else:
-            to_be_retrieved_angles = requested_angles
+            return snapshot.angles.copy()
 
         angles = dict()
-        for j_id in to_be_retrieved_angles:
-            angles[j_id] = self.joints[j_id].current_angle
+        for j_id in requested_angles:
+            angles[j_id] = snapshot.angles[j_id]
         return angles
-
-
-
-
-def get_angle_smooth(start_angle, end_angle, seconds, elapsed):
-    """
-        Determines angles for different phases in a move such that a smooth motion is achieved
-        Arguments:
-            start_angle: the angle of the servo before this function was called
-            end_angle: the angle we want the servo to go too
-            seconds: how long the motion should last
-            elapsed: how much time has passed
-        Returns: new angle given the elapsed time
-    """
-    moving_angle = abs(start_angle - end_angle)  # degrees the servo has to move
-    time = (elapsed / seconds) * np.pi
-    if elapsed < seconds:
-        if end_angle > start_angle:
-            return start_angle + (-.5 * math.cos(time) + .5) * moving_angle
-        if end_angle < start_angle:
-            return start_angle - (-.5 * math.cos(time) + .5) * moving_angle
-    return end_angle
@@ -0,0 +1,89 @@
+from lib.constants import D_TIME
+import numpy as np
+
+""" Number of seconds of control ticks kept by the telemetry ring buffer. """
+TELEMETRY_SECONDS = 120
+
+""" Formats the telemetry can be dumped in. """
+TELEMETRY_FORMATS = ('csv', 'npz')
+
+
+class Telemetry:
+    """
+    Preallocated ring buffer with one row for every control tick of the arm: the timestamp (clock
+    monotonic time in s), how late the tick woke up (in s), the commanded angle of every joint and the
+    target angle of the running move for every joint. Once full the oldest rows are overwritten. Only
+    the motion executor thread writes, recording a tick copies one row into the buffer.
+    """
+
+    def __init__(self, joint_ids: list, capacity: int = int(TELEMETRY_SECONDS / D_TIME)):
+        self.joint_ids = list(joint_ids)
+        self.columns = (['time', 'lateness'] + [f'commanded_{j_id}' for j_id in self.joint_ids]
+                        + [f'target_{j_id}' for j_id in self.joint_ids])
+        self.data = np.zeros((capacity, len(self.columns)))
+        self.capacity = capacity
+        self.count = 0
+        self._target = 2 + len(self.joint_ids)
+
+    def record(self, timestamp: float, lateness: float, commanded: list, target: list):
+        """
+        Records a control tick
+        Args:
+            timestamp: time of the tick in seconds
+            lateness: time (in seconds) the tick woke up after its deadline
+            commanded: angles sent to the joints, in the order of joint_ids
+            target: angles at the end of the running move, in the order of joint_ids
+        """
+        row = self.data[self.count % self.capacity]
+        row[0] = timestamp
+        row[1] = lateness
+        row[2:self._target] = commanded
+        row[self._target:] = target
+        self.count += 1
+
+    def snapshot(self, seconds: float = None) -> list:
+        """
+        Returns the recorded rows without copying them, note that the rows are overwritten by later ticks
+        when the buffer wraps around so copy them to keep them
+        Args:
+            seconds: only return the rows of the last `seconds` before the newest row, None returns all
+
+        Returns:
+            List of at most two views of the buffer, together in chronological order
+        """
+        end = self.count % self.capacity
+        if self.count <= self.capacity:
+            views = [self.data[:self.count]]
+        else:
+            views = [self.data[end:], self.data[:end]]
+        views = [view for view in views if len(view) > 0]
+        if seconds is None or len(views) == 0:
+            return views
+
+        start = views[-1][-1, 0] - seconds
+        return [view[np.searchsorted(view[:, 0], start):] for view in views
+                if view[-1, 0] >= start]
+
+    def to_array(self, seconds: float = None) -> np.ndarray:
+        """ Returns a copy of the rows of the last `seconds` (all rows if None) in chronological order. """
+        views = self.snapshot(seconds)
+        if len(views) == 0:
+            return np.zeros((0, len(self.columns)))
+        return np.concatenate(views)
+
+    def dump(self, file: str, seconds: float = None, format: str = 'csv'):
+        """
+        Saves the rows of the last `seconds` to a file
+        Args:
+            file: location of the file
+            seconds: number of seconds to save, None saves everything that is recorded
+            format: 'csv' for a text file with a header or 'npz' for a compressed NumPy archive with the
+                rows (`data`) and column names (`columns`)
+        """
+        data = self.to_array(seconds)
+        if format == 'csv':
+            np.savetxt(file, data, fmt='%.6f', delimiter=',', header=','.join(self.columns), comments='')
+        elif format == 'npz':
+            np.savez_compressed(file, data=data, columns=np.array(self.columns))
+        else:
+            raise ValueError(f'Unknown telemetry format {format}')
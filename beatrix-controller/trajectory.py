@@ -0,0 +1,286 @@
+from lib.constants import D_TIME
+from collections import OrderedDict
+from threading import Lock
+import numpy as np
+
+""" Number of planned trajectories kept by the trajectory cache. """
+TRAJECTORY_CACHE_SIZE = 512
+
+""" Decimals the angles of a trajectory cache key are rounded to, so moves that start where the previous
+move to the same location ended share a key. """
+TRAJECTORY_KEY_DECIMALS = 2
+
+""" Bisection steps plan_path takes to find the longest overlap of two path segments within the joint
+limits. """
+BLEND_SEARCH_STEPS = 8
+
+
+class Trajectory:
+    """
+    Joint space trajectory sampled every `d_time` seconds, stored as a steps x joints array of angles (in
+    degrees) with one column per joint in `joint_ids`. The last row holds the target angles.
+    """
+
+    def __init__(self, joint_ids: list, angles: np.ndarray, d_time: float = D_TIME):
+        self.joint_ids = list(joint_ids)
+        self.angles = angles
+        self.d_time = d_time
+
+    def __len__(self) -> int:
+        return len(self.angles)
+
+    @property
+    def duration(self) -> float:
+        """ Duration of the trajectory in seconds. """
+        return len(self.angles) * self.d_time
+
+    @property
+    def target(self) -> dict:
+        """ Angles dictionary of the end of the trajectory. """
+        if len(self.angles) == 0:
+            return {}
+        return dict(zip(self.joint_ids, self.angles[-1].tolist()))
+
+
+def plan_path(waypoints: list, velocity: dict, acceleration: dict, jerk: dict, blend_radius: float,
+              d_time: float = D_TIME) -> Trajectory:
+    """
+    Plans one continuous move through a list of waypoints. Every segment between two waypoints is a time
+    synchronized double S move like `plan_synchronized`, but the next segment already starts when the
+    current one is within `blend_radius` degrees (of the joint that moves the furthest) of its waypoint.
+    The segments are added up, so the arm rounds off the corners at the intermediate waypoints instead of
+    stopping at them and only comes to rest at the last waypoint. Overlapping segments are kept within
+    the velocity, acceleration and jerk limits of every joint.
+    Args:
+        waypoints: angles dictionaries (all with the same keys) starting with the current angles
+        velocity: maximum velocity (in degrees/s) of every joint
+        acceleration: maximum acceleration (in degrees/s^2) of every joint
+        jerk: maximum jerk (in degrees/s^3) of every joint
+        blend_radius: distance (in degrees) from an intermediate waypoint at which the next segment
+            starts, 0 stops at every waypoint
+        d_time: time between the steps of the trajectory in seconds
+
+    Returns:
+        Trajectory of all joints of the waypoints
+    """
+    joint_ids = list(waypoints[0].keys())
+    points = np.array([[waypoint[j_id] for j_id in joint_ids] for waypoint in waypoints], dtype=float)
+    deltas = np.diff(points, axis=0)
+    distances = np.max(np.abs(deltas), axis=1) if len(deltas) > 0 else np.zeros(0)
+    deltas, distances = deltas[distances > 0], distances[distances > 0]
+    if len(deltas) == 0:
+        return Trajectory(joint_ids, np.zeros((0, len(joint_ids))), d_time)
+
+    limits = np.array([[velocity[j_id], acceleration[j_id], jerk[j_id]] for j_id in joint_ids],
+                      dtype=float)
+    profiles = []
+    for delta in np.abs(deltas):
+        moving = delta > 0
+        profiles.append(double_s_profile(*np.min(limits[moving] / delta[moving, np.newaxis], axis=0)))
+    durations = np.array([2 * t_acc + t_const for (t_acc, _, t_const, _) in profiles])
+
+    def excess(angles: np.ndarray) -> float:
+        # Factor by which consecutive samples of the path exceed the limits. Stretching a path in time by
+        # a factor divides the velocities by it, the accelerations by its square and the jerks by its cube.
+        return max(np.max(np.abs(np.diff(angles, n=n, axis=0)) / (limits[:, n - 1] * d_time**n)) ** (1 / n)
+                   for n in (1, 2, 3))
+
+    def corner(i: int, overlap: float) -> float:
+        # Excess of segment i and the next one overlapping during the last `overlap` seconds of segment i.
+        start = durations[i] - overlap
+        times = start + np.arange(-3, np.ceil(overlap / d_time) + 4) * d_time
+        return excess(np.outer(double_s_position(times, *profiles[i]), deltas[i]) +
+                      np.outer(double_s_position(times - start, *profiles[i + 1]), deltas[i + 1]))
+
+    # Time at which each segment is within blend_radius of its end, found on the (monotonic) position of
+    # its profile. The next segment starts there, but only during the deceleration of the current segment
+    # and within the acceleration of the next one. Where a joint turns around both accelerate it in the
+    # same direction, the overlap is then shortened until the joints stay within their limits.
+    blends = np.empty(len(profiles))
+    for (i, profile) in enumerate(profiles):
+        times = np.linspace(0, durations[i], 1001)
+        remaining = 1 - np.minimum(blend_radius / distances[i], 0.5)
+        blends[i] = np.interp(remaining, double_s_position(times, *profile), times)
+        if i + 1 < len(profiles):
+            overlap = min(durations[i] - blends[i], profile[0], profiles[i + 1][0])
+            if corner(i, overlap) > 1:
+                (shortest, longest) = (0.0, overlap)
+                for _ in range(BLEND_SEARCH_STEPS):
+                    overlap = (shortest + longest) / 2
+                    if corner(i, overlap) <= 1:
+                        shortest = overlap
+                    else:
+                        longest = overlap
+                overlap = shortest
+            blends[i] = durations[i] - overlap
+
+    def sample(stretch: float) -> np.ndarray:
+        starts = np.concatenate(([0], np.cumsum(blends[:-1]))) * stretch
+        steps = max(1, int(np.ceil(np.max(starts + durations * stretch) / d_time)))
+        elapsed = (np.arange(steps) + 1) * d_time
+        progress = np.column_stack([double_s_position((elapsed - start) / stretch, *profile)
+                                    for (start, profile) in zip(starts, profiles)])
+        return points[0] + progress @ deltas
+
+    angles = sample(1.0)
+    # Slow down the whole path if the sampled path still exceeds the limits somewhere.
+    stretch = excess(np.vstack((np.repeat(points[:1], 3, axis=0), angles)))
+    if stretch > 1:
+        angles = sample(stretch)
+    return Trajectory(joint_ids, angles, d_time)
+
+
+def double_s_profile(velocity: float, acceleration: float, jerk: float) -> tuple:
+    """
+    Time optimal jerk limited (double S) profile from rest to rest over a distance of 1
+    Args:
+        velocity: velocity limit (in 1/s)
+        acceleration: acceleration limit (in 1/s^2)
+        jerk: jerk limit (in 1/s^3)
+
+    Returns:
+        Tuple of the duration of the acceleration phase, of the jerk phases within it, of the constant
+        velocity phase and the velocity that is reached
+    """
+    # Profile that reaches the velocity limit, with or without a constant acceleration phase.
+    if velocity * jerk >= acceleration**2:
+        t_jerk = acceleration / jerk
+        t_acc = t_jerk + velocity / acceleration
+    else:
+        t_jerk = np.sqrt(velocity / jerk)
+        t_acc = 2 * t_jerk
+    t_const = 1 / velocity - t_acc
+    if t_const >= 0:
+        return (t_acc, t_jerk, t_const, velocity)
+
+    # Too short to reach the velocity limit: the distance is covered during acceleration and deceleration.
+    t_jerk = acceleration / jerk
+    t_acc = (t_jerk + np.sqrt(t_jerk**2 + 4 / acceleration)) / 2
+    if t_acc < 2 * t_jerk:
+        t_jerk = np.cbrt(1 / (2 * jerk))
+        t_acc = 2 * t_jerk
+    return (t_acc, t_jerk, 0.0, 1 / t_acc)
+
+
+def double_s_position(t: np.ndarray, t_acc: float, t_jerk: float, t_const: float,
+                      v_lim: float) -> np.ndarray:
+    """ Evaluates a double S profile (see `double_s_profile`) at times `t`, goes from 0 to 1. """
+    duration = 2 * t_acc + t_const
+    t = np.clip(t, 0, duration)
+    jerk = v_lim / (t_jerk * (t_acc - t_jerk))
+
+    def rising(t):
+        # Position during the first two phases (increasing then constant acceleration).
+        a_max = jerk * t_jerk
+        ramp = jerk * np.minimum(t, t_jerk)**3 / 6
+        after = np.maximum(t - t_jerk, 0)
+        return ramp + (jerk * t_jerk**2 / 2) * after + (a_max / 2) * after**2
+
+    def accelerating(t):
+        # The velocity during acceleration is point symmetric: v(t) + v(t_acc - t) = v_lim.
+        return np.where(t <= t_acc - t_jerk, rising(t),
+                        v_lim * t - v_lim * t_acc / 2 + rising(np.maximum(t_acc - t, 0)))
+
+    cruising = v_lim * t_acc / 2 + v_lim * (t - t_acc)
+    return np.where(t <= t_acc, accelerating(t),
+                    np.where(t <= t_acc + t_const, cruising, 1 - accelerating(duration - t)))
+
+
+def plan_synchronized(old_angles: dict, new_angles: dict, velocity: dict, acceleration: dict, jerk: dict,
+                      d_time: float = D_TIME) -> Trajectory:
+    """
+    Plans a time synchronized, jerk limited move: all joints follow the same double S profile (scaled
+    to their own distance) so they start and finish together. The profile is the fastest one for which
+    no joint exceeds its own velocity, acceleration and jerk limit
+    Args:
+        old_angles: angles dictionary of the start of the move
+        new_angles: angles dictionary of the end of the move (with the same keys as old_angles)
+        velocity: maximum velocity (in degrees/s) of every joint
+        acceleration: maximum acceleration (in degrees/s^2) of every joint
+        jerk: maximum jerk (in degrees/s^3) of every joint
+        d_time: time between the steps of the trajectory in seconds
+
+    Returns:
+        Trajectory of only the joints that move, empty if none of the joints move
+    """
+    joint_ids = [j_id for j_id in new_angles if new_angles[j_id] != old_angles[j_id]]
+    if len(joint_ids) == 0:
+        return Trajectory(joint_ids, np.zeros((0, 0)), d_time)
+    start = np.array([old_angles[j_id] for j_id in joint_ids], dtype=float)
+    end = np.array([new_angles[j_id] for j_id in joint_ids], dtype=float)
+    distances = np.abs(end - start)
+
+    # Limits of the shared profile (covering a distance of 1) that keep every joint within its limits.
+    profile = double_s_profile(
+        np.min([velocity[j_id] for j_id in joint_ids] / distances),
+        np.min([acceleration[j_id] for j_id in joint_ids] / distances),
+        np.min([jerk[j_id] for j_id in joint_ids] / distances))
+    duration = 2 * profile[0] + profile[2]
+
+    steps = max(1, int(np.ceil(duration / d_time)))
+    elapsed = (np.arange(steps) + 1)[:, np.newaxis] * d_time
+    angles = start + double_s_position(elapsed, *profile) * (end - start)
+    return Trajectory(joint_ids, angles, d_time)
+
+
+class TrajectoryCache:
+    """
+    Least recently used cache of planned trajectories, keyed by the joint vectors of the start and the
+    goal (or all waypoints) of a move and the parameters it was planned with. The autopilot repeats the
+    same location to location moves every cycle, those are only planned once.
+    """
+
+    def __init__(self, capacity: int = TRAJECTORY_CACHE_SIZE):
+        self.capacity = capacity
+        self._trajectories = OrderedDict()
+        self._mutex = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(waypoints: list, *parameters) -> tuple:
+        """
+        Creates the key of a move
+        Args:
+            waypoints: angles dictionaries of the start and goal (and any via points) of the move
+            parameters: other values the trajectory depends on, like the velocity
+
+        Returns: hashable key
+        """
+        vectors = tuple(tuple((j_id, round(float(angle), TRAJECTORY_KEY_DECIMALS))
+                              for (j_id, angle) in sorted(waypoint.items())) for waypoint in waypoints)
+        return (vectors,) + parameters
+
+    def get(self, key: tuple, plan) -> Trajectory:
+        """
+        Returns the cached trajectory of a move, or plans and caches it
+        Args:
+            key: key of the move (see TrajectoryCache.key)
+            plan: function without arguments that plans the trajectory on a cache miss
+
+        Returns: Trajectory of the move
+        """
+        with self._mutex:
+            trajectory = self._trajectories.get(key)
+            if trajectory is not None:
+                self._trajectories.move_to_end(key)
+                self.hits += 1
+                return trajectory
+            self.misses += 1
+
+        trajectory = plan()
+        self.put(key, trajectory)
+        return trajectory
+
+    def put(self, key: tuple, trajectory: Trajectory):
+        """ Stores a trajectory, evicting the least recently used one if the cache is full. """
+        with self._mutex:
+            self._trajectories[key] = trajectory
+            self._trajectories.move_to_end(key)
+            while len(self._trajectories) > self.capacity:
+                self._trajectories.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        """ Returns the number of cached trajectories, cache hits and cache misses. """
+        with self._mutex:
+            return {'size': len(self._trajectories), 'hits': self.hits, 'misses': self.misses}
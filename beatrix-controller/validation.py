@@ -0,0 +1,72 @@
+from lib.constants import FLOOR_HEIGHT, KEEP_OUT_BOXES, POSITION_LIMIT
+from lib.kinematics import Kinematics, JOINT_ORDER
+from trajectory import Trajectory
+import numpy as np
+
+FIRST_CHECKED_LINK = 3  # Index of the first checked link frame (the elbow), the links before it are fixed
+
+
+class TrajectoryValidator:
+    """
+    Checks planned moves before they are executed: the positions of the elbow, wrist, wrist turn and
+    gripper are computed for every step of a trajectory in one vectorized forward kinematics pass and
+    have to stay above the floor plane, within +/- POSITION_LIMIT in x and y and outside of all keep out
+    boxes.
+    """
+
+    def __init__(self, kinematics: Kinematics, floor_height: float = FLOOR_HEIGHT,
+                 keep_out_boxes: list = KEEP_OUT_BOXES, position_limit: float = POSITION_LIMIT):
+        self.kinematics = kinematics
+        self.floor_height = floor_height
+        self.keep_out_boxes = [(np.asarray(low, dtype=float), np.asarray(high, dtype=float))
+                               for (low, high) in keep_out_boxes]
+        self.position_limit = position_limit
+
+    def check(self, trajectory: Trajectory, start: dict) -> str:
+        """
+        Checks every step of a trajectory
+        Args:
+            trajectory: planned trajectory
+            start: angles of all joints at the start of the trajectory, used for the joints that do not
+                move in the trajectory
+
+        Returns:
+            Description of the first violation, None if the whole trajectory is valid
+        """
+        if len(trajectory) == 0:
+            return None
+        poses = np.tile(np.array([start[j_id] for j_id in JOINT_ORDER], dtype=float), (len(trajectory), 1))
+        for (column, j_id) in enumerate(trajectory.joint_ids):
+            if j_id in JOINT_ORDER:
+                poses[:, JOINT_ORDER.index(j_id)] = trajectory.angles[:, column]
+        frames = self.kinematics.forward_batch(poses, frames=True)
+        return self.check_points(frames[:, FIRST_CHECKED_LINK:, :3, 3], trajectory.d_time)
+
+    def check_points(self, points: np.ndarray, d_time: float = None) -> str:
+        """
+        Checks positions of the arm
+        Args:
+            points: (steps, points, 3) or (steps, 3) array of x, y and z coordinates in cm
+            d_time: time between the steps, only used to describe the violation
+
+        Returns:
+            Description of the first violation, None if all points are valid
+        """
+        points = points.reshape(len(points), -1, 3)
+        violations = [
+            ('below the floor', points[..., 2] < self.floor_height),
+            ('outside the workspace', np.abs(points[..., :2]).max(axis=-1) > self.position_limit),
+        ]
+        for (i, (low, high)) in enumerate(self.keep_out_boxes):
+            inside = np.all((points > low) & (points < high), axis=-1)
+            violations.append((f'inside keep out box {i}', inside))
+
+        first = None
+        for (reason, mask) in violations:
+            steps = np.flatnonzero(mask.any(axis=1))
+            if len(steps) > 0 and (first is None or steps[0] < first[0]):
+                first = (steps[0], reason)
+        if first is None:
+            return None
+        when = f'{first[0] * d_time:.2f}s' if d_time is not None else f'step {first[0]}'
+        return f'arm {first[1]} at {when}'
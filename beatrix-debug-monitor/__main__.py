@@ -2,7 +2,7 @@ from PyQt5.QtWidgets import QApplication
 from gui.mainwindow import MainWindow
 from debugclient import DebugClient
 from configfile import ConfigFile
-from lib.kinematics import IkPyKinematics
+from lib.kinematics import create_kinematics
 from lib.logger import Logger
 from lib.chain import beatrix_rep
 import sys
@@ -10,7 +10,7 @@ import sys
 logger = Logger()
 config = ConfigFile(logger)
 client = DebugClient(logger, config)
-kinematics = IkPyKinematics(beatrix_rep)
+kinematics = create_kinematics(config.kinematics, beatrix_rep)
 
 # Connect to debug server.
 client.connect()
@@ -6,6 +6,7 @@ class ConfigFile():
         self.logger = logger
         self.local_server = False
         self.raspberry_ip = '192.168.23.211'
+        self.kinematics = 'analytic'
 
         home = expanduser("~")
         self.url = home + '/.beatrix-config.json'
@@ -16,6 +17,7 @@ class ConfigFile():
                     config = json.load(file)
                     self.local_server = config['local_server']
                     self.raspberry_ip = config['raspberry_ip']
+                    self.kinematics = config.get('kinematics', self.kinematics)
                 except json.decoder.JSONDecodeError:
                     logger.log('Config file was corrupted, using default values instead.')
         except FileNotFoundError as e:
@@ -25,6 +27,7 @@ class ConfigFile():
         with open(self.url, 'w') as file:
             file.write(json.dumps({
                 'local_server': self.local_server,
-                'raspberry_ip': self.raspberry_ip
+                'raspberry_ip': self.raspberry_ip,
+                'kinematics': self.kinematics
             }))
         self.logger.log('Saving config file.')
@@ -121,6 +121,32 @@ class DebugClient():
             }
         })
 
+    def send_emergency_stop(self):
+        """ Stops the autopilot and the running move of the robot arm. """
+        self._send_cmd({
+            'type': cmd.EMERGENCY_STOP,
+            'data': {}
+        })
+
+    def send_get_timing(self, reset: bool = False):
+        """ Sends a command to get the timing statistics of the motion loop. """
+        self._send_cmd({
+            'type': cmd.GET_TIMING,
+            'data': {
+                'reset': reset
+            }
+        })
+
+    def send_dump_telemetry(self, seconds: float = 10, format: str = 'csv'):
+        """ Sends a command to save the motion telemetry of the last seconds on the controller. """
+        self._send_cmd({
+            'type': cmd.DUMP_TELEMETRY,
+            'data': {
+                'seconds': seconds,
+                'format': format
+            }
+        })
+
     def send_take_picture(self):
         self._send_cmd({
             'type': cmd.TAKE_PICTURE,
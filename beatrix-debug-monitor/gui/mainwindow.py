@@ -71,6 +71,14 @@ class MainWindow(QMainWindow):
         btn.clicked.connect(self.__on_take_picture)
         layout.addWidget(btn)
 
+        btn = QPushButton("Motion timing")
+        btn.clicked.connect(self.__on_get_timing)
+        layout.addWidget(btn)
+
+        btn = QPushButton("Dump telemetry")
+        btn.clicked.connect(self.__on_dump_telemetry)
+        layout.addWidget(btn)
+
         btn = QPushButton("Close grabber")
         btn.clicked.connect(self.__on_set_grabber(closed=True))
         layout.addWidget(btn)
@@ -82,6 +90,7 @@ class MainWindow(QMainWindow):
         self.position_manager = PositionManager(kinematics)
         self.position_manager.on_position_change(self.local_visualizer.update_position)
         self.position_manager.on_angles_change(self.local_visualizer.update_angles)
+        self.position_manager.on_solver_change(self.__on_solver_change)
         base_splitter.addWidget(self.position_manager)  
 
         # Autopilot control options box.
@@ -97,6 +106,9 @@ class MainWindow(QMainWindow):
         btn = QPushButton('Stop')
         btn.clicked.connect(self.__on_set_autopilot(enabled=False))
         layout.addWidget(btn)
+        btn = QPushButton('Emergency stop')
+        btn.clicked.connect(self.__on_emergency_stop)
+        layout.addWidget(btn)
         base_splitter.addWidget(autopilot)  
 
         # Locations move thing.
@@ -127,8 +139,9 @@ class MainWindow(QMainWindow):
         print('[*] Started command thread.')
         while self.running:
             (okay, cmd) = self.client.receive_command()
-            # No other server->client commands were implemented then GET_UPDATE.
-            if okay and cmd['type'] == GET_UPDATE:
+            if okay and cmd['type'] == GET_TIMING:
+                self.__print_timing(cmd['data'])
+            elif okay and cmd['type'] == GET_UPDATE:
                 update = cmd['data']
                 if 'angles' in update:
                     self.real_visualizer.update_angles(update['angles'])
@@ -136,6 +149,8 @@ class MainWindow(QMainWindow):
                     self.real_visualizer.update_position(pos)
                 if 'autopilot' in update:
                     self.autopilot_state.setText(update['autopilot'])
+                if 'planned_duration' in update:
+                    print(f"[*] Arm moving, planned duration {update['planned_duration']:.2f}s.")
             else:
                 time.sleep(0.1)
 
@@ -174,12 +189,42 @@ class MainWindow(QMainWindow):
         self.local_visualizer.update_angles(INITIAL_ANGLES.copy())
         self.client.send_set_angles(INITIAL_ANGLES)
 
+    def __on_get_timing(self):
+        """ Event handler for the motion timing button. """
+        print('[*] Sending get timing')
+        self.client.send_get_timing()
+
+    def __on_dump_telemetry(self):
+        """ Event handler for the dump telemetry button. """
+        print('[*] Sending dump telemetry')
+        self.client.send_dump_telemetry()
+
+    def __print_timing(self, stats: dict):
+        """ Prints the motion loop timing statistics received from the controller. """
+        print('[*] Motion loop: {} ticks, {} overruns, {} skipped steps'.format(
+            stats['ticks'], stats['overruns'], stats['skipped_steps']))
+        print('    lateness mean {:.2f}ms, max {:.2f}ms'.format(
+            stats['mean_lateness_ms'], stats['max_lateness_ms']))
+        edges = stats['histogram']['bins_ms']
+        for (i, count) in enumerate(stats['histogram']['counts']):
+            label = f'< {edges[i]}ms' if i < len(edges) else f'>= {edges[-1]}ms'
+            print(f'    {label:>9}: {count}')
+
+    def __on_solver_change(self, solver):
+        """ Event handler for the kinematics solver select, remembers the choice in the config file. """
+        self.config.kinematics = solver
+
     def __on_set_grabber(self, closed):
         """ Generates an event handler for the set grabber open/closed buttons. """
         def send():
             self.client.send_set_grabber(closed=closed)
         return send
 
+    def __on_emergency_stop(self):
+        """ Event handler for the emergency stop button. """
+        print('[*] Sending emergency stop')
+        self.client.send_emergency_stop()
+
     def __on_set_autopilot(self, enabled):
         """ Generates an event handler for the enable/disable autopilot buttons. """
         def send():
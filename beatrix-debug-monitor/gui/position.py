@@ -4,9 +4,9 @@ from PyQt5.QtWidgets import (QSplitter, QTabWidget, QWidget, QGridLayout, QGroup
     QLineEdit, QSizePolicy, QVBoxLayout, QRadioButton, QButtonGroup)
 from PyQt5.QtCore import Qt
 from lib.constants import *
-from lib.kinematics import Kinematics, WristOrientation
-
-POSITION_LIMIT = 50
+from lib.reachability import ReachabilityMap
+from lib.kinematics import (Kinematics, AnalyticKinematics, WristOrientation, KINEMATICS_SOLVERS,
+    create_kinematics)
 
 class PositionManager(QSplitter):
     def __init__(self, kinematics: Kinematics):
@@ -14,6 +14,11 @@ class PositionManager(QSplitter):
         self.kinematics = kinematics
 
         self.wrist_orientation = WristOrientation.UNSET
+        self.solver = 'analytic' if isinstance(kinematics, AnalyticKinematics) else 'ikpy'
+        # Kept when switching solvers, the analytic solver passes it on to its ikpy fallback.
+        self.multi_seed = getattr(getattr(kinematics, 'fallback', None) or kinematics, 'multi_seed', False)
+        self.solver_callbacks = []
+        self.reachability = ReachabilityMap.load(kinematics.chain)
 
         self.position = [0,0,0]
         self.position_callbacks = []
@@ -35,6 +40,7 @@ class PositionManager(QSplitter):
         tab_widget.addTab(self.angles_tab, 'Angles')
 
         self.__init_wrist_angle_frame()
+        self.__init_solver_frame()
 
     def on_angles_change(self, callback:callable):
         """ Registers a callback function to be called whenever the user manually changes one of the 
@@ -46,10 +52,19 @@ class PositionManager(QSplitter):
         goal via this GUI menu. """
         self.position_callbacks.append(callback)
 
+    def on_solver_change(self, callback:callable):
+        """ Registers a callback function to be called with the solver name whenever the user selects a 
+        different inverse kinematics solver via this GUI menu. """
+        self.solver_callbacks.append(callback)
+
     def set_position(self, pos:Tuple[float,float,float], update_kin:bool=True):
         """ Sets the position while updating all of the GUI elements and calling the registered callback
         functions. (Note: Do NOT call this within a callback handler to avoid infinite recursion)."""
         self.position = pos
+        # Only for information: the map knows the analytic solutions, the selected solver may still reach
+        # positions outside of it (like the controller, the position is always solved).
+        reachable = self.reachability.is_reachable(self.position, self.wrist_orientation)
+        self.reachable_label.setText('Reachable' if reachable else 'Outside of the reachability map')
         if update_kin:
             self.angles = self.kinematics.inverse(self.position, self.wrist_orientation)
             self.set_angles(self.angles, update_kin=False)
@@ -99,6 +114,30 @@ class PositionManager(QSplitter):
             if ok: self.wrist_orientation = WristOrientation(i)
         return update
 
+    def __init_solver_frame(self):
+        self.solver_box = QGroupBox()
+        self.solver_box.setTitle('Kinematics')
+        layout = QVBoxLayout(self.solver_box)
+        buttons = QButtonGroup()
+        buttons.setExclusive(True)
+        for (i, solver) in enumerate(KINEMATICS_SOLVERS):
+            btn = QRadioButton(solver.capitalize())
+            if solver == self.solver:
+                btn.setChecked(True)
+            layout.addWidget(btn)
+            buttons.addButton(btn, i)
+            btn.toggled.connect(self.__on_solver_btn(solver))
+        self.addWidget(self.solver_box)
+
+    def __on_solver_btn(self, solver):
+        def update(ok):
+            if ok and solver != self.solver:
+                self.solver = solver
+                self.kinematics = create_kinematics(solver, self.kinematics.chain, self.multi_seed)
+                for callback in self.solver_callbacks:
+                    callback(solver)
+        return update
+
     def __init_postion_tab(self):
         self.position_tab = QWidget()
         layout = QGridLayout(self.position_tab)
@@ -127,6 +166,10 @@ class PositionManager(QSplitter):
             layout.addWidget(line_edit, axis,1, 1,1)
             layout.addWidget(slider, axis,2, 1,3)
 
+        self.reachable_label = QLabel('')
+        self.reachable_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.reachable_label, len(self.position),0, 1,5)
+
         layout.setColumnStretch(0, 0)
         layout.setColumnStretch(1, 0)
 
@@ -0,0 +1,239 @@
+from lib.kinematics import (Kinematics, IkPyKinematics, WristOrientation, JOINT_ORDER, KINEMATICS_SOLVERS,
+    create_kinematics)
+from lib.chain import beatrix_rep
+from lib.constants import ANGLE_BOUNDS
+from lib.locations import PUZZLE_LOCATIONS
+from lib.transform import board_to_world, BOARD_WIDTH, BOARD_DEPTH
+from math import degrees, acos
+import datetime, json, platform, sys
+import numpy as np
+import time
+
+# Run from one of the application folders (where lib is available) with: python -m lib.benchmark
+
+
+def random_angles(count: int, seed: int = 0) -> np.ndarray:
+    """ Samples `count` poses uniformly within ANGLE_BOUNDS as an (N, 5) array in JOINT_ORDER. """
+    rng = np.random.default_rng(seed)
+    lower = np.array([ANGLE_BOUNDS[j_id][0] for j_id in JOINT_ORDER])
+    upper = np.array([ANGLE_BOUNDS[j_id][1] for j_id in JOINT_ORDER])
+    return rng.uniform(lower, upper, size=(count, len(JOINT_ORDER)))
+
+
+def benchmark_forward_batch(count: int = 5000) -> dict:
+    """ Times `get_forward_cartesian` pose by pose (through the ikpy chain and through the generated
+    kinematics module) against a single `forward_batch` call over the same poses and checks that they all
+    agree. """
+    kinematics = IkPyKinematics(beatrix_rep, compiled=False)
+    compiled = IkPyKinematics(beatrix_rep)
+    angles = random_angles(count)
+    poses = [dict(zip(JOINT_ORDER, row)) for row in angles]
+
+    start = time.perf_counter()
+    single = np.array([kinematics.get_forward_cartesian(pose) for pose in poses])
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    generated = np.array([compiled.get_forward_cartesian(pose) for pose in poses])
+    generated_time = time.perf_counter() - start
+
+    kinematics.forward_batch(angles[:1])
+    start = time.perf_counter()
+    batch = kinematics.forward_batch(angles)
+    batch_time = time.perf_counter() - start
+
+    return {
+        'poses': count,
+        'per_pose_s': single_time,
+        'generated_s': generated_time,
+        'batch_s': batch_time,
+        'speedup': single_time / batch_time,
+        'max_error': float(max(np.max(np.abs(single - batch)), np.max(np.abs(single - generated)))),
+    }
+
+
+def board_targets(count: int, seed: int = 0, max_height: float = 10) -> np.ndarray:
+    """ Samples `count` positions uniformly over the board and up to `max_height` cm above it as an
+    (N, 3) array of world coordinates. """
+    rng = np.random.default_rng(seed)
+    board = rng.uniform((0, 0, 0), (BOARD_WIDTH, BOARD_DEPTH, max_height), size=(count, 3))
+    return np.array([board_to_world(p[:2]) + (0, 0, p[2]) for p in board])
+
+
+def puzzle_targets(kinematics: Kinematics, hover_height: float = 10) -> np.ndarray:
+    """ Positions of all PUZZLE_LOCATIONS and the positions `hover_height` cm above them as an (N, 3)
+    array of world coordinates. """
+    positions = np.array([kinematics.get_forward_cartesian(location.get_angle_dict())
+                          for location in PUZZLE_LOCATIONS.values()])
+    return np.concatenate([positions, positions + (0, 0, hover_height)])
+
+
+def latency_stats(times: list) -> dict:
+    """ Summarizes a list of durations (in seconds) as p50/p95/p99/max latencies in microseconds. """
+    if len(times) == 0:
+        return None
+    times = np.array(times) * 1e6
+    return {
+        'p50_us': float(np.percentile(times, 50)),
+        'p95_us': float(np.percentile(times, 95)),
+        'p99_us': float(np.percentile(times, 99)),
+        'max_us': float(np.max(times)),
+    }
+
+
+# Desired angle (in degrees) between the gripper (z axis of the end effector frame) and straight down for
+# every wrist orientation, as solved by AnalyticKinematics.
+ORIENTATION_TILTS = {
+    WristOrientation.VERTICAL: 0,
+    WristOrientation.HORIZONTAL: 90,
+}
+
+
+def is_clamped(angles: dict, margin: float = 0.01) -> bool:
+    """ Checks whether any joint of a solution ended up on (or beyond) its ANGLE_BOUNDS. """
+    for (j_id, angle) in angles.items():
+        if j_id in ANGLE_BOUNDS:
+            lower, upper = ANGLE_BOUNDS[j_id]
+            if angle <= lower + margin or angle >= upper - margin:
+                return True
+    return False
+
+
+def benchmark_kinematics(kinematics: Kinematics, targets: np.ndarray,
+                         wrist_orientation: WristOrientation = WristOrientation.UNSET,
+                         reference: Kinematics = None) -> dict:
+    """
+    Times `inverse` and `get_forward_cartesian` for every target and measures the round trip accuracy.
+    The errors are measured with the forward kinematics of the reference rather than those of the
+    benchmarked solver, so that a solver whose own forward kinematics disagree with the chain can not
+    hide its errors
+    Args:
+        kinematics: kinematics implementation to benchmark
+        targets: (N, 3) array of world coordinates
+        wrist_orientation: desired orientation for the wrist joint passed to `inverse`
+        reference: kinematics the solutions are checked with, by default the ikpy chain itself
+
+    Returns:
+        Dictionary with the inverse and forward latencies, the round trip position error (in cm, None if
+        every target failed), the orientation error (in degrees, if an orientation was requested), the
+        number of failed (raised an exception) targets and the rates of failed and bound clamped solutions
+    """
+    if reference is None:
+        reference = IkPyKinematics(beatrix_rep, compiled=False)
+    tilt = ORIENTATION_TILTS.get(wrist_orientation)
+    inverse_times, forward_times, errors, orientation_errors = [], [], [], []
+    failures, clamped = 0, 0
+    for target in targets:
+        target = tuple(float(v) for v in target)
+        start = time.perf_counter()
+        try:
+            angles = kinematics.inverse(target, wrist_orientation)
+        except ValueError:
+            failures += 1
+            continue
+        inverse_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        position = kinematics.get_forward_cartesian(angles)
+        forward_times.append(time.perf_counter() - start)
+
+        position = reference.get_forward_cartesian(angles)
+        errors.append(float(np.linalg.norm(np.array(position) - target)))
+        clamped += is_clamped(angles)
+        if tilt is not None:
+            gripper = reference.get_forward_frame(angles)[:3, 2]
+            orientation_errors.append(abs(degrees(acos(np.clip(-gripper[2], -1, 1))) - tilt))
+
+    return {
+        'targets': len(targets),
+        'inverse': latency_stats(inverse_times),
+        'forward': latency_stats(forward_times),
+        'error_cm': {
+            'mean': float(np.mean(errors)),
+            'p95': float(np.percentile(errors, 95)),
+            'max': float(np.max(errors)),
+        } if len(errors) > 0 else None,
+        'orientation_error_deg': {
+            'mean': float(np.mean(orientation_errors)),
+            'max': float(np.max(orientation_errors)),
+        } if len(orientation_errors) > 0 else None,
+        'failures': failures,
+        'failure_rate': failures / len(targets),
+        'clamp_rate': clamped / len(targets),
+    }
+
+
+def run_suite(solvers: tuple = KINEMATICS_SOLVERS, count: int = 200, seed: int = 0,
+              multi_seed: bool = False) -> dict:
+    """
+    Benchmarks every solver for every WristOrientation on the board and puzzle location targets
+    Args:
+        solvers: names of the solvers as accepted by `create_kinematics`
+        count: number of random board targets
+        seed: seed of the random board targets, keep it fixed to compare results
+        multi_seed: benchmark the multi-seed ikpy inverse kinematics, see IkPyKinematics
+
+    Returns:
+        Dictionary of results per solver, target set and wrist orientation, ready to be dumped as JSON
+    """
+    reference = IkPyKinematics(beatrix_rep, compiled=False)
+    target_sets = {
+        'board': board_targets(count, seed),
+        'puzzle': puzzle_targets(reference),
+    }
+    results = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'machine': platform.machine(),
+        'seed': seed,
+        'multi_seed': multi_seed,
+        'solvers': {},
+    }
+    for solver in solvers:
+        kinematics = create_kinematics(solver, beatrix_rep, multi_seed=multi_seed)
+        results['solvers'][solver] = {
+            name: {str(orientation): benchmark_kinematics(kinematics, targets, orientation, reference)
+                   for orientation in WristOrientation}
+            for (name, targets) in target_sets.items()
+        }
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Kinematics speed and accuracy benchmark.')
+    parser.add_argument('--solvers', nargs='+', default=list(KINEMATICS_SOLVERS),
+                        choices=KINEMATICS_SOLVERS, help='Solvers to benchmark.')
+    parser.add_argument('--targets', type=int, default=200, help='Number of random board targets.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random board targets.')
+    parser.add_argument('--multi-seed', default=False, action='store_true',
+                        help='Solve the ikpy inverse kinematics from several seeds in parallel.')
+    parser.add_argument('--output', default='kinematics-benchmark.json',
+                        help='JSON file the results are written to.')
+    args = parser.parse_args()
+
+    result = benchmark_forward_batch()
+    print('[*] Forward kinematics of {} poses:'.format(result['poses']))
+    print('    get_forward_cartesian: {:.4f}s'.format(result['per_pose_s']))
+    print('    generated module:      {:.4f}s ({:.0f}x faster)'.format(
+        result['generated_s'], result['per_pose_s'] / result['generated_s']))
+    print('    forward_batch:         {:.4f}s ({:.0f}x faster)'.format(
+        result['batch_s'], result['speedup']))
+    print('    max difference:        {:.2e}'.format(result['max_error']))
+
+    results = run_suite(tuple(args.solvers), args.targets, args.seed, args.multi_seed)
+    results['forward_batch'] = result
+    for (solver, target_sets) in results['solvers'].items():
+        for (name, orientations) in target_sets.items():
+            for (orientation, stats) in orientations.items():
+                inverse = stats['inverse'] or {'p50_us': float('nan'), 'p99_us': float('nan')}
+                error = stats['error_cm'] or {'max': float('nan')}
+                rotation = stats['orientation_error_deg'] or {'max': float('nan')}
+                print('[*] {:8} {:6} {:10} inverse p50 {:9.1f}us p99 {:9.1f}us, error max {:.3f}cm '
+                      '{:.1f}deg, failed {} ({:.0%}), clamped {:.0%}'.format(
+                          solver, name, orientation, inverse['p50_us'], inverse['p99_us'], error['max'],
+                          rotation['max'], stats['failures'], stats['failure_rate'], stats['clamp_rate']))
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f'[*] Results written to {args.output}.')
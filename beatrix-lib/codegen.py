@@ -0,0 +1,161 @@
+from ikpy.chain import Chain
+import importlib.util, hashlib, json, os, tempfile
+import numpy as np
+
+# Run from one of the application folders (where lib is available) with: python -m lib.codegen
+
+""" Default location of the generated kinematics module. """
+DEFAULT_MODULE_FILE = os.path.expanduser('~') + '/.beatrix-kinematics.py'
+
+""" Argument names of the generated functions, in JOINT_ORDER. """
+ARGUMENTS = ('base', 'shoulder', 'elbow', 'wrist', 'wrist_turn')
+
+HEADER = '''# Generated by lib/codegen.py from the '{name}' chain, do not edit.
+# Angles are scalars in degrees (as used everywhere else in the codebase) in JOINT_ORDER, the Jacobian
+# gives the linear and angular velocity of the end effector per radian/s of each joint.
+import numpy
+from math import sin, cos, pi
+
+CHAIN_HASH = '{chain_hash}'
+'''
+
+
+def chain_hash(chain: Chain) -> str:
+    """ Hash of everything in the chain definition that influences the generated functions. """
+    links = []
+    for link in chain.links:
+        links.append([
+            link.name,
+            np.round(np.asarray(link.get_link_frame_matrix(0), dtype=float), 9).tolist(),
+            np.asarray(getattr(link, 'rotation', None) if link.joint_type == 'revolute' else [0, 0, 0],
+                       dtype=float).tolist(),
+        ])
+    return hashlib.sha1(json.dumps(links).encode('utf-8')).hexdigest()
+
+
+def derive(chain: Chain):
+    """
+    Symbolically derives the end effector frame and the geometric Jacobian of a chain
+    Args:
+        chain: ikpy chain of which the first link is the origin and the next five the joints in JOINT_ORDER
+
+    Returns:
+        Tuple of the joint symbols, the 4x4 end effector frame and the 6x5 Jacobian as sympy matrices
+    """
+    import sympy
+
+    joints = sympy.symbols(ARGUMENTS)
+    frame = sympy.eye(4)
+    origins, axes = [], []
+    for (i, link) in enumerate(chain.links):
+        fixed = np.asarray(link.get_link_frame_matrix(0), dtype=float)
+        fixed[np.abs(fixed) < 1e-12] = 0
+        frame = frame * sympy.Matrix(np.round(fixed, 12))
+
+        axis = getattr(link, 'rotation', None)
+        if link.joint_type != 'revolute' or axis is None or not np.any(axis):
+            continue
+        if i - 1 >= len(joints):
+            break
+        axis = np.asarray(axis, dtype=float) / np.linalg.norm(axis)
+        angle = joints[i - 1] - (90 if i == 1 else 0)  # Same base compensation as get_forward_cartesian.
+        theta = angle * sympy.pi / 180
+
+        origins.append(frame[:3, 3])
+        axes.append(frame[:3, :3] * sympy.Matrix(axis))
+
+        cross = sympy.Matrix([
+            [0, -axis[2], axis[1]],
+            [axis[2], 0, -axis[0]],
+            [-axis[1], axis[0], 0]])
+        rotation = sympy.eye(3) + sympy.sin(theta) * cross + (1 - sympy.cos(theta)) * cross * cross
+        frame = frame * sympy.diag(rotation, 1)
+
+    end = frame[:3, 3]
+    jacobian = sympy.zeros(6, len(joints))
+    for (i, (origin, axis)) in enumerate(zip(origins, axes)):
+        jacobian[:3, i] = axis.cross(end - origin)
+        jacobian[3:, i] = axis
+    return joints, frame, jacobian
+
+
+def generate(chain: Chain) -> str:
+    """ Generates the source code of a plain NumPy module with `forward`, `position` and `jacobian`
+    functions for the given chain. """
+    import sympy
+    from sympy.printing.numpy import NumPyPrinter
+
+    joints, frame, jacobian = derive(chain)
+    printer = NumPyPrinter({'fully_qualified_modules': False, 'inline': True})
+    arguments = ', '.join(ARGUMENTS)
+
+    def function(name: str, doc: str, matrix, result: str) -> str:
+        replacements, (reduced,) = sympy.cse(matrix, symbols=sympy.numbered_symbols('t'))
+        lines = [f'def {name}({arguments}):', f'    """ {doc} """']
+        for (symbol, expression) in replacements:
+            lines.append(f'    {symbol} = {printer.doprint(expression)}')
+        rows = ', '.join('[' + ', '.join(printer.doprint(value) for value in reduced.row(r)) + ']'
+                         for r in range(reduced.rows))
+        lines.append(f'    return {result.format(rows=rows)}')
+        return '\n'.join(lines) + '\n'
+
+    source = HEADER.format(name=chain.name, chain_hash=chain_hash(chain))
+    source += '\n\n' + function('forward', 'Frame of the end effector as a 4x4 homogeneous matrix.', frame,
+                                'numpy.array([{rows}])')
+    source += '\n\n' + function('position', 'Position of the end effector as a (x, y, z) tuple.',
+                                frame[:3, 3].T, 'tuple({rows})')
+    source += '\n\n' + function('jacobian', 'Geometric Jacobian (6x5) of the end effector.', jacobian,
+                                'numpy.array([{rows}])')
+    return source
+
+
+def load(chain: Chain, module_file: str = DEFAULT_MODULE_FILE):
+    """
+    Imports the generated kinematics module for a chain, the module is only (re)generated when it does
+    not exist yet, was generated for a different chain definition or can not be imported (like a file
+    that was truncated or edited by hand)
+    Args:
+        chain: ikpy chain representation of the robot arm
+        module_file: location of the generated module
+
+    Returns:
+        The generated module with `forward`, `position` and `jacobian` functions
+    """
+    expected_hash = chain_hash(chain)
+    if os.path.exists(module_file):
+        try:
+            module = _import_file(module_file)
+        except Exception as e:
+            print(f'[!] Could not import kinematics module {module_file}, regenerating it:', repr(e))
+        else:
+            if getattr(module, 'CHAIN_HASH', None) == expected_hash:
+                return module
+            print('[!] Chain definition changed, regenerating kinematics module.')
+
+    print(f'[*] Generating kinematics module {module_file}.')
+    source = generate(chain)
+    # Written next to the module and then renamed over it, so that a process that is stopped while
+    # writing, or another process loading the module at the same time, never sees a partial file.
+    directory = os.path.dirname(os.path.abspath(module_file))
+    (handle, temporary_file) = tempfile.mkstemp(suffix='.py', dir=directory)
+    try:
+        with os.fdopen(handle, 'w') as file:
+            file.write(source)
+        os.replace(temporary_file, module_file)
+    except BaseException:
+        os.remove(temporary_file)
+        raise
+    return _import_file(module_file)
+
+
+def _import_file(module_file: str):
+    spec = importlib.util.spec_from_file_location('beatrix_generated_kinematics', module_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+if __name__ == '__main__':
+    from lib.chain import beatrix_rep
+    module = load(beatrix_rep)
+    print(f'[*] Kinematics module is up to date ({module.CHAIN_HASH}).')
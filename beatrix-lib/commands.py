@@ -17,3 +17,14 @@ SET_AUTOPILOT = 'SET_AUT'
 
 """ Save the latest camera frame to filesystem. """
 TAKE_PICTURE = 'TAK_PIC'
+
+""" Immediately stop the autopilot and the running move of the robot arm. """
+EMERGENCY_STOP = 'EMG_STP'
+
+""" Ask the server for the timing statistics of the motion loop (tick count, overruns and a histogram of
+    how late ticks woke up), optionally resetting them. """
+GET_TIMING = 'GET_TIM'
+
+""" Save the motion telemetry (timestamp, lateness, commanded and target angles of every control tick) of
+    the last seconds to a CSV or compressed NumPy file on the controller. """
+DUMP_TELEMETRY = 'DMP_TEL'
@@ -11,6 +11,22 @@ CONTROL_PORT = 4400
 """ Home/start position of the robot arm in x,y,z coordinates. """
 HOME_POSITION = [50, 50, 50]
 
+""" Range (in cm) of the x, y and z coordinates that positions are set within, the z coordinate has a lower
+limit of 0. """
+POSITION_LIMIT = 50
+
+""" Lowest height (in cm) any part of the arm beyond the shoulder may reach during a move. The board
+surface lies between z = 1 and z = 5 and objects are grasped 2 cm below it, the floor is set 2 cm below
+the lowest grasp so only moves that dip further into the board are rejected. """
+FLOOR_HEIGHT = -3
+
+""" Boxes (pairs of the minimum and maximum x, y, z corner in cm) no part of the arm beyond the shoulder
+may enter during a move, for example ((-5, 20, 0), (5, 30, 40)) for a pole next to the board. """
+KEEP_OUT_BOXES = []
+
+""" Distance (in cm) from the target within which an inverse kinematics solution counts as reaching it. """
+REACH_TOLERANCE = 1.0
+
 """ DT used for calculating steps in set_arm"""
 D_TIME = 1 / 50 # 2Hz
 
@@ -97,7 +113,38 @@ ACTUATION_RANGE = {
     # GRABBER_JOINT_ID: 180
 }
 
+"Maximum velocity (in degrees/s) of each joint, used by the trajectory planner of set_arm"
+MAX_JOINT_VELOCITY = {
+    BASE_JOINT_ID: 30,
+    SHOULDER_JOINT_ID: 25,
+    ELBOW_JOINT_ID: 30,
+    WRIST_JOINT_ID: 45,
+    WRIST_TURN_JOINT_ID: 60,
+}
+
+"Maximum acceleration (in degrees/s^2) of each joint, used by the trajectory planner of set_arm"
+MAX_JOINT_ACCELERATION = {
+    BASE_JOINT_ID: 40,
+    SHOULDER_JOINT_ID: 40,
+    ELBOW_JOINT_ID: 60,
+    WRIST_JOINT_ID: 90,
+    WRIST_TURN_JOINT_ID: 120,
+}
+
+"Maximum jerk (in degrees/s^3) of each joint, used by the trajectory planner of set_arm"
+MAX_JOINT_JERK = {
+    BASE_JOINT_ID: 160,
+    SHOULDER_JOINT_ID: 160,
+    ELBOW_JOINT_ID: 240,
+    WRIST_JOINT_ID: 360,
+    WRIST_TURN_JOINT_ID: 480,
+}
+
 SHOULDER_OFFSET = {
     SERVO_PORTS[SHOULDER_JOINT_ID][0]: 0,
     SERVO_PORTS[SHOULDER_JOINT_ID][1]: -1,
 }
+
+"Measured (servo angle, pulse width in us) points per servo port, for servos that do not respond linearly"
+SERVO_CALIBRATION = {
+}
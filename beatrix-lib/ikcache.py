@@ -0,0 +1,201 @@
+from typing import Tuple
+from collections import OrderedDict
+from itertools import product
+from threading import Lock
+from lib.kinematics import Kinematics, WristOrientation, ORIENTATION_PITCHES, solver_description
+from lib.constants import ANGLE_BOUNDS, REACH_TOLERANCE
+from lib.codegen import chain_hash
+import hashlib, json, os
+
+""" Default edge length (in cm) of the cubes that target positions are quantized to. """
+DEFAULT_RESOLUTION = 0.5
+
+""" Default maximum number of solutions kept in the cache. """
+DEFAULT_CAPACITY = 2048
+
+""" Default location of the persistent inverse kinematics cache. """
+DEFAULT_CACHE_FILE = os.path.expanduser('~') + '/.beatrix-ik-cache.json'
+
+""" Position error (in cm) up to which a solution warm-started from a nearby cached solution is used
+without also solving from the given initial angles. """
+WARM_START_TOLERANCE = 0.5
+
+# Offsets of a quantized cell and its 26 neighbours, used to find nearby solutions for warm starts.
+NEIGHBOUR_OFFSETS = sorted(product((-1, 0, 1), repeat=3), key=lambda o: abs(o[0])+abs(o[1])+abs(o[2]))
+
+
+class CachedKinematics(Kinematics):
+    """
+    Caching layer around another Kinematics implementation. Inverse kinematics solutions are stored under
+    the target position quantized to `resolution` cm together with the wrist orientation and evicted in
+    least recently used order once `capacity` solutions are stored. On a miss the solution of a
+    neighbouring cell (if any) is used to warm-start the wrapped solver. The cache can optionally be
+    loaded from and saved to a JSON file so that a restarted controller starts warm, the file is ignored
+    when it was saved for a different solver, chain, joint bounds or resolution. Solutions that miss their
+    target by more than REACH_TOLERANCE are returned but not cached.
+
+    The key does not include the initial angles: a cached solution is the one found for the first
+    request of its cell and is returned for any later initial angles. It reaches the position, but it
+    is not necessarily the solution closest to the current pose. This matters for a multi-seed
+    IkPyKinematics, which prefers the solution with the least travel from the initial angles, so the
+    cache reuses that choice as if it were independent of the pose the arm is in.
+    """
+
+    def __init__(self, kinematics: Kinematics, resolution: float = DEFAULT_RESOLUTION,
+                 capacity: int = DEFAULT_CAPACITY, cache_file: str = None):
+        self.kinematics = kinematics
+        self.chain = getattr(kinematics, 'chain', None)
+        self.resolution = resolution
+        self.capacity = capacity
+        self.cache_file = cache_file
+
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0
+
+        self._solutions = OrderedDict()
+        self._mutex = Lock()
+
+        if cache_file is not None:
+            self.load()
+
+    def inverse(self, position: Tuple[float, float, float],
+                wrist_orientation: WristOrientation = WristOrientation.UNSET,
+                initial_angles: dict = None) -> dict:
+        """
+        Looks up the solution of angles for a workspace coordinate (in degrees) and only solves it with the
+        wrapped kinematics when it is not cached yet.
+        Args:
+            wrist_orientation: desired orientation for the wrist joint
+            position: X,Y,Z coordinates
+            initial_angles: optional angles to start the solver from. A nearby cached solution is
+                tried first, and the solver only starts from these angles when that does not reach the
+                position within WARM_START_TOLERANCE
+
+        Returns:
+            Angles dictionary:  {JOINT_ID: anglex, JOINT_ID2: anglexx, etc...} with angles in degrees
+        """
+        key = self.__key(position, wrist_orientation)
+        with self._mutex:
+            solution = self._solutions.get(key)
+            if solution is not None:
+                self._solutions.move_to_end(key)
+                self.hits += 1
+                return solution.copy()
+            self.misses += 1
+            nearby = self.__nearby(key)
+
+        if nearby is None:
+            solution = self.kinematics.inverse(position, wrist_orientation, initial_angles)
+            error = self.__error(solution, position)
+        else:
+            solution = self.kinematics.inverse(position, wrist_orientation, nearby)
+            error = self.__error(solution, position)
+            if initial_angles is not None and error > WARM_START_TOLERANCE:
+                cold = self.kinematics.inverse(position, wrist_orientation, initial_angles)
+                cold_error = self.__error(cold, position)
+                if cold_error < error:
+                    (solution, error) = (cold, cold_error)
+                    nearby = None
+            if nearby is not None:
+                with self._mutex:
+                    self.warm_starts += 1
+
+        if error > REACH_TOLERANCE:
+            # Unreachable targets (or failed solves) are not cached, they would be returned for any later
+            # request of the cell and used to warm-start its neighbours.
+            return solution
+        with self._mutex:
+            self._solutions[key] = solution.copy()
+            self._solutions.move_to_end(key)
+            while len(self._solutions) > self.capacity:
+                self._solutions.popitem(last=False)
+        return solution
+
+    def close(self):
+        """ Closes the wrapped kinematics. """
+        self.kinematics.close()
+
+    def get_forward_cartesian(self, angles: dict) -> Tuple[float, float, float]:
+        """ Forward kinematics are not cached, see the wrapped kinematics. """
+        return self.kinematics.get_forward_cartesian(angles)
+
+    def get_stats(self) -> dict:
+        """ Returns the hit/miss counters of the cache as a dictionary. """
+        with self._mutex:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'warm_starts': self.warm_starts,
+                'hit_rate': self.hits / lookups if lookups > 0 else 0.0,
+                'size': len(self._solutions),
+            }
+
+    def clear(self):
+        """ Removes all cached solutions and resets the counters. """
+        with self._mutex:
+            self._solutions.clear()
+            self.hits = self.misses = self.warm_starts = 0
+
+    def load(self):
+        """ Loads previously saved solutions from the cache file, solutions stored for a different
+        fingerprint (see `fingerprint`) are ignored. """
+        try:
+            with open(self.cache_file, 'r') as file:
+                data = json.load(file)
+            if data['fingerprint'] != self.fingerprint():
+                print('[!] IK cache was saved for another solver or chain, starting with an empty cache.')
+                return
+            with self._mutex:
+                for (key, solution) in data['solutions'][-self.capacity:]:
+                    self._solutions[tuple(key)] = solution
+            print(f'[*] Loaded {len(self._solutions)} cached IK solutions.')
+        except FileNotFoundError:
+            pass
+        except (json.decoder.JSONDecodeError, KeyError, TypeError, ValueError):
+            print('[!] IK cache file was corrupted, starting with an empty cache.')
+
+    def save(self):
+        """ Saves all cached solutions (in least recently used order) to the cache file. """
+        if self.cache_file is None:
+            return
+        with self._mutex:
+            data = {
+                'fingerprint': self.fingerprint(),
+                'solutions': [[list(key), solution] for (key, solution) in self._solutions.items()]
+            }
+        with open(self.cache_file, 'w') as file:
+            json.dump(data, file)
+
+    def fingerprint(self) -> str:
+        """ Hash of the wrapped solver, the chain definition, joint bounds, wrist pitches and resolution,
+        saved solutions are only loaded when it did not change. """
+        pitches = sorted((orientation.value, list(pitches))
+                         for (orientation, pitches) in ORIENTATION_PITCHES.items())
+        chain = chain_hash(self.chain) if self.chain is not None else None
+        data = json.dumps([solver_description(self.kinematics), chain, sorted(ANGLE_BOUNDS.items()),
+                           pitches, self.resolution])
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def __key(self, position: Tuple[float, float, float], wrist_orientation: WristOrientation) -> tuple:
+        return (
+            round(position[0] / self.resolution),
+            round(position[1] / self.resolution),
+            round(position[2] / self.resolution),
+            wrist_orientation.value,
+        )
+
+    def __error(self, angles: dict, position: Tuple[float, float, float]) -> float:
+        """ Returns the distance (in cm) between the position reached with the angles and the target. """
+        reached = self.kinematics.get_forward_cartesian(angles)
+        return sum((reached[i] - position[i])**2 for i in range(3)) ** 0.5
+
+    def __nearby(self, key: tuple):
+        """ Returns the cached solution of the closest neighbouring cell or None. Note that this method
+        does NOT acquire the mutex and should only be called while holding it. """
+        for (dx, dy, dz) in NEIGHBOUR_OFFSETS[1:]:
+            solution = self._solutions.get((key[0]+dx, key[1]+dy, key[2]+dz, key[3]))
+            if solution is not None:
+                return solution
+        return None
@@ -0,0 +1,122 @@
+from collections.abc import Mapping
+from lib.constants import (BASE_JOINT_ID, SHOULDER_JOINT_ID, ELBOW_JOINT_ID, WRIST_JOINT_ID,
+    WRIST_TURN_JOINT_ID, INITIAL_ANGLES, ANGLE_BOUNDS)
+import numpy as np
+
+""" Order of the joints in a JointVector and in the columns of angle arrays as used by
+`Kinematics.forward_batch`. """
+JOINT_ORDER = (BASE_JOINT_ID, SHOULDER_JOINT_ID, ELBOW_JOINT_ID, WRIST_JOINT_ID, WRIST_TURN_JOINT_ID)
+
+""" Index of every joint in JOINT_ORDER. """
+JOINT_INDEX = {j_id: index for (index, j_id) in enumerate(JOINT_ORDER)}
+
+""" Lower and upper ANGLE_BOUNDS of the joints in JOINT_ORDER. """
+LOWER_BOUNDS = np.array([ANGLE_BOUNDS[j_id][0] for j_id in JOINT_ORDER], dtype=float)
+UPPER_BOUNDS = np.array([ANGLE_BOUNDS[j_id][1] for j_id in JOINT_ORDER], dtype=float)
+
+
+class JointVector(Mapping):
+    """
+    Angles (in degrees) of the five arm joints as a float array in JOINT_ORDER. It can be read like the
+    angles dictionaries used in the rest of the codebase (`vector[BASE_JOINT_ID]`, `keys()`, `items()`,
+    `dict(vector)`) while the angles can also be handled as a whole through `array`, so that clamping or
+    interpolating a pose does not loop over the joints. Angle dictionaries are still used where the angles
+    leave the program, convert with to_dict there.
+    """
+
+    __slots__ = ('array',)
+
+    def __init__(self, angles=None):
+        """
+        Args:
+            angles: 5 angles in JOINT_ORDER, None for the INITIAL_ANGLES
+        """
+        if angles is None:
+            angles = [INITIAL_ANGLES[j_id] for j_id in JOINT_ORDER]
+        self.array = np.array(angles, dtype=float)
+        if self.array.shape != (len(JOINT_ORDER),):
+            raise ValueError(f'A JointVector holds {len(JOINT_ORDER)} angles, not {self.array.shape}')
+
+    @staticmethod
+    def from_dict(angles: dict, default: dict = INITIAL_ANGLES) -> 'JointVector':
+        """
+        Converts an angles dictionary to a JointVector
+        Args:
+            angles: {Joint_id_1: angle, Joint_id_2: angle, etc...}, keys outside of JOINT_ORDER are ignored
+            default: angles of the joints that are missing in `angles`
+
+        Returns: new JointVector
+        """
+        return JointVector([angles[j_id] if j_id in angles else default[j_id] for j_id in JOINT_ORDER])
+
+    def to_dict(self) -> dict:
+        """ Returns the angles as a {Joint_id: angle} dictionary of plain floats. """
+        return dict(zip(JOINT_ORDER, self.array.tolist()))
+
+    def copy(self) -> 'JointVector':
+        return JointVector(self.array)
+
+    def clamp(self, lower: np.ndarray = LOWER_BOUNDS, upper: np.ndarray = UPPER_BOUNDS) -> 'JointVector':
+        """ Returns a copy with all angles within the bounds, by default ANGLE_BOUNDS. """
+        return JointVector(np.clip(self.array, lower, upper))
+
+    def __getitem__(self, j_id: str) -> float:
+        return float(self.array[JOINT_INDEX[j_id]])
+
+    def __setitem__(self, j_id: str, angle: float):
+        self.array[JOINT_INDEX[j_id]] = angle
+
+    def __iter__(self):
+        return iter(JOINT_ORDER)
+
+    def __len__(self) -> int:
+        return len(JOINT_ORDER)
+
+    def __contains__(self, j_id) -> bool:
+        return j_id in JOINT_INDEX
+
+    def __array__(self, dtype=None, copy=None):
+        return self.array if dtype is None else self.array.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f'JointVector({self.to_dict()})'
+
+    @property
+    def base(self) -> float:
+        return float(self.array[0])
+
+    @base.setter
+    def base(self, angle: float):
+        self.array[0] = angle
+
+    @property
+    def shoulder(self) -> float:
+        return float(self.array[1])
+
+    @shoulder.setter
+    def shoulder(self, angle: float):
+        self.array[1] = angle
+
+    @property
+    def elbow(self) -> float:
+        return float(self.array[2])
+
+    @elbow.setter
+    def elbow(self, angle: float):
+        self.array[2] = angle
+
+    @property
+    def wrist(self) -> float:
+        return float(self.array[3])
+
+    @wrist.setter
+    def wrist(self, angle: float):
+        self.array[3] = angle
+
+    @property
+    def wrist_turn(self) -> float:
+        return float(self.array[4])
+
+    @wrist_turn.setter
+    def wrist_turn(self, angle: float):
+        self.array[4] = angle
@@ -2,8 +2,12 @@ from typing import Tuple
 from abc import abstractmethod
 from ikpy.chain import Chain
 from lib.constants import *
+from lib.jointvector import JointVector, JOINT_ORDER, LOWER_BOUNDS, UPPER_BOUNDS
+import lib.codegen as codegen
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from enum import Enum
-from math import degrees
+import atexit, multiprocessing, os
+from math import degrees, radians, sin, cos, acos, atan2, pi, hypot
 import numpy as np
 
 
@@ -20,13 +24,115 @@ class WristOrientation(Enum):
         else:
             return 'Unset'
 
+def angles_to_array(angles: list) -> np.ndarray:
+    """ Converts a list of angle dictionaries or JointVectors to an (N, 5) array in `JOINT_ORDER` for
+    `forward_batch`. """
+    return np.array([pose.array if isinstance(pose, JointVector) else [pose[j_id] for j_id in JOINT_ORDER]
+                     for pose in angles], dtype=float)
+
+
+def axis_rotation_batch(axis: np.ndarray, theta: np.ndarray) -> np.ndarray:
+    """ Builds an (N, 4, 4) stack of homogeneous rotation matrices around a unit axis, one for every angle
+    (in radians) in `theta`, using Rodrigues' rotation formula. """
+    cross = np.array([
+        [0, -axis[2], axis[1]],
+        [axis[2], 0, -axis[0]],
+        [-axis[1], axis[0], 0]])
+    matrices = np.zeros((len(theta), 4, 4))
+    matrices[:, :3, :3] = (np.eye(3) + np.sin(theta)[:, None, None] * cross
+                           + (1 - np.cos(theta))[:, None, None] * (cross @ cross))
+    matrices[:, 3, 3] = 1
+    return matrices
+
+
 class Kinematics():
     def __init__(self):
         pass
 
+    def close(self):
+        """ Releases the resources (like worker processes) of the implementation, nothing by default. """
+        pass
+
+    def forward_batch(self, angles: np.ndarray, frames: bool = False) -> np.ndarray:
+        """
+        Vectorized forward kinematics for many poses at once, every link transform is computed for all
+        poses with a single broadcasted matrix product (requires the implementation to have a `chain`).
+        Args:
+            angles: (N, 5) array of joint angles in degrees with columns in JOINT_ORDER
+            frames: return the 4x4 frame of every link instead of only the end effector position
+
+        Returns:
+            (N, 3) array of x, y and z coordinates or an (N, links, 4, 4) array of link frames
+        """
+        angles = np.radians(np.atleast_2d(np.asarray(angles, dtype=float)))
+        link_angles = np.zeros((angles.shape[0], len(self.chain.links)))
+        link_angles[:, 1:1+len(JOINT_ORDER)] = angles
+        link_angles[:, 1] -= pi / 2  # Same base compensation as get_forward_cartesian.
+
+        frame = np.broadcast_to(np.eye(4), (angles.shape[0], 4, 4))
+        link_frames = []
+        for (i, (fixed, axis)) in enumerate(self.__batch_links()):
+            frame = frame @ fixed
+            if axis is not None:
+                frame = frame @ axis_rotation_batch(axis, link_angles[:, i])
+            if frames:
+                link_frames.append(frame)
+
+        if frames:
+            return np.stack(link_frames, axis=1)
+        return frame[:, :3, 3].copy()
+
+    def get_forward_frame(self, angles: dict) -> np.ndarray:
+        """
+        Frame of the end effector from the generated kinematics module (requires the implementation to have
+        a `chain`).
+        Args:
+            angles: dictionary[JOINT_ID -> angle] in degrees
+
+        Returns:
+            4x4 homogeneous matrix of which the last column is the position and the third the direction the
+            gripper is pointing in
+        """
+        return self._generated().forward(*[angles[j_id] for j_id in JOINT_ORDER])
+
+    def jacobian(self, angles: dict) -> np.ndarray:
+        """
+        Geometric Jacobian of the end effector from the generated kinematics module (requires the
+        implementation to have a `chain`).
+        Args:
+            angles: dictionary[JOINT_ID -> angle] in degrees
+
+        Returns:
+            6x5 array with the linear (rows 0-2) and angular (rows 3-5) velocity per radian/s of each joint
+        """
+        return self._generated().jacobian(*[angles[j_id] for j_id in JOINT_ORDER])
+
+    def _generated(self):
+        """ Returns the generated kinematics module (see lib/codegen.py), only loaded once. """
+        if getattr(self, '_generated_module', None) is None:
+            self._generated_module = codegen.load(self.chain)
+        return self._generated_module
+
+    def __batch_links(self) -> list:
+        """ Splits every link of the chain in its fixed transform (origin translation and orientation) and
+        its unit rotation axis (None for fixed links), only done once per chain. """
+        if getattr(self, '_batch_chain', None) is not self.chain:
+            links = []
+            for link in self.chain.links:
+                fixed = np.asarray(link.get_link_frame_matrix(0), dtype=float)
+                axis = getattr(link, 'rotation', None)
+                if link.joint_type != 'revolute' or axis is None or not np.any(axis):
+                    links.append((fixed, None))
+                else:
+                    links.append((fixed, np.asarray(axis, dtype=float) / np.linalg.norm(axis)))
+            self._batch_links = links
+            self._batch_chain = self.chain
+        return self._batch_links
+
     @abstractmethod
     def inverse(self, position: Tuple[float, float, float],
-                wrist_orientation: WristOrientation = WristOrientation.UNSET) -> dict:
+                wrist_orientation: WristOrientation = WristOrientation.UNSET,
+                initial_angles: dict = None) -> dict:
         raise NotImplemented
 
     @abstractmethod
@@ -34,35 +140,178 @@ class Kinematics():
         raise NotImplemented
 
 
+""" Maximum number of random seeds that are solved (next to the current angles, INITIAL_ANGLES and the
+nearest Location) by the multi-seed inverse kinematics, only as many seeds as there are workers are
+solved. """
+MULTI_SEED_RANDOM = 3
+
+""" Time (in seconds) after which the multi-seed inverse kinematics uses the best solution found so
+far. """
+MULTI_SEED_TIME_BUDGET = 0.5
+
+""" Position error (in cm) within which solutions are considered equally good, the one with the least
+joint travel is used. """
+MULTI_SEED_TOLERANCE = 0.1
+
+""" Time (in seconds) the multi-seed inverse kinematics waits for a first solution after the time budget
+before it solves the target itself instead. """
+MULTI_SEED_TIMEOUT = 2.0
+
+
+def _solve_chain(chain: Chain, position: Tuple[float, float, float], wrist_orientation: WristOrientation,
+                 initial_position: list = None) -> list:
+    """ Runs the ikpy optimizer for a target, returns the link angles (in radians) of the chain. """
+    if wrist_orientation == WristOrientation.VERTICAL:
+        return chain.inverse_kinematics(target_position=position, orientation_mode='Z',
+                                        target_orientation=np.array([0, 0, -1]),
+                                        initial_position=initial_position)
+    elif wrist_orientation == WristOrientation.HORIZONTAL:
+        return chain.inverse_kinematics(position, orientation_mode='Y',
+                                        target_orientation=np.array([0, 0, -1]),
+                                        initial_position=initial_position)  # TODO
+    return chain.inverse_kinematics(position, initial_position=initial_position)
+
+
+# Chain and shared generation counter of a worker process of the multi-seed inverse kinematics, set by
+# `_init_worker`.
+_worker_chain = None
+_worker_generation = None
+
+
+def _init_worker(chain: Chain, generation):
+    global _worker_chain, _worker_generation
+    _worker_chain = chain
+    _worker_generation = generation
+
+
+def _solve_worker(generation: int, position: Tuple[float, float, float],
+                  wrist_orientation: WristOrientation, initial_position: list) -> list:
+    """ Solves one seed, seeds of an earlier inverse call that were still queued are skipped (None). """
+    if _worker_generation.value != generation:
+        return None
+    return list(_solve_chain(_worker_chain, position, wrist_orientation, initial_position))
+
+
 class IkPyKinematics(Kinematics):
-    def __init__(self, chain: Chain):
+    """
+    Kinematics using the ikpy optimizer. In multi-seed mode every target is solved concurrently (in a pool
+    of worker processes) from several starting poses: the nearest predefined Location, the given initial
+    angles, INITIAL_ANGLES and up to MULTI_SEED_RANDOM random poses, one seed per worker so that no seed
+    has to wait for another. The nearest Location comes first since it is the most reliable seed, with a
+    single worker it is the only one. After at most `time_budget` seconds the solution with the lowest
+    position error is used, of the solutions within MULTI_SEED_TOLERANCE of it the one closest to the
+    initial angles. Seeds that did not start by then are skipped by the workers, so they do not delay the
+    next target. The worker processes are shut down by close, or when the program exits.
+    """
+
+    def __init__(self, chain: Chain, compiled: bool = True, multi_seed: bool = False,
+                 time_budget: float = MULTI_SEED_TIME_BUDGET, workers: int = None):
         self.chain = chain
+        self.multi_seed = multi_seed
+        self.time_budget = time_budget
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._pool = None
+        self._generation = None
+        self._location_positions = None
+        self._rng = np.random.default_rng()
+        self.compiled = None
+        if compiled:
+            try:
+                self.compiled = self._generated()
+            except (ImportError, OSError) as e:
+                print('[!] Could not load generated kinematics, using the ikpy chain instead:', e)
 
     def inverse(self, position: Tuple[float, float, float],
-                wrist_orientation: WristOrientation = WristOrientation.UNSET) -> dict:
+                wrist_orientation: WristOrientation = WristOrientation.UNSET,
+                initial_angles: dict = None) -> dict:
         """
         Calculates the solution of angles for a workspace coordinate (in degrees)
         Args:
             wrist_orientation: desired orientation for the wrist joint
             position: X,Y,Z coordinates
+            initial_angles: optional angles dictionary (in degrees) to start the optimizer from
 
         Returns:
             Angles dictionary:  {JOINT_ID: anglex, JOINT_ID2: anglexx, etc...} with angles in degrees
 
         """
-        if wrist_orientation == WristOrientation.UNSET:
-            solution_angles = self.chain.inverse_kinematics(position)
-            print("unset")
-        elif wrist_orientation == WristOrientation.VERTICAL:
-            solution_angles = self.chain.inverse_kinematics(target_position=position, orientation_mode='Z',
-                                                            target_orientation=np.array([0, 0, -1]))
-            print("vertical")
-        elif wrist_orientation == WristOrientation.HORIZONTAL:
-            solution_angles = self.chain.inverse_kinematics(position, orientation_mode='Y',
-                                                            target_orientation=np.array([0, 0, -1]))  # TODO
-            print("horizontal")
+        if self.multi_seed:
+            return self.__inverse_multi_seed(position, wrist_orientation, initial_angles)
+
+        initial_position = None
+        if initial_angles is not None:
+            initial_position = self.__angles_to_chain(initial_angles)
+        solution_angles = _solve_chain(self.chain, position, wrist_orientation, initial_position)
+        return self.__chain_to_angles(solution_angles)
+
+    def __inverse_multi_seed(self, position: Tuple[float, float, float],
+                             wrist_orientation: WristOrientation, initial_angles: dict = None) -> dict:
+        """ Solves a target from several seeds concurrently and picks the best solution, see the class
+        documentation. """
+        current = JointVector.from_dict(initial_angles) if initial_angles is not None else JointVector()
+        seeds = [self.__nearest_location(position), current, JointVector()][:self.workers]
+        random_seeds = min(MULTI_SEED_RANDOM, self.workers - len(seeds))
+        for sample in self._rng.uniform(LOWER_BOUNDS, UPPER_BOUNDS, size=(random_seeds, len(JOINT_ORDER))):
+            seeds.append(JointVector(sample))
+
+        if self._pool is None:
+            self._generation = multiprocessing.Value('i', 0)
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(self.chain, self._generation))
+            atexit.register(self.close)
+        with self._generation.get_lock():
+            self._generation.value += 1
+            generation = self._generation.value
+        position = tuple(float(v) for v in position)
+        futures = [self._pool.submit(_solve_worker, generation, position, wrist_orientation,
+                                     self.__angles_to_chain(seed)) for seed in seeds]
+        done, pending = wait(futures, timeout=self.time_budget)
+        if len(done) == 0:
+            done, pending = wait(futures, timeout=MULTI_SEED_TIMEOUT, return_when=FIRST_COMPLETED)
+        # Running optimizations can not be interrupted, but the seeds that did not start are skipped.
+        with self._generation.get_lock():
+            self._generation.value += 1
+        for future in pending:
+            future.cancel()
 
-        new_angles = {
+        solutions = [self.__chain_to_angles(future.result()) for future in done
+                     if future.result() is not None]
+        if len(solutions) == 0:
+            # Solving once more here could take just as long, the best seed is returned instead and the
+            # caller finds out from its position error that the target was not reached.
+            print('[!] Multi-seed inverse kinematics timed out, returning the closest seed.')
+            solutions = [seed.to_dict() for seed in seeds]
+
+        candidates = []
+        for angles in solutions:
+            error = float(np.linalg.norm(np.subtract(self.get_forward_cartesian(angles), position)))
+            travel = sum(abs(angles[j_id] - current[j_id]) for j_id in JOINT_ORDER)
+            candidates.append((error, travel, angles))
+        best_error = min(error for (error, _, _) in candidates)
+        return min((c for c in candidates if c[0] <= best_error + MULTI_SEED_TOLERANCE),
+                   key=lambda c: c[1])[2]
+
+    def close(self):
+        """ Shuts down the worker processes of the multi-seed inverse kinematics, they are started again
+        by the next multi-seed inverse call. """
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            atexit.unregister(self.close)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def __nearest_location(self, position: Tuple[float, float, float]) -> JointVector:
+        """ Returns the angles of the predefined Location closest to a position. """
+        from lib.locations import LOCATIONS
+        if self._location_positions is None:
+            self._location_positions = self.forward_batch(
+                angles_to_array([location.get_joint_vector() for location in LOCATIONS]))
+        distances = np.linalg.norm(self._location_positions - np.asarray(position, dtype=float), axis=1)
+        return LOCATIONS[int(np.argmin(distances))].get_joint_vector()
+
+    @staticmethod
+    def __chain_to_angles(solution_angles: list) -> dict:
+        """ Converts the list of link angles (in radians) of the chain to an angles dictionary. """
+        return {
             BASE_JOINT_ID: degrees(solution_angles[1]) + 90,
             # +90 for compensation of chain bounds (-90, 180)
             # instead of (0, 270)
@@ -72,7 +321,6 @@ class IkPyKinematics(Kinematics):
             # WRIST_TURN_JOINT_ID: degrees(solution_angles[5]),
             WRIST_TURN_JOINT_ID: 90
         }
-        return new_angles
 
     def get_forward_cartesian(self, angles: dict) -> Tuple[float, float, float]:
         """
@@ -83,12 +331,10 @@ class IkPyKinematics(Kinematics):
         Returns:
             tuple of x, y and z coordinate
         """
-        angles = angles.copy()
-        angles[BASE_JOINT_ID] = angles[BASE_JOINT_ID] - 90
-        angles_list = self.__angle_dict_to_list(angles)
-        angles_list_radians = np.radians( np.array(angles_list) ).tolist()
+        if self.compiled is not None:
+            return self.compiled.position(*[angles[j_id] for j_id in JOINT_ORDER])
 
-        trans_matrix = self.chain.forward_kinematics(angles_list_radians)
+        trans_matrix = self.chain.forward_kinematics(self.__angles_to_chain(angles))
         x = trans_matrix[0][3]
         y = trans_matrix[1][3]
         z = trans_matrix[2][3]
@@ -97,8 +343,249 @@ class IkPyKinematics(Kinematics):
 
 
     @staticmethod
-    def __angle_dict_to_list(angles_i: dict):
-        result = [0]
-        result.extend(angles_i.values())
-        result.append(0)
-        return result
+    def __angles_to_chain(angles: dict) -> list:
+        """ Converts an angles dictionary or JointVector (in degrees) to the list of link angles (in
+        radians) used by the chain, joints that are missing are at their initial angle. """
+        link_angles = np.zeros(len(JOINT_ORDER) + 2)
+        link_angles[1:-1] = JointVector.from_dict(angles).array
+        link_angles[1] -= 90
+        return np.radians(link_angles).tolist()
+
+
+""" Wrist pitches (measured from the vertical, in radians) that are tried in order when no wrist
+orientation is requested, starting with the gripper pointing straight down. """
+UNSET_PITCHES = tuple(radians(pitch) for pitch in range(180, -1, -5))
+
+""" Largest deviation (in degrees) from the nominal pitch of an explicit wrist orientation that is still
+accepted. The ikpy solver only treats the orientation as a soft goal, its VERTICAL solutions for the
+board are tilted up to about 30 degrees from straight down. """
+ORIENTATION_PITCH_RANGE = 30
+
+
+def _pitch_sweep(nominal: int) -> tuple:
+    """ Returns the pitches (in radians) within ORIENTATION_PITCH_RANGE of a nominal pitch (in degrees),
+    nominal pitch first. """
+    offsets = [0] + [sign * offset for offset in range(5, ORIENTATION_PITCH_RANGE + 1, 5)
+                     for sign in (-1, 1)]
+    return tuple(radians(nominal + offset) for offset in offsets)
+
+
+""" Wrist pitches that are tried for each of the wrist orientations, nominal pitch first and then
+alternating on either side of it in steps of 5 degrees. HORIZONTAL is taken literally (gripper level,
+pitch 90 degrees) while ikpy's HORIZONTAL mode is not, for most board positions the analytic solver
+hands HORIZONTAL targets to the fallback solver. The autopilot only uses VERTICAL and UNSET. """
+ORIENTATION_PITCHES = {
+    WristOrientation.VERTICAL: _pitch_sweep(180),
+    WristOrientation.HORIZONTAL: _pitch_sweep(90),
+    WristOrientation.UNSET: UNSET_PITCHES,
+}
+
+
+class AnalyticKinematics(Kinematics):
+    """
+    Closed-form kinematics for the Beatrix arm. The shoulder, elbow and wrist all rotate in the vertical
+    plane set by the base joint, so once the wrist pitch is fixed the arm reduces to a planar two link
+    problem that is solved with the law of cosines. Targets without a solution inside ANGLE_BOUNDS are
+    handed to the fallback solver (usually IkPyKinematics) when one is given.
+
+    The link lengths are read from the chain rather than constants.py so that the solutions always agree
+    with the chain's forward kinematics.
+    """
+
+    def __init__(self, chain: Chain, fallback: Kinematics = None, tolerance: float = 0.01):
+        self.chain = chain
+        self.fallback = fallback
+        self.tolerance = tolerance
+
+        links = {link.name: link for link in chain.links}
+        self.shoulder_height = (links['base'].origin_translation[2]
+                                + links['shoulder'].origin_translation[2])
+        self.upper_arm = links['elbow'].origin_translation[2]
+        self.forearm = links['wrist'].origin_translation[2]
+        self.hand = links['wrist_turn'].origin_translation[2] + links['grabber'].origin_translation[2]
+
+    def inverse(self, position: Tuple[float, float, float],
+                wrist_orientation: WristOrientation = WristOrientation.UNSET,
+                initial_angles: dict = None) -> dict:
+        """
+        Calculates the solution of angles for a workspace coordinate (in degrees)
+        Args:
+            wrist_orientation: desired orientation for the wrist joint
+            position: X,Y,Z coordinates
+            initial_angles: not needed by the analytic solver, passed on to the fallback solver
+
+        Returns:
+            Angles dictionary:  {JOINT_ID: anglex, JOINT_ID2: anglexx, etc...} with angles in degrees
+
+        Raises:
+            ValueError: if the position can not be reached and no fallback solver was provided.
+        """
+        x, y, z = position[0], position[1], position[2]
+        reach = hypot(x, y)
+        base = degrees(atan2(x, -y)) + 90
+        if base < ANGLE_BOUNDS[BASE_JOINT_ID][0]:
+            # Reach over the top of the arm instead of rotating the base out of its bounds.
+            base += 180
+            reach = -reach
+
+        for pitch in ORIENTATION_PITCHES[wrist_orientation]:
+            angles = self.__solve_planar(reach, z, pitch)
+            if angles is None:
+                continue
+            angles[BASE_JOINT_ID] = base
+            angles[WRIST_TURN_JOINT_ID] = 90
+            if self.__within_bounds(angles) and self.__error(angles, position) <= self.tolerance:
+                return {j_id: angles[j_id] for j_id in INITIAL_ANGLES}
+
+        if self.fallback is not None:
+            return self.fallback.inverse(position, wrist_orientation, initial_angles)
+        raise ValueError(f'No analytic solution for position {tuple(position)} ({wrist_orientation}).')
+
+    def close(self):
+        """ Closes the fallback solver. """
+        if self.fallback is not None:
+            self.fallback.close()
+
+    def get_forward_cartesian(self, angles: dict) -> Tuple[float, float, float]:
+        """
+        returns the workspace coordinates of the end effector in x, y, z
+        Args:
+            angles: dictionary[JOINT_ID -> angle]
+
+        Returns:
+            tuple of x, y and z coordinate
+        """
+        upper = radians(angles[SHOULDER_JOINT_ID] - INITIAL_ANGLES[SHOULDER_JOINT_ID])
+        fore = upper + radians(angles[ELBOW_JOINT_ID] - INITIAL_ANGLES[ELBOW_JOINT_ID])
+        hand = fore - radians(angles[WRIST_JOINT_ID] - INITIAL_ANGLES[WRIST_JOINT_ID])
+
+        reach = self.upper_arm * sin(upper) + self.forearm * sin(fore) + self.hand * sin(hand)
+        height = self.upper_arm * cos(upper) + self.forearm * cos(fore) + self.hand * cos(hand)
+
+        base = radians(angles[BASE_JOINT_ID] - 90)
+        return (reach * sin(base), -reach * cos(base), self.shoulder_height + height)
+
+    def reachable_batch(self, positions: np.ndarray,
+                        wrist_orientation: WristOrientation = WristOrientation.UNSET) -> np.ndarray:
+        """
+        Vectorized check of which positions have an analytic solution within ANGLE_BOUNDS, uses the same
+        geometry and wrist pitches as `inverse` without building the angle dictionaries.
+        Args:
+            positions: (N, 3) array of X,Y,Z coordinates
+            wrist_orientation: desired orientation for the wrist joint
+
+        Returns:
+            (N,) boolean array, True for every position that `inverse` can solve without the fallback
+        """
+        positions = np.atleast_2d(np.asarray(positions, dtype=float))
+        x, y, z = positions[:, 0], positions[:, 1], positions[:, 2]
+        reach = np.hypot(x, y)
+        base = np.degrees(np.arctan2(x, -y)) + 90
+        flipped = base < ANGLE_BOUNDS[BASE_JOINT_ID][0]
+        base = np.where(flipped, base + 180, base)
+        reach = np.where(flipped, -reach, reach)
+
+        def within(j_id, angles):
+            return (ANGLE_BOUNDS[j_id][0] - 1e-6 <= angles) & (angles <= ANGLE_BOUNDS[j_id][1] + 1e-6)
+
+        reachable = np.zeros(len(positions), dtype=bool)
+        for pitch in ORIENTATION_PITCHES[wrist_orientation]:
+            wrist_reach = reach - self.hand * sin(pitch)
+            wrist_height = z - self.shoulder_height - self.hand * cos(pitch)
+            cos_elbow = ((wrist_reach ** 2 + wrist_height ** 2 - self.upper_arm ** 2 - self.forearm ** 2)
+                         / (2 * self.upper_arm * self.forearm))
+            elbow = np.arccos(np.clip(cos_elbow, -1, 1))
+            upper = np.arctan2(wrist_reach, wrist_height) - np.arctan2(
+                self.forearm * np.sin(elbow), self.upper_arm + self.forearm * np.cos(elbow))
+            shoulder = INITIAL_ANGLES[SHOULDER_JOINT_ID] + np.degrees(upper)
+            wrist = INITIAL_ANGLES[WRIST_JOINT_ID] + np.degrees(upper + elbow - pitch)
+            elbow = INITIAL_ANGLES[ELBOW_JOINT_ID] + np.degrees(elbow)
+            reachable |= ((np.abs(cos_elbow) <= 1 + 1e-9) & within(SHOULDER_JOINT_ID, shoulder)
+                          & within(ELBOW_JOINT_ID, elbow) & within(WRIST_JOINT_ID, wrist))
+        return reachable & within(BASE_JOINT_ID, base)
+
+    def __solve_planar(self, reach: float, height: float, pitch: float):
+        """ Solves the shoulder, elbow and wrist angles for a point in the plane of the arm, where `reach`
+        is the horizontal distance from the base axis and `pitch` the angle of the hand from the vertical.
+        Returns None when the wrist point is out of reach of the upper arm and forearm. """
+        wrist_reach = reach - self.hand * sin(pitch)
+        wrist_height = height - self.shoulder_height - self.hand * cos(pitch)
+
+        cos_elbow = ((wrist_reach ** 2 + wrist_height ** 2 - self.upper_arm ** 2 - self.forearm ** 2)
+                     / (2 * self.upper_arm * self.forearm))
+        if not -1 - 1e-9 <= cos_elbow <= 1 + 1e-9:
+            return None
+        cos_elbow = max(-1.0, min(1.0, cos_elbow))
+
+        # The elbow can only bend one way, so only the positive solution is needed.
+        elbow = acos(cos_elbow)
+        upper = atan2(wrist_reach, wrist_height) - atan2(self.forearm * sin(elbow),
+                                                         self.upper_arm + self.forearm * cos(elbow))
+        return {
+            SHOULDER_JOINT_ID: INITIAL_ANGLES[SHOULDER_JOINT_ID] + degrees(upper),
+            ELBOW_JOINT_ID: INITIAL_ANGLES[ELBOW_JOINT_ID] + degrees(elbow),
+            WRIST_JOINT_ID: INITIAL_ANGLES[WRIST_JOINT_ID] + degrees(upper + elbow - pitch),
+        }
+
+    def __error(self, angles: dict, position: Tuple[float, float, float]) -> float:
+        """ Distance between the requested position and the forward kinematics of the solved angles. """
+        x, y, z = self.get_forward_cartesian(angles)
+        return hypot(x - position[0], y - position[1], z - position[2])
+
+    @staticmethod
+    def __within_bounds(angles: dict) -> bool:
+        for j_id, angle in angles.items():
+            if not ANGLE_BOUNDS[j_id][0] - 1e-6 <= angle <= ANGLE_BOUNDS[j_id][1] + 1e-6:
+                return False
+        return True
+
+
+""" Names of the available inverse kinematics solvers as accepted by `create_kinematics`. """
+KINEMATICS_SOLVERS = ('analytic', 'ikpy')
+
+
+def solver_description(kinematics: Kinematics) -> list:
+    """ Describes a kinematics implementation by its class and settings, including its fallback solver
+    (if any), for fingerprints of data that depends on the solutions it finds. """
+    description = [type(kinematics).__name__, bool(getattr(kinematics, 'multi_seed', False))]
+    fallback = getattr(kinematics, 'fallback', None)
+    if fallback is not None:
+        description.append(solver_description(fallback))
+    return description
+
+
+def create_kinematics(solver: str, chain: Chain, multi_seed: bool = False) -> Kinematics:
+    """
+    Creates the kinematics implementation with the given name for a chain
+    Args:
+        solver: either 'analytic' (closed-form with ikpy as fallback) or 'ikpy'
+        chain: ikpy chain representation of the robot arm
+        multi_seed: solve with ikpy from several seeds concurrently, see IkPyKinematics
+
+    Returns:
+        Kinematics instance
+    """
+    if solver == 'analytic':
+        return AnalyticKinematics(chain, fallback=IkPyKinematics(chain, multi_seed=multi_seed))
+    if solver == 'ikpy':
+        return IkPyKinematics(chain, multi_seed=multi_seed)
+    raise ValueError(f'Unknown kinematics solver \'{solver}\', expected one of {KINEMATICS_SOLVERS}.')
+
+
+if __name__ == '__main__':
+    from lib.chain import beatrix_rep
+    from lib.locations import PUZZLE_LOCATIONS
+
+    def test(angles, title: str = None):
+        if title: print('[T] Running test:', title)
+        reference = IkPyKinematics(beatrix_rep)
+        analytic = AnalyticKinematics(beatrix_rep)
+        position = reference.get_forward_cartesian(angles)
+        assert np.allclose(analytic.get_forward_cartesian(angles), position)
+        solution = analytic.inverse(position)
+        assert np.allclose(reference.get_forward_cartesian(solution), position)
+        print('[*] Passed!')
+
+    test(INITIAL_ANGLES, title='Initial angles.')
+    for location in PUZZLE_LOCATIONS.values():
+        test(location.get_angle_dict(), title=location.get_name())
@@ -1,6 +1,7 @@
 from lib.constants import (BASE_JOINT_ID, SHOULDER_JOINT_ID, ELBOW_JOINT_ID, WRIST_JOINT_ID, 
     WRIST_TURN_JOINT_ID)
 from lib.shapes import Shape
+from lib.jointvector import JointVector
 
 class Location:
     def __init__(self, base, shoulder, elbow, wrist, wrist_turn, name: str):
@@ -20,10 +21,14 @@ class Location:
             WRIST_TURN_JOINT_ID: self.wrist_turn,
         }
 
+    def get_joint_vector(self) -> JointVector:
+        return JointVector([self.base, self.shoulder, self.elbow, self.wrist, self.wrist_turn])
+
     def get_name(self):
         return self.name
 
 INPUT_AREA_CAM_VIEW    = Location(85, 101, 60, 106, 90, "Input area cam view")
+INPUT_AREA_CAM_APPROACH = Location(75, 101, 60, 106, 90, "Input area cam approach")
 INPUT_AREA_GRAB_CENTER = Location(84, 119, 82, 53,  90, "Input area grab center")
 PUZZLE_AREA_CAM_VIEW   = Location(172, 94, 60, 107, 90, "Puzzle area cam view")
 
@@ -62,3 +67,12 @@ LOCATIONS_FOR_GUI = [
     TRIANGLE,
     OCTAGON
 ]
+
+# All predefined locations, used as seeds for the inverse kinematics solver.
+LOCATIONS = [
+    INPUT_AREA_CAM_VIEW,
+    INPUT_AREA_GRAB_CENTER,
+    PUZZLE_AREA_CAM_VIEW,
+    HOVER_ABOVE_PUZZLES,
+    HOVER_ABOVE_INPUT,
+] + list(PUZZLE_LOCATIONS.values())
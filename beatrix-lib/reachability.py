@@ -0,0 +1,129 @@
+from typing import Tuple
+from lib.kinematics import AnalyticKinematics, WristOrientation, ORIENTATION_PITCHES
+from lib.constants import POSITION_LIMIT, ANGLE_BOUNDS, FLOOR_HEIGHT
+from lib.codegen import chain_hash
+from ikpy.chain import Chain
+import hashlib, json, os
+import numpy as np
+
+# Run from one of the application folders (where lib is available) with: python -m lib.reachability
+
+""" Default location of the generated reachability map. """
+DEFAULT_MAP_FILE = os.path.expanduser('~') + '/.beatrix-reachability.npz'
+
+""" Default edge length (in cm) of the voxels of the reachability map. """
+DEFAULT_RESOLUTION = 1.0
+
+
+class ReachabilityMap:
+    """
+    Voxel grid over the workspace (x and y within +/- POSITION_LIMIT, z within FLOOR_HEIGHT and
+    POSITION_LIMIT, which includes the whole board and the grasp positions just below its surface) that
+    records for every wrist orientation whether the center of each voxel can be reached within
+    ANGLE_BOUNDS. The grid is generated offline with the analytic kinematics and stored as a bitset,
+    lookups are a single array index. Since only the analytic solutions are known, positions outside of
+    the map may still be reachable for another solver.
+    """
+
+    def __init__(self, layers: np.ndarray, origin: Tuple[float, float, float], resolution: float,
+                 fingerprint: str = None):
+        self.layers = layers
+        self.origin = np.asarray(origin, dtype=float)
+        self.resolution = resolution
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def generate(chain: Chain, resolution: float = DEFAULT_RESOLUTION) -> 'ReachabilityMap':
+        """
+        Builds the reachability map of a chain, takes a few seconds
+        Args:
+            chain: ikpy chain representation of the robot arm
+            resolution: edge length of the voxels in cm
+
+        Returns:
+            ReachabilityMap with a layer for every WristOrientation
+        """
+        kinematics = AnalyticKinematics(chain)
+        origin = (-POSITION_LIMIT, -POSITION_LIMIT, FLOOR_HEIGHT)
+        shape = (
+            int(round(2 * POSITION_LIMIT / resolution)) + 1,
+            int(round(2 * POSITION_LIMIT / resolution)) + 1,
+            int(round((POSITION_LIMIT - FLOOR_HEIGHT) / resolution)) + 1,
+        )
+        centers = np.stack(np.meshgrid(*[np.arange(n) for n in shape], indexing='ij'), axis=-1)
+        centers = centers.reshape(-1, 3) * resolution + origin
+
+        layers = np.zeros((len(WristOrientation),) + shape, dtype=bool)
+        for orientation in WristOrientation:
+            layers[orientation.value] = kinematics.reachable_batch(centers, orientation).reshape(shape)
+        return ReachabilityMap(layers, origin, resolution, fingerprint(chain))
+
+    @staticmethod
+    def load(chain: Chain, map_file: str = DEFAULT_MAP_FILE) -> 'ReachabilityMap':
+        """
+        Loads the reachability map of a chain, the map is only (re)generated and saved when it does not
+        exist yet or was generated for a different chain definition or different joint bounds
+        Args:
+            chain: ikpy chain representation of the robot arm
+            map_file: location of the stored map
+
+        Returns:
+            ReachabilityMap
+        """
+        expected = fingerprint(chain)
+        if os.path.exists(map_file):
+            with np.load(map_file) as data:
+                if str(data['fingerprint']) == expected:
+                    shape = tuple(data['shape'])
+                    layers = np.unpackbits(data['bits'], count=int(np.prod(shape))).astype(bool)
+                    return ReachabilityMap(layers.reshape(shape), data['origin'],
+                                           float(data['resolution']), expected)
+            print('[!] Chain, workspace or wrist pitches changed, regenerating reachability map.')
+
+        print(f'[*] Generating reachability map {map_file}.')
+        reachability = ReachabilityMap.generate(chain)
+        reachability.save(map_file)
+        return reachability
+
+    def save(self, map_file: str = DEFAULT_MAP_FILE):
+        """ Saves the map as a compressed bitset (one bit per voxel per wrist orientation). """
+        np.savez_compressed(map_file, bits=np.packbits(self.layers), shape=np.array(self.layers.shape),
+                            origin=self.origin, resolution=self.resolution, fingerprint=self.fingerprint)
+
+    def is_reachable(self, position: Tuple[float, float, float],
+                     wrist_orientation: WristOrientation = WristOrientation.UNSET) -> bool:
+        """
+        Checks whether a position can be reached with the given wrist orientation
+        Args:
+            position: X,Y,Z coordinates
+            wrist_orientation: desired orientation for the wrist joint
+
+        Returns:
+            True if the voxel containing the position is reachable, False otherwise or when the position is
+            outside of the map
+        """
+        shape = self.layers.shape
+        i = int(round((position[0] - self.origin[0]) / self.resolution))
+        j = int(round((position[1] - self.origin[1]) / self.resolution))
+        k = int(round((position[2] - self.origin[2]) / self.resolution))
+        if 0 <= i < shape[1] and 0 <= j < shape[2] and 0 <= k < shape[3]:
+            return bool(self.layers[wrist_orientation.value, i, j, k])
+        return False
+
+
+def fingerprint(chain: Chain) -> str:
+    """ Hash of the chain definition, workspace limits, joint bounds and wrist pitches, a stored map is
+    regenerated when it changes. """
+    pitches = sorted((orientation.value, list(pitches))
+                     for (orientation, pitches) in ORIENTATION_PITCHES.items())
+    data = json.dumps([chain_hash(chain), POSITION_LIMIT, FLOOR_HEIGHT, sorted(ANGLE_BOUNDS.items()),
+                       pitches])
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+if __name__ == '__main__':
+    from lib.chain import beatrix_rep
+    reachability = ReachabilityMap.load(beatrix_rep)
+    for orientation in WristOrientation:
+        layer = reachability.layers[orientation.value]
+        print(f'[*] {orientation}: {np.count_nonzero(layer)} of {layer.size} voxels reachable.')
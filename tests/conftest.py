@@ -0,0 +1,14 @@
+import os
+import sys
+import types
+
+# The applications import beatrix-lib as the `lib` package and their own modules by their file name, make
+# both available to the tests the same way.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'lib' not in sys.modules:
+    lib = types.ModuleType('lib')
+    lib.__path__ = [os.path.join(ROOT, 'beatrix-lib')]
+    sys.modules['lib'] = lib
+
+sys.path.insert(0, os.path.join(ROOT, 'beatrix-controller'))
@@ -0,0 +1,35 @@
+from lib.benchmark import benchmark_kinematics
+from lib.kinematics import Kinematics, WristOrientation
+import numpy as np
+
+
+class ShiftedKinematics(Kinematics):
+    """ Kinematics whose angles are the position itself, shifted by `miss` cm, or that always fails. """
+
+    def __init__(self, miss: float = 0.0, fail: bool = False):
+        self.miss = miss
+        self.fail = fail
+
+    def inverse(self, position, wrist_orientation=WristOrientation.UNSET, initial_angles=None) -> dict:
+        if self.fail:
+            raise ValueError('Unreachable')
+        return {'x': position[0] + self.miss, 'y': position[1], 'z': position[2]}
+
+    def get_forward_cartesian(self, angles: dict):
+        return (angles['x'], angles['y'], angles['z'])
+
+
+TARGETS = np.array([[10, 20, 5], [0, 30, 10]], dtype=float)
+
+
+def test_round_trip_error():
+    result = benchmark_kinematics(ShiftedKinematics(miss=2.0), TARGETS, reference=ShiftedKinematics())
+    assert result['error_cm']['max'] == 2.0
+    assert (result['failures'], result['failure_rate']) == (0, 0.0)
+
+
+def test_all_targets_failing_reports_no_error():
+    result = benchmark_kinematics(ShiftedKinematics(fail=True), TARGETS, reference=ShiftedKinematics())
+    assert result['error_cm'] is None
+    assert result['inverse'] is None
+    assert (result['failures'], result['failure_rate']) == (2, 1.0)
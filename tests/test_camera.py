@@ -0,0 +1,74 @@
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+
+from camera import Camera, FRAME_INTERVAL
+from clock import RealClock
+import numpy as np
+
+
+class FakeServer:
+    def send_video_frame(self, frame):
+        pass
+
+
+class FakeCapture:
+    """ Video capture that delivers a small frame every FRAME_INTERVAL, stamped with the clock. """
+
+    def __init__(self, clock: RealClock, working: bool = True):
+        self.clock = clock
+        self.working = working
+        self.stamp = 0.0
+        self.grabbed = 0
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_HEIGHT: 4, cv2.CAP_PROP_FRAME_WIDTH: 6,
+                cv2.CAP_PROP_POS_MSEC: self.stamp * 1000}.get(prop, 0)
+
+    def grab(self) -> bool:
+        self.clock.sleep(FRAME_INTERVAL)
+        self.stamp = self.clock.monotonic()
+        self.grabbed += 1
+        return self.working
+
+    def retrieve(self, image):
+        image[:] = self.grabbed % 256
+        return True, image
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def camera(monkeypatch):
+    """ Returns a function that starts a Camera on a FakeCapture, the cameras are stopped afterwards. """
+    cameras = []
+
+    def start(working: bool = True) -> Camera:
+        clock = RealClock()
+        monkeypatch.setattr(cv2, 'VideoCapture', lambda index: FakeCapture(clock, working))
+        camera = Camera(FakeServer(), clock=clock)
+        camera.start()
+        cameras.append(camera)
+        return camera
+    yield start
+    for camera in cameras:
+        camera.stop()
+
+
+def test_wait_for_a_frame_captured_after_a_time(camera):
+    camera = camera()
+    after = camera.clock.monotonic() + 3 * FRAME_INTERVAL
+    with camera.wait_for_frame(after=after) as frame:
+        assert frame.timestamp > after
+        assert frame.image.shape == (4, 6, 3)
+        assert np.all(frame.image == frame.image[0, 0, 0])
+    assert camera.get_latest_frame(newer_than=frame.sequence) is None
+
+
+def test_wait_for_frame_times_out(camera):
+    camera = camera(working=False)
+    assert camera.wait_for_frame(timeout=0.1) is None
@@ -0,0 +1,34 @@
+from joints.dutytable import DutyTable
+from joints.emulatedpca9685 import EmulatedPCA9685
+from joints.servobus import ServoBus
+from clock import VirtualClock
+import pytest
+
+
+@pytest.fixture
+def bus():
+    pca = EmulatedPCA9685(clock=VirtualClock())
+    pca.frequency = 50
+    return ServoBus(pca)
+
+
+def test_lookup_matches_the_linear_mapping(bus):
+    table = DutyTable.build(bus, 0, 180, 180)
+    for angle in (0, 0.1, 45, 90.3, 180):
+        assert table.lookup(angle) == bus.angle_to_duty(angle, 180)
+    assert table.lookup(-10) == table.lookup(0)
+    assert table.lookup(200) == table.lookup(180)
+
+
+def test_offset_and_mirroring(bus):
+    table = DutyTable.build(bus, 0, 90, 180, offset=10, mirrored=True)
+    assert table.lookup(30) == bus.angle_to_duty(180 - 40, 180)
+    # The servo angle stays within the actuation range.
+    table = DutyTable.build(bus, 0, 180, 180, offset=10)
+    assert table.lookup(175) == bus.angle_to_duty(180, 180)
+
+
+def test_calibration_is_interpolated(bus):
+    table = DutyTable.build(bus, 0, 180, 180, calibration=[(180, 2400), (0, 600), (90, 1600)])
+    assert table.lookup(45) == int((1100 * bus.frequency) / 1000000 * 0xFFFF)
+    assert table.lookup(135) == int((2000 * bus.frequency) / 1000000 * 0xFFFF)
@@ -0,0 +1,36 @@
+from joints.emulatedpca9685 import EmulatedPCA9685, I2C_CLOCK, TRANSACTION_OVERHEAD
+from clock import VirtualClock
+import pytest
+
+
+def test_frequency_enables_auto_increment():
+    pca = EmulatedPCA9685(clock=VirtualClock())
+    pca.frequency = 50
+    assert pca.frequency == pytest.approx(50, rel=0.01)
+    pca.i2c_device.write(bytes([0x06, 0, 0, 0x33, 0x01, 0, 0, 0x66, 0x02]))
+    assert (pca.get_duty(0), pca.get_duty(1)) == (0x133 << 4, 0x266 << 4)
+
+
+def test_channels_write_one_transaction_each():
+    pca = EmulatedPCA9685(clock=VirtualClock())
+    pca.frequency = 50
+    mark = pca.mark()
+    pca.channels[3].duty_cycle = 0xFFFF
+    pca.channels[4].duty_cycle = 0
+    stats = pca.get_stats(mark)
+    assert (stats['writes'], stats['bytes']) == (2, 12)
+    assert (pca.channels[3].duty_cycle, pca.channels[4].duty_cycle) == (0xFFFF, 0)
+
+
+def test_bus_time_is_modeled_and_optionally_simulated():
+    clock = VirtualClock()
+    pca = EmulatedPCA9685(clock=clock, simulate_latency=True)
+    mark = pca.mark()
+    pca.i2c_device.write(bytes(5))
+    # Start and stop condition and 9 clocks for the address and each of the 5 bytes.
+    bus_time = (2 + 9 * 6) / I2C_CLOCK + TRANSACTION_OVERHEAD
+    stats = pca.get_stats(mark)
+    assert stats['bus_time_ms'] == pytest.approx(bus_time * 1000)
+    assert clock.monotonic() == pytest.approx(bus_time)
+    assert stats['utilization'] == pytest.approx(1.0)
+    assert len(pca.log) == 1
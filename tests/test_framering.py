@@ -0,0 +1,68 @@
+from framering import FrameRing
+import numpy as np
+import pytest
+
+
+def capture(ring: FrameRing, value: int, timestamp: float) -> int:
+    buffer = ring.acquire_write()
+    buffer[:] = value
+    return ring.publish(timestamp)
+
+
+def test_latest_frame():
+    ring = FrameRing((2, 2), size=3)
+    assert ring.latest() is None
+    capture(ring, 1, 1.0)
+    sequence = capture(ring, 2, 2.0)
+    with ring.latest() as frame:
+        assert (frame.sequence, frame.timestamp) == (sequence, 2.0)
+        assert np.all(frame.image == 2)
+        with pytest.raises(ValueError):
+            frame.image[0, 0] = 0
+    assert frame.image is None
+
+
+def test_newer_than_and_after():
+    ring = FrameRing((1,), size=2)
+    sequence = capture(ring, 1, 1.0)
+    assert ring.latest(newer_than=sequence) is None
+    assert ring.latest(after=1.0) is None
+    ring.latest(after=0.5).release()
+    capture(ring, 2, 2.0)
+    frame = ring.latest(newer_than=sequence)
+    assert frame.sequence == sequence + 1
+    frame.release()
+
+
+def test_referenced_buffers_are_not_overwritten():
+    ring = FrameRing((1,), size=3)
+    capture(ring, 1, 1.0)
+    held = ring.latest()
+    capture(ring, 2, 2.0)
+    # One buffer is held by a consumer and one is the latest frame, only the third can be written.
+    capture(ring, 3, 3.0)
+    capture(ring, 4, 4.0)
+    assert held.image[0] == 1
+    held.release()
+    assert ring.acquire_write() is not None
+
+
+def test_all_buffers_in_use():
+    ring = FrameRing((1,), size=2)
+    capture(ring, 1, 1.0)
+    first = ring.latest()
+    capture(ring, 2, 2.0)
+    second = ring.latest()
+    assert ring.acquire_write() is None
+    first.release()
+    assert ring.acquire_write() is not None
+    second.release()
+
+
+def test_release_is_idempotent():
+    ring = FrameRing((1,), size=2)
+    capture(ring, 1, 1.0)
+    frame = ring.latest()
+    frame.release()
+    frame.release()
+    assert ring.references == [0, 0]
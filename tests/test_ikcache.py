@@ -0,0 +1,87 @@
+from lib.ikcache import CachedKinematics
+from lib.kinematics import Kinematics, WristOrientation
+
+
+class FakeKinematics(Kinematics):
+    """ Kinematics whose angles are the position itself, records the initial angles of every solve. """
+
+    def __init__(self, miss: float = 0.0):
+        self.calls = []
+        self.miss = miss
+
+    def inverse(self, position, wrist_orientation=WristOrientation.UNSET, initial_angles=None) -> dict:
+        self.calls.append(initial_angles)
+        return {'x': position[0] + self.miss, 'y': position[1], 'z': position[2]}
+
+    def get_forward_cartesian(self, angles: dict):
+        return (angles['x'], angles['y'], angles['z'])
+
+
+class OtherKinematics(FakeKinematics):
+    pass
+
+
+def test_hit_does_not_solve():
+    kinematics = FakeKinematics()
+    cache = CachedKinematics(kinematics)
+    first = cache.inverse((10, 20, 5), WristOrientation.VERTICAL)
+    second = cache.inverse((10.1, 20, 5), WristOrientation.VERTICAL)
+    assert second == first and second is not first
+    assert len(kinematics.calls) == 1
+    assert cache.inverse((10, 20, 5), WristOrientation.HORIZONTAL) == first
+    assert len(kinematics.calls) == 2
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 2)
+
+
+def test_least_recently_used_is_evicted():
+    kinematics = FakeKinematics()
+    cache = CachedKinematics(kinematics, capacity=2)
+    for position in ((0, 0, 0), (10, 0, 0), (0, 0, 0), (20, 0, 0)):
+        cache.inverse(position)
+    assert len(kinematics.calls) == 3
+    cache.inverse((0, 0, 0))
+    assert len(kinematics.calls) == 3
+    cache.inverse((10, 0, 0))
+    assert len(kinematics.calls) == 4
+
+
+def test_miss_warm_starts_from_neighbour():
+    kinematics = FakeKinematics()
+    cache = CachedKinematics(kinematics, resolution=1.0)
+    neighbour = cache.inverse((10, 20, 5))
+    cache.inverse((11, 20, 5), initial_angles={'x': 0, 'y': 0, 'z': 0})
+    assert kinematics.calls[-1] == neighbour
+    assert cache.get_stats()['warm_starts'] == 1
+
+
+def test_solutions_missing_the_target_are_not_cached():
+    kinematics = FakeKinematics(miss=5.0)
+    cache = CachedKinematics(kinematics)
+    cache.inverse((10, 20, 5))
+    cache.inverse((10, 20, 5))
+    assert len(kinematics.calls) == 2
+    assert cache.get_stats()['size'] == 0
+
+
+def test_saved_solutions_are_only_loaded_for_the_same_fingerprint(tmp_path):
+    cache_file = str(tmp_path / 'ik-cache.json')
+    cache = CachedKinematics(FakeKinematics(), cache_file=cache_file)
+    cache.inverse((10, 20, 5))
+    cache.save()
+
+    kinematics = FakeKinematics()
+    loaded = CachedKinematics(kinematics, cache_file=cache_file)
+    assert loaded.get_stats()['size'] == 1
+    loaded.inverse((10, 20, 5))
+    assert kinematics.calls == []
+
+    assert CachedKinematics(OtherKinematics(), cache_file=cache_file).get_stats()['size'] == 0
+    coarser = CachedKinematics(FakeKinematics(), resolution=1.0, cache_file=cache_file)
+    assert coarser.get_stats()['size'] == 0
+
+
+def test_corrupted_cache_file_is_ignored(tmp_path):
+    cache_file = tmp_path / 'ik-cache.json'
+    cache_file.write_text('{"solutions": ')
+    assert CachedKinematics(FakeKinematics(), cache_file=str(cache_file)).get_stats()['size'] == 0
@@ -0,0 +1,57 @@
+from lib.constants import INITIAL_ANGLES, BASE_JOINT_ID, WRIST_JOINT_ID
+from lib.jointvector import JointVector, JOINT_ORDER, LOWER_BOUNDS, UPPER_BOUNDS
+from lib.kinematics import angles_to_array
+import numpy as np
+import pytest
+
+
+def test_default_is_initial_angles():
+    assert JointVector().to_dict() == {j_id: float(INITIAL_ANGLES[j_id]) for j_id in JOINT_ORDER}
+
+
+def test_dict_round_trip():
+    angles = {j_id: 10.5 * (i + 1) for (i, j_id) in enumerate(JOINT_ORDER)}
+    vector = JointVector.from_dict(angles)
+    assert vector.to_dict() == angles
+    assert dict(vector) == angles
+    assert list(vector.keys()) == list(JOINT_ORDER)
+    assert np.array_equal(np.asarray(vector), [angles[j_id] for j_id in JOINT_ORDER])
+
+
+def test_from_dict_fills_missing_joints():
+    vector = JointVector.from_dict({BASE_JOINT_ID: 42, 'grabber_joint': 7})
+    assert vector[BASE_JOINT_ID] == 42
+    assert vector[WRIST_JOINT_ID] == INITIAL_ANGLES[WRIST_JOINT_ID]
+    assert 'grabber_joint' not in vector
+
+
+def test_item_and_property_access_share_the_array():
+    vector = JointVector()
+    vector[BASE_JOINT_ID] = 100
+    assert vector.base == 100
+    vector.wrist = 30
+    assert vector[WRIST_JOINT_ID] == 30
+    assert vector.array[JOINT_ORDER.index(WRIST_JOINT_ID)] == 30
+
+
+def test_copy_and_clamp_do_not_change_the_original():
+    vector = JointVector(UPPER_BOUNDS + 10)
+    clamped = vector.clamp()
+    assert np.array_equal(clamped.array, UPPER_BOUNDS)
+    assert np.array_equal(vector.array, UPPER_BOUNDS + 10)
+    copy = vector.copy()
+    copy.base = 0
+    assert vector.base != 0
+    assert np.array_equal(JointVector(LOWER_BOUNDS - 1).clamp().array, LOWER_BOUNDS)
+
+
+def test_angles_to_array_accepts_dicts_and_vectors():
+    vector = JointVector()
+    array = angles_to_array([vector, vector.to_dict()])
+    assert array.shape == (2, len(JOINT_ORDER))
+    assert np.array_equal(array[0], array[1])
+
+
+def test_wrong_number_of_angles():
+    with pytest.raises(ValueError):
+        JointVector([1, 2, 3])
@@ -0,0 +1,110 @@
+from lib.chain import beatrix_rep
+from lib.kinematics import IkPyKinematics, AnalyticKinematics, WristOrientation
+from lib.locations import PUZZLE_LOCATIONS
+from lib import kinematics as kinematics_module
+from lib import codegen, transform
+from pickuptable import pixel_to_world
+import numpy as np
+import pytest
+import time
+
+
+def board_targets(count: int) -> list:
+    corners = np.array(transform.img_board, dtype=float)
+    rng = np.random.default_rng(0)
+    (lower, upper) = (corners.min(axis=0), corners.max(axis=0))
+    pixels = lower + rng.uniform(0, 1, (count, 2)) * (upper - lower)
+    return [pixel_to_world(pixel) for pixel in pixels]
+
+
+def error(kinematics, angles: dict, target) -> float:
+    return float(np.linalg.norm(np.subtract(kinematics.get_forward_cartesian(angles), target)))
+
+
+@pytest.fixture
+def single_worker():
+    kinematics = IkPyKinematics(beatrix_rep, compiled=False, multi_seed=True, workers=1)
+    yield kinematics
+    kinematics.close()
+
+
+def test_single_worker_reaches_board_targets(single_worker):
+    for target in board_targets(5):
+        angles = single_worker.inverse(target, WristOrientation.VERTICAL)
+        assert error(single_worker, angles, target) < 1.0
+
+
+def test_timeout_returns_within_budget(single_worker, monkeypatch):
+    monkeypatch.setattr(kinematics_module, 'MULTI_SEED_TIMEOUT', 0)
+    single_worker.time_budget = 0
+    target = board_targets(1)[0]
+    start = time.perf_counter()
+    angles = single_worker.inverse(target, WristOrientation.VERTICAL)
+    assert time.perf_counter() - start < 1.0
+    assert set(angles) == set(kinematics_module.JOINT_ORDER)
+
+
+def test_close_shuts_down_the_workers(single_worker):
+    target = board_targets(1)[0]
+    single_worker.inverse(target, WristOrientation.VERTICAL)
+    pool = single_worker._pool
+    single_worker.close()
+    assert single_worker._pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(abs, 1)
+    # The next call starts new workers.
+    assert error(single_worker, single_worker.inverse(target, WristOrientation.VERTICAL), target) < 1.0
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return IkPyKinematics(beatrix_rep, compiled=False)
+
+
+def test_analytic_solutions_agree_with_the_chain(reference):
+    analytic = AnalyticKinematics(beatrix_rep)
+    targets = board_targets(20) + [reference.get_forward_cartesian(location.get_angle_dict())
+                                   for location in PUZZLE_LOCATIONS.values()]
+    for target in targets:
+        for orientation in (WristOrientation.UNSET, WristOrientation.VERTICAL):
+            angles = analytic.inverse(target, orientation)
+            assert error(reference, angles, target) < 0.01
+            assert analytic.get_forward_cartesian(angles) == pytest.approx(target, abs=0.01)
+
+
+def test_analytic_out_of_reach():
+    with pytest.raises(ValueError):
+        AnalyticKinematics(beatrix_rep).inverse((0, 100, 0))
+
+
+def test_forward_batch_matches_the_chain(reference):
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(0, 180, (20, len(kinematics_module.JOINT_ORDER)))
+    positions = reference.forward_batch(angles)
+    for (row, position) in zip(angles, positions):
+        expected = reference.get_forward_cartesian(dict(zip(kinematics_module.JOINT_ORDER, row)))
+        assert position == pytest.approx(expected, abs=1e-9)
+
+
+def test_generated_module_matches_the_chain(reference, tmp_path):
+    module_file = str(tmp_path / 'generated.py')
+    module = codegen.load(beatrix_rep, module_file)
+    angles = {j_id: 45.0 + 10 * i for (i, j_id) in enumerate(kinematics_module.JOINT_ORDER)}
+    expected = reference.get_forward_cartesian(angles)
+    assert module.position(*angles.values()) == pytest.approx(expected, abs=1e-9)
+    assert module.forward(*angles.values())[:3, 3] == pytest.approx(expected, abs=1e-9)
+    # The linear rows are the change of the position per radian of every joint.
+    jacobian = module.jacobian(*angles.values())
+    for (i, j_id) in enumerate(angles):
+        moved = dict(angles, **{j_id: angles[j_id] + 1e-4})
+        change = np.subtract(module.position(*moved.values()), expected) / np.radians(1e-4)
+        assert jacobian[:3, i] == pytest.approx(change, abs=1e-3)
+
+
+def test_broken_generated_module_is_regenerated(reference, tmp_path):
+    module_file = tmp_path / 'generated.py'
+    codegen.load(beatrix_rep, str(module_file))
+    module_file.write_text(module_file.read_text()[:100])
+    module = codegen.load(beatrix_rep, str(module_file))
+    assert module.CHAIN_HASH == codegen.chain_hash(beatrix_rep)
+    assert [path.name for path in tmp_path.iterdir()] == ['generated.py']
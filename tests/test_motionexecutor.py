@@ -0,0 +1,65 @@
+from motionexecutor import MotionExecutor
+from concurrent.futures import CancelledError
+from threading import Event
+import pytest
+
+TIMEOUT = 5
+
+
+def blocking(executor: MotionExecutor, started: Event, release: Event):
+    """ Motion command that runs until it is released or cancelled, checking like a control tick. """
+    def command():
+        started.set()
+        while not release.is_set() and not executor.is_cancelled():
+            release.wait(0.001)
+        return 'done'
+    return command
+
+
+def test_commands_run_in_order():
+    executor = MotionExecutor()
+    order = []
+    futures = [executor.submit(order.append, i) for i in range(5)]
+    for future in futures:
+        future.result(timeout=TIMEOUT)
+    assert order == list(range(5))
+    assert not executor.is_busy()
+
+
+def test_exception_is_set_on_the_future():
+    executor = MotionExecutor()
+    future = executor.submit(int, 'not a number')
+    with pytest.raises(ValueError):
+        future.result(timeout=TIMEOUT)
+    assert executor.submit(int, '1').result(timeout=TIMEOUT) == 1
+
+
+def test_preempt_cancels_running_and_queued_commands():
+    executor = MotionExecutor()
+    (started, release) = (Event(), Event())
+    running = executor.submit(blocking(executor, started, release))
+    queued = executor.submit(abs, -1)
+    assert started.wait(TIMEOUT)
+    assert executor.is_busy()
+
+    preempting = executor.submit(abs, -2, preempt=True)
+    assert preempting.result(timeout=TIMEOUT) == 2
+    assert queued.cancelled()
+    with pytest.raises(CancelledError):
+        running.result(timeout=TIMEOUT)
+
+
+def test_cancel_all_does_not_affect_later_commands():
+    executor = MotionExecutor()
+    (started, release) = (Event(), Event())
+    running = executor.submit(blocking(executor, started, release))
+    assert started.wait(TIMEOUT)
+    executor.cancel_all()
+    with pytest.raises(CancelledError):
+        running.result(timeout=TIMEOUT)
+
+    (started, release) = (Event(), Event())
+    later = executor.submit(blocking(executor, started, release))
+    assert started.wait(TIMEOUT)
+    release.set()
+    assert later.result(timeout=TIMEOUT) == 'done'
@@ -0,0 +1,57 @@
+from motionloop import MotionLoop, CatchUp
+from clock import VirtualClock
+
+# Powers of two keep the virtual times exact.
+PERIOD = 0.25
+
+
+def run(loop: MotionLoop, steps: int, work: dict) -> list:
+    """ Runs the loop, sleeping `work[step]` seconds in the given steps, returns the yielded steps. """
+    yielded = []
+    for step in loop.ticks(steps):
+        yielded.append(step)
+        loop.clock.sleep(work.get(step, 0))
+    return yielded
+
+
+def test_ticks_on_absolute_deadlines():
+    clock = VirtualClock()
+    loop = MotionLoop(PERIOD, clock=clock)
+    assert run(loop, 5, {1: 0.125}) == [0, 1, 2, 3, 4]
+    # The work of step 1 is absorbed by a shorter sleep, the loop does not drift.
+    assert clock.monotonic() == 5 * PERIOD
+    stats = loop.get_stats()
+    assert (stats['ticks'], stats['overruns'], stats['max_lateness_ms']) == (5, 0, 0.0)
+    assert stats['histogram']['counts'][0] == 5
+
+
+def test_skip_drops_the_steps_that_are_due():
+    loop = MotionLoop(PERIOD, CatchUp.SKIP, clock=VirtualClock())
+    # Step 2 ends 1.5 periods after its deadline, the step that is already due is skipped.
+    assert run(loop, 8, {2: 2.5 * PERIOD}) == [0, 1, 2, 4, 5, 6, 7]
+    assert loop.clock.monotonic() == 8 * PERIOD
+    stats = loop.get_stats()
+    assert (stats['overruns'], stats['skipped_steps']) == (1, 1)
+    assert stats['max_lateness_ms'] == 1.5 * PERIOD * 1000
+
+
+def test_skip_never_skips_the_last_step():
+    loop = MotionLoop(PERIOD, CatchUp.SKIP, clock=VirtualClock())
+    assert run(loop, 4, {1: 10 * PERIOD}) == [0, 1, 3]
+
+
+def test_stretch_plays_every_step_later():
+    loop = MotionLoop(PERIOD, CatchUp.STRETCH, clock=VirtualClock())
+    assert run(loop, 8, {2: 2.5 * PERIOD}) == list(range(8))
+    assert loop.clock.monotonic() == 8 * PERIOD + 1.5 * PERIOD
+    stats = loop.get_stats()
+    assert (stats['overruns'], stats['skipped_steps']) == (1, 0)
+
+
+def test_reset_stats():
+    loop = MotionLoop(PERIOD, clock=VirtualClock())
+    run(loop, 3, {0: 2 * PERIOD})
+    loop.reset_stats()
+    stats = loop.get_stats()
+    assert (stats['ticks'], stats['overruns'], stats['mean_lateness_ms']) == (0, 0, 0.0)
+    assert sum(stats['histogram']['counts']) == 0
@@ -0,0 +1,47 @@
+from lib.chain import beatrix_rep
+from lib.kinematics import AnalyticKinematics, IkPyKinematics
+from lib.reachability import ReachabilityMap
+from pickuptable import PickupTable, pixel_to_world
+import numpy as np
+import pytest
+
+HOVER_DISTANCE = 10
+STEP = 64
+
+
+@pytest.fixture(scope='module')
+def kinematics():
+    return AnalyticKinematics(beatrix_rep, fallback=IkPyKinematics(beatrix_rep, compiled=False))
+
+
+@pytest.fixture(scope='module')
+def table(kinematics):
+    reachability = ReachabilityMap.generate(beatrix_rep)
+    return PickupTable.generate(kinematics, reachability, HOVER_DISTANCE, STEP)
+
+
+def test_interpolated_angles_reach_the_pixel(kinematics, table):
+    solved = np.argwhere((table.modes[:-1, :-1] != 0).all(axis=-1))
+    assert len(solved) > 0
+    for (i, j) in solved[::max(1, len(solved) // 10)]:
+        pixel = (table.origin[0] + (i + 0.5) * STEP, table.origin[1] + (j + 0.5) * STEP)
+        found = table.lookup(pixel)
+        if found is None:
+            continue  # The surrounding grid pixels were solved with different wrist orientations.
+        (hover, grasp) = found
+        target = np.array(pixel_to_world(pixel))
+        assert np.linalg.norm(kinematics.get_forward_cartesian(grasp.to_dict()) - target) < 1.0
+        above = target + (0, 0, HOVER_DISTANCE)
+        assert np.linalg.norm(kinematics.get_forward_cartesian(hover.to_dict()) - above) < 1.0
+
+
+def test_grid_pixels_use_their_own_solution(table):
+    (i, j) = np.argwhere((table.modes[:-1, :-1] != 0).all(axis=-1))[0]
+    (hover, grasp) = table.lookup((table.origin[0] + i * STEP, table.origin[1] + j * STEP))
+    assert np.allclose(hover.array, table.angles[i, j, 0])
+    assert np.allclose(grasp.array, table.angles[i, j, 1])
+
+
+def test_pixels_outside_of_the_table(table):
+    assert table.lookup((table.origin[0] - 1, table.origin[1])) is None
+    assert table.lookup((table.origin[0] + table.modes.shape[0] * STEP, table.origin[1])) is None
@@ -0,0 +1,55 @@
+from lib.chain import beatrix_rep
+from lib.constants import POSITION_LIMIT
+from lib.kinematics import AnalyticKinematics, WristOrientation
+from lib.reachability import ReachabilityMap
+import numpy as np
+import pytest
+
+# A coarse map is generated in a fraction of a second.
+RESOLUTION = 5.0
+
+
+@pytest.fixture(scope='module')
+def reachability():
+    return ReachabilityMap.generate(beatrix_rep, RESOLUTION)
+
+
+def voxel_center(reachability: ReachabilityMap, index) -> tuple:
+    return tuple(reachability.origin + np.array(index) * reachability.resolution)
+
+
+def test_map_agrees_with_the_analytic_solver(reachability):
+    analytic = AnalyticKinematics(beatrix_rep)
+    for orientation in (WristOrientation.UNSET, WristOrientation.VERTICAL):
+        layer = reachability.layers[orientation.value]
+        reachable, unreachable = np.argwhere(layer), np.argwhere(~layer)
+        assert len(reachable) > 0 and len(unreachable) > 0
+        for index in reachable[::len(reachable) // 10]:
+            center = voxel_center(reachability, index)
+            assert reachability.is_reachable(center, orientation)
+            analytic.inverse(center, orientation)
+        for index in unreachable[::len(unreachable) // 10]:
+            center = voxel_center(reachability, index)
+            assert not reachability.is_reachable(center, orientation)
+            with pytest.raises(ValueError):
+                analytic.inverse(center, orientation)
+
+
+def test_outside_of_the_map(reachability):
+    assert not reachability.is_reachable((0, 0, POSITION_LIMIT + 10))
+    assert not reachability.is_reachable((-POSITION_LIMIT - 10, 0, 10))
+
+
+def test_saved_map_is_only_loaded_for_the_same_fingerprint(reachability, tmp_path, monkeypatch):
+    map_file = str(tmp_path / 'reachability.npz')
+    reachability.save(map_file)
+    loaded = ReachabilityMap.load(beatrix_rep, map_file)
+    assert loaded.resolution == RESOLUTION
+    assert np.array_equal(loaded.layers, reachability.layers)
+
+    generated = []
+    monkeypatch.setattr(ReachabilityMap, 'generate',
+                        staticmethod(lambda chain: generated.append(chain) or reachability))
+    ReachabilityMap(reachability.layers, reachability.origin, RESOLUTION, 'outdated').save(map_file)
+    assert ReachabilityMap.load(beatrix_rep, map_file) is reachability
+    assert generated == [beatrix_rep]
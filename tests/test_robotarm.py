@@ -0,0 +1,118 @@
+from lib.constants import BASE_JOINT_ID, WRIST_TURN_JOINT_ID
+from lib.jointvector import JointVector, JOINT_ORDER
+from lib.locations import HOVER_ABOVE_INPUT, HOVER_ABOVE_PUZZLES
+from clock import VirtualClock
+from robotarm import RobotArm
+from concurrent.futures import CancelledError
+from threading import Event
+import numpy as np
+import pytest
+import time
+
+
+class FakeServer:
+    """ Debug server that only records the updates sent to it. """
+
+    def __init__(self):
+        self.updates = []
+
+    def send_update(self, **update):
+        self.updates.append(update)
+
+
+@pytest.fixture
+def arm():
+    return RobotArm(FakeServer(), debug_mode=True, clock=VirtualClock())
+
+
+def test_current_angles_are_a_copy(arm):
+    angles = arm.get_current_angles()
+    assert isinstance(angles, JointVector)
+    angles[BASE_JOINT_ID] += 10
+    assert arm.get_current_angles()[BASE_JOINT_ID] == angles[BASE_JOINT_ID] - 10
+    assert arm.get_current_angles([BASE_JOINT_ID]) == {BASE_JOINT_ID: angles[BASE_JOINT_ID] - 10}
+
+
+def test_linear_move_without_wrist_turn_joint(arm):
+    # The constructor moves every joint to its initial angle, so the joint is only removed afterwards.
+    arm.set_arm(HOVER_ABOVE_INPUT.get_angle_dict()).result()
+    del arm.joints[WRIST_TURN_JOINT_ID]
+    start = np.array(arm.kinematics.get_forward_cartesian(arm.get_current_angles()))
+    target = start + (0, 0, -2)
+    assert arm.move_linear(target, speed=5).result(timeout=30)
+    reached = arm.kinematics.get_forward_cartesian(arm.get_current_angles())
+    assert np.linalg.norm(np.subtract(reached, target)) < 0.5
+
+
+def test_grabber_is_set_after_the_queued_moves(arm):
+    move = arm.set_arm(HOVER_ABOVE_INPUT.get_angle_dict())
+    grabber = arm.set_grabber(closed=True)
+    assert grabber.result(timeout=30)
+    assert move.done()
+    assert arm.debug_server.updates[-1] == {'grabber': True}
+
+
+def test_grabber_command_is_cancelled_with_the_moves(arm):
+    # Keeps the executor busy until the arm is stopped, so the grabber command is still queued then.
+    started = Event()
+
+    def busy():
+        started.set()
+        while not arm.executor.is_cancelled():
+            started.wait(0.001)
+    arm.executor.submit(busy)
+    grabber = arm.set_grabber(closed=True)
+    assert started.wait(30)
+    arm.stop()
+    with pytest.raises(CancelledError):
+        grabber.result(timeout=30)
+
+
+def test_linear_move_follows_a_straight_line(arm):
+    arm.set_arm(HOVER_ABOVE_INPUT.get_angle_dict()).result()
+    start = np.array(arm.kinematics.get_forward_cartesian(arm.get_current_angles()))
+    target = start + (5, -3, -4)
+    ticks = arm.telemetry.count
+    assert arm.move_linear(target, speed=5).result(timeout=30)
+
+    commanded = arm.telemetry.to_array()[ticks - arm.telemetry.count:, 2:2 + len(JOINT_ORDER)]
+    positions = arm.kinematics.forward_batch(commanded)
+    direction = (target - start) / np.linalg.norm(target - start)
+    offsets = positions - start
+    deviation = np.linalg.norm(offsets - np.outer(offsets @ direction, direction), axis=1)
+    assert deviation.max() < 0.1
+    assert np.linalg.norm(positions[-1] - target) < 0.2
+
+
+def test_moves_between_locations_are_precomputed(arm):
+    arm.set_arm(HOVER_ABOVE_INPUT.get_joint_vector()).result()
+    before = arm.trajectory_cache.get_stats()
+    assert arm.set_arm(HOVER_ABOVE_PUZZLES.get_joint_vector()).result()
+    after = arm.trajectory_cache.get_stats()
+    assert (after['hits'] - before['hits'], after['misses'] - before['misses']) == (1, 0)
+    assert np.allclose(arm.get_current_angles().array, HOVER_ABOVE_PUZZLES.get_joint_vector().array)
+
+
+def test_virtual_clock_moves_take_their_planned_duration(arm):
+    goal = HOVER_ABOVE_INPUT.get_angle_dict()
+    duration = arm.planned_duration(goal)
+    (start, real_start) = (arm.clock.monotonic(), time.perf_counter())
+    arm.set_arm(goal).result()
+    assert arm.clock.monotonic() - start == pytest.approx(duration)
+    assert time.perf_counter() - real_start < duration / 2
+    assert arm.motion_loop.get_stats()['overruns'] == 0
+
+
+def test_snapshots_are_published_every_tick(arm):
+    goal = HOVER_ABOVE_INPUT.get_angle_dict()
+    steps = len(arm.plan_arm(goal))
+    before = arm.snapshot
+    angles = before.angles.array.copy()
+    arm.set_arm(goal).result()
+    after = arm.snapshot
+    assert after.sequence - before.sequence == steps
+    assert after.timestamp > before.timestamp
+    # A published snapshot never changes, not even by the moves after it.
+    assert np.array_equal(before.angles.array, angles)
+    with pytest.raises(ValueError):
+        after.angles[BASE_JOINT_ID] = 0
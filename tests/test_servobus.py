@@ -0,0 +1,65 @@
+from joints.emulatedpca9685 import EmulatedPCA9685
+from joints.servobus import ServoBus, duty_to_registers
+from clock import VirtualClock
+import pytest
+
+
+@pytest.fixture
+def pca():
+    pca = EmulatedPCA9685(clock=VirtualClock())
+    pca.frequency = 50  # Also enables auto-increment, as adafruit_pca9685 does.
+    return pca
+
+
+def writes(pca: EmulatedPCA9685, flush) -> int:
+    """ Returns the number of I2C transactions made by `flush`. """
+    mark = pca.mark()
+    flush()
+    return pca.get_stats(mark)['writes']
+
+
+def test_adjacent_channels_are_written_in_one_burst(pca):
+    bus = ServoBus(pca)
+    duties = {0: 3000, 1: 4000, 2: 0xFFFF, 3: 0}
+    for (channel, duty) in duties.items():
+        bus.set_duty(channel, duty)
+    assert writes(pca, bus.flush) == 1
+    # The registers only hold the upper 12 bits of the duty cycle, fully on is a separate bit.
+    assert [pca.get_duty(channel) for channel in duties] == [2992, 4000, 0xFFFF, 0]
+
+
+def test_unchanged_channels_are_not_written_again(pca):
+    bus = ServoBus(pca)
+    bus.set_duty(4, 5000)
+    assert bus.flush() == 1
+    assert writes(pca, bus.flush) == 0
+    bus.set_duty(4, 5000)
+    assert bus.flush() == 0
+
+
+def test_small_gaps_of_written_channels_are_rewritten(pca):
+    bus = ServoBus(pca)
+    for channel in range(4):
+        bus.set_duty(channel, 3000)
+    bus.flush()
+    bus.set_duty(0, 3500)
+    bus.set_duty(3, 3500)
+    assert bus.flush() == 1
+    assert [pca.get_duty(channel) for channel in range(4)] == [3488, 2992, 2992, 3488]
+
+
+def test_channels_far_apart_or_never_staged_start_a_new_burst(pca):
+    bus = ServoBus(pca)
+    bus.set_duty(0, 3000)
+    bus.set_duty(10, 3000)
+    assert bus.flush() == 2
+    bus.set_duty(11, 3000)
+    bus.set_duty(13, 3000)  # Channel 12 was never staged and must not be written.
+    assert bus.flush() == 2
+    assert pca.get_duty(12) == 0
+
+
+def test_registers_match_the_per_channel_driver(pca):
+    for duty in (0, 0x000F, 0x0010, 3000, 0xFFFE, 0xFFFF):
+        pca.channels[0].duty_cycle = duty
+        assert bytes(pca.registers[6:10]) == duty_to_registers(duty)
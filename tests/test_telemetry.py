@@ -0,0 +1,42 @@
+from telemetry import Telemetry
+import numpy as np
+import pytest
+
+
+def record(telemetry: Telemetry, ticks: range):
+    for tick in ticks:
+        telemetry.record(tick * 0.5, 0.001 * tick, [tick, -tick], [10, 20])
+
+
+def test_rows_in_chronological_order_after_wrapping():
+    telemetry = Telemetry(['a', 'b'], capacity=4)
+    assert telemetry.to_array().shape == (0, 6)
+    record(telemetry, range(6))
+    data = telemetry.to_array()
+    assert data[:, 0].tolist() == [1.0, 1.5, 2.0, 2.5]
+    assert data[-1].tolist() == [2.5, 0.005, 5, -5, 10, 20]
+    # The snapshot shares the buffer instead of copying it.
+    assert all(np.shares_memory(view, telemetry.data) for view in telemetry.snapshot())
+
+
+def test_last_seconds():
+    telemetry = Telemetry(['a', 'b'], capacity=4)
+    record(telemetry, range(6))
+    assert telemetry.to_array(seconds=1.0)[:, 0].tolist() == [1.5, 2.0, 2.5]
+    assert telemetry.to_array(seconds=0)[:, 0].tolist() == [2.5]
+
+
+def test_dump(tmp_path):
+    telemetry = Telemetry(['a', 'b'], capacity=4)
+    record(telemetry, range(3))
+    telemetry.dump(str(tmp_path / 'trace.csv'))
+    lines = (tmp_path / 'trace.csv').read_text().splitlines()
+    assert lines[0] == 'time,lateness,commanded_a,commanded_b,target_a,target_b'
+    assert len(lines) == 4
+
+    telemetry.dump(str(tmp_path / 'trace.npz'), format='npz')
+    with np.load(tmp_path / 'trace.npz') as archive:
+        assert np.array_equal(archive['data'], telemetry.to_array())
+        assert archive['columns'].tolist() == telemetry.columns
+    with pytest.raises(ValueError):
+        telemetry.dump(str(tmp_path / 'trace.json'), format='json')
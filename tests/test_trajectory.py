@@ -0,0 +1,63 @@
+from lib.constants import D_TIME, MAX_JOINT_VELOCITY, MAX_JOINT_ACCELERATION, MAX_JOINT_JERK
+from lib.jointvector import JOINT_ORDER
+from lib.locations import LOCATIONS, HOVER_ABOVE_INPUT, HOVER_ABOVE_PUZZLES, CIRCLE
+from trajectory import plan_synchronized, plan_path
+import numpy as np
+import pytest
+
+LIMITS = np.array([[MAX_JOINT_VELOCITY[j_id], MAX_JOINT_ACCELERATION[j_id], MAX_JOINT_JERK[j_id]]
+                   for j_id in JOINT_ORDER])
+
+
+def peak_ratios(start: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """ Peak velocity, acceleration and jerk of a trajectory that starts at rest, relative to the
+    limits. """
+    path = np.vstack((np.repeat(start[np.newaxis], 3, axis=0), angles))
+    return np.array([np.max(np.abs(np.diff(path, n=n, axis=0)) / (LIMITS[:, n - 1] * D_TIME**n))
+                     for n in (1, 2, 3)])
+
+
+def location_pairs():
+    vectors = [location.get_joint_vector() for location in LOCATIONS]
+    return [(start, goal) for start in vectors for goal in vectors if start is not goal]
+
+
+@pytest.mark.parametrize('start, goal', location_pairs()[::7])
+def test_synchronized_move_within_limits(start, goal):
+    trajectory = plan_synchronized(start.to_dict(), goal.to_dict(), MAX_JOINT_VELOCITY,
+                                   MAX_JOINT_ACCELERATION, MAX_JOINT_JERK)
+    columns = [JOINT_ORDER.index(j_id) for j_id in trajectory.joint_ids]
+    limits = LIMITS[columns]
+    path = np.vstack((np.repeat(start.array[columns][np.newaxis], 3, axis=0), trajectory.angles))
+    for n in (1, 2, 3):
+        assert np.all(np.abs(np.diff(path, n=n, axis=0)) <= limits[:, n - 1] * D_TIME**n * 1.001)
+    assert np.allclose(trajectory.angles[-1], goal.array[columns])
+
+
+def test_synchronized_joints_finish_together():
+    start, goal = HOVER_ABOVE_INPUT.get_joint_vector(), HOVER_ABOVE_PUZZLES.get_joint_vector()
+    trajectory = plan_synchronized(start.to_dict(), goal.to_dict(), MAX_JOINT_VELOCITY,
+                                   MAX_JOINT_ACCELERATION, MAX_JOINT_JERK)
+    columns = [JOINT_ORDER.index(j_id) for j_id in trajectory.joint_ids]
+    progress = (trajectory.angles - start.array[columns]) / (goal.array[columns] - start.array[columns])
+    assert np.allclose(progress, progress[:, :1])
+
+
+def test_path_within_limits():
+    rng = np.random.default_rng(0)
+    vectors = [location.get_joint_vector() for location in LOCATIONS]
+    for _ in range(20):
+        waypoints = [vectors[i] for i in rng.choice(len(vectors), 4, replace=False)]
+        trajectory = plan_path(waypoints, MAX_JOINT_VELOCITY, MAX_JOINT_ACCELERATION, MAX_JOINT_JERK, 10)
+        assert np.all(peak_ratios(waypoints[0].array, trajectory.angles) <= 1.001)
+        assert np.allclose(trajectory.angles[-1], waypoints[-1].array)
+
+
+def test_path_blending_is_faster_than_stopping():
+    waypoints = [location.get_joint_vector()
+                 for location in (HOVER_ABOVE_INPUT, HOVER_ABOVE_PUZZLES, CIRCLE)]
+    blended = plan_path(waypoints, MAX_JOINT_VELOCITY, MAX_JOINT_ACCELERATION, MAX_JOINT_JERK, 10)
+    stopping = plan_path(waypoints, MAX_JOINT_VELOCITY, MAX_JOINT_ACCELERATION, MAX_JOINT_JERK, 0)
+    assert blended.duration <= stopping.duration
+    # Without blending the path stops at the intermediate waypoint.
+    assert np.min(np.abs(stopping.angles - waypoints[1].array).max(axis=1)) < 1e-6
@@ -0,0 +1,45 @@
+from lib.jointvector import JointVector
+from trajectory import Trajectory, TrajectoryCache
+import numpy as np
+
+
+def planner(calls: list, value: float):
+    """ Returns a plan function that records its calls. """
+    def plan():
+        calls.append(value)
+        return Trajectory(['a'], np.full((1, 1), value))
+    return plan
+
+
+def test_get_plans_once():
+    cache = TrajectoryCache()
+    calls = []
+    key = TrajectoryCache.key([{'a': 0}, {'a': 10}], 'arm', 25)
+    first = cache.get(key, planner(calls, 1))
+    assert cache.get(key, planner(calls, 2)) is first
+    assert calls == [1]
+    assert cache.get_stats() == {'size': 1, 'hits': 1, 'misses': 1}
+
+
+def test_least_recently_used_is_evicted():
+    cache = TrajectoryCache(capacity=2)
+    calls = []
+    keys = [TrajectoryCache.key([{'a': 0}, {'a': goal}]) for goal in (1, 2, 3)]
+    cache.get(keys[0], planner(calls, 0))
+    cache.get(keys[1], planner(calls, 1))
+    cache.get(keys[0], planner(calls, 0))  # Makes keys[1] the least recently used.
+    cache.get(keys[2], planner(calls, 2))
+    assert cache.get_stats()['size'] == 2
+
+    cache.get(keys[0], planner(calls, 0))
+    assert calls == [0, 1, 2]
+    cache.get(keys[1], planner(calls, 1))
+    assert calls == [0, 1, 2, 1]
+
+
+def test_key_rounds_angles_and_accepts_joint_vectors():
+    angles = JointVector().to_dict()
+    nearly = {j_id: angle + 1e-4 for (j_id, angle) in angles.items()}
+    vector = JointVector.from_dict(nearly)
+    assert TrajectoryCache.key([angles], 'path') == TrajectoryCache.key([vector], 'path')
+    assert TrajectoryCache.key([angles], 'path') != TrajectoryCache.key([angles], 'arm')
@@ -0,0 +1,53 @@
+from lib.chain import beatrix_rep
+from lib.constants import MAX_JOINT_VELOCITY, MAX_JOINT_ACCELERATION, MAX_JOINT_JERK, POSITION_LIMIT
+from lib.kinematics import IkPyKinematics
+from lib.locations import HOVER_ABOVE_INPUT, HOVER_ABOVE_PUZZLES, INPUT_AREA_GRAB_CENTER
+from trajectory import Trajectory, plan_synchronized
+from validation import TrajectoryValidator
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope='module')
+def kinematics():
+    return IkPyKinematics(beatrix_rep, compiled=False)
+
+
+def move(start, goal) -> Trajectory:
+    return plan_synchronized(start.get_angle_dict(), goal.get_angle_dict(), MAX_JOINT_VELOCITY,
+                             MAX_JOINT_ACCELERATION, MAX_JOINT_JERK)
+
+
+def test_valid_move(kinematics):
+    validator = TrajectoryValidator(kinematics)
+    assert validator.check(move(HOVER_ABOVE_INPUT, HOVER_ABOVE_PUZZLES),
+                           HOVER_ABOVE_INPUT.get_angle_dict()) is None
+
+
+def test_empty_trajectory_is_valid(kinematics):
+    validator = TrajectoryValidator(kinematics)
+    assert validator.check(Trajectory([], np.zeros((0, 0))), HOVER_ABOVE_INPUT.get_angle_dict()) is None
+
+
+def test_below_the_floor(kinematics):
+    grasp = kinematics.get_forward_cartesian(INPUT_AREA_GRAB_CENTER.get_angle_dict())
+    validator = TrajectoryValidator(kinematics, floor_height=grasp[2] + 1)
+    violation = validator.check(move(HOVER_ABOVE_INPUT, INPUT_AREA_GRAB_CENTER),
+                                HOVER_ABOVE_INPUT.get_angle_dict())
+    assert violation is not None and 'below the floor' in violation
+
+
+def test_inside_keep_out_box(kinematics):
+    grasp = np.array(kinematics.get_forward_cartesian(INPUT_AREA_GRAB_CENTER.get_angle_dict()))
+    validator = TrajectoryValidator(kinematics, keep_out_boxes=[(grasp - 1, grasp + 1)])
+    violation = validator.check(move(HOVER_ABOVE_INPUT, INPUT_AREA_GRAB_CENTER),
+                                HOVER_ABOVE_INPUT.get_angle_dict())
+    assert violation is not None and 'inside keep out box 0' in violation
+
+
+def test_check_points_reports_first_violation(kinematics):
+    validator = TrajectoryValidator(kinematics, floor_height=0, keep_out_boxes=[])
+    points = np.array([[0, 10, 5], [POSITION_LIMIT + 1, 0, 5], [0, 10, -1]], dtype=float)
+    assert validator.check_points(points, d_time=0.5) == 'arm outside the workspace at 0.50s'
+    assert validator.check_points(points[::2]) == 'arm below the floor at step 1'
+    assert validator.check_points(points[:1]) is None